@@ -1,12 +1,18 @@
-from sorted_in_disk.sorted_in_disk import sorted_in_disk, create_tmp_folder, delete_tmp_folder
-from sorted_in_disk.utils import human_size, read_iter_from_file, write_iter_in_file
+from sorted_in_disk.sorted_in_disk import sorted_in_disk, sorted_in_disk_file, create_tmp_folder, delete_tmp_folder
+from sorted_in_disk.utils import human_size, read_iter_from_file, write_iter_in_file, read_iter_from_file_range, \
+    get_line_ranges
+from sorted_in_disk.key_codec import KeyCodec
 from sorted_in_disk.sorted_in_disk import sorted_in_disk as sortedid
 __all__ = [
     "sorted_in_disk",
     "sortedid",
+    "sorted_in_disk_file",
     "create_tmp_folder",
     "delete_tmp_folder",
     "human_size",
     "read_iter_from_file",
-    "write_iter_in_file"
+    "write_iter_in_file",
+    "read_iter_from_file_range",
+    "get_line_ranges",
+    "KeyCodec"
 ]
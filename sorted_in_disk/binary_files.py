@@ -0,0 +1,706 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# @autor: Ramón Invarato Menéndez
+
+import io
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from easy_binary_file import EasyBinaryFile
+
+
+_STRUCT_BLOCK_SIZE = struct.Struct(">I")
+_STRUCT_FOOTER_POS = struct.Struct(">Q")
+
+
+def get_compression_codec(compression):
+    """
+    Get a codec (object with compress and decompress methods) from the name of a module of standard library or
+    from a codec object
+
+    >>> codec = get_compression_codec("zlib")
+    >>> codec.decompress(codec.compress(b"data"))
+    b'data'
+
+    :param compression: 'zlib', 'lzma', 'bz2', object with compress(bytes) and decompress(bytes) methods or None
+    :exception ValueError: raise if compression is not supported
+    :return: codec or None if compression is None
+    """
+    if compression is None:
+        return None
+
+    if compression in ("zlib", "lzma", "bz2"):
+        import importlib
+        return importlib.import_module(compression)
+
+    if hasattr(compression, "compress") and hasattr(compression, "decompress"):
+        return compression
+
+    raise ValueError("compression must be 'zlib', 'lzma', 'bz2', None or an object with compress and decompress "
+                     "methods: {}".format(compression))
+
+
+class _CountingFileIO(io.FileIO):
+    """
+    Raw file that counts bytes read from disk and written to disk (count is updated one time per buffer, not one
+    time per value)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def readinto(self, buffer):
+        num_bytes = super().readinto(buffer)
+        if num_bytes:
+            self.bytes_read += num_bytes
+        return num_bytes
+
+    def readall(self):
+        data = super().readall()
+        self.bytes_read += len(data)
+        return data
+
+    def write(self, data):
+        num_bytes = super().write(data)
+        if num_bytes:
+            self.bytes_written += num_bytes
+        return num_bytes
+
+
+def open_counting_file(path_and_file, mode="rb"):
+    """
+    Open a binary file with buffer that counts bytes read from disk and written to disk in its raw file
+    (file.raw.bytes_read and file.raw.bytes_written)
+
+    >>> with open_counting_file("test_counting.tmp", "wb") as f:
+    ...     _ = f.write(b"12345")
+    >>> f.raw.bytes_written
+    5
+
+    :param path_and_file: path to file to open
+    :param mode: rb, wb or ab. By default: rb
+    :return: buffered binary file
+    """
+    raw = _CountingFileIO(path_and_file, mode)
+    if "r" in mode:
+        return io.BufferedReader(raw)
+    return io.BufferedWriter(raw)
+
+
+class CountingBinaryFile(EasyBinaryFile):
+
+    def __init__(self, path_and_file, mode='rb'):
+        """
+        EasyBinaryFile that counts bytes read from disk and written to disk (see open_counting_file)
+
+        >>> with CountingBinaryFile("test_counting.tmp", "wb") as cbf:
+        ...     cbf.dump("value")
+        >>> cbf.bytes_written > 0
+        True
+
+        :param path_and_file: path to file to open or create
+        :param mode: wb, rb or ab. By defatul: rb
+        """
+        self.path_and_file = path_and_file
+        self.mode = mode
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.file = open_counting_file(path_and_file, mode)
+
+    def close(self):
+        """
+        Close the binary file and save its counters of bytes
+
+        :return: None
+        """
+        if self.file is not None:
+            self.file.close()
+            self.bytes_read += self.file.raw.bytes_read
+            self.bytes_written += self.file.raw.bytes_written
+            self.file = None
+
+    def __enter__(self):
+        if self.file is None:
+            self.file = open_counting_file(self.path_and_file, self.mode)
+        return self
+
+
+class CompressedBlockFile(object):
+
+    def __init__(self, path_and_file, compression, mode='rb', block_size=64 * 1024, cache_blocks=8):
+        """
+        Binary file of values compressed in blocks (each block has the size of compressed data and the compressed
+        data of several pickled values). The cursor position of a value is a tuple of position of block in file and
+        position of value in the uncompressed block, then values can be read by cursor position (the last read
+        blocks are cached uncompressed).
+
+        Bytes written to disk and read from disk are counted (bytes_written and bytes_read), and bytes before
+        compression and after decompression too (raw_bytes_written and raw_bytes_read).
+
+        If compression is None, then blocks are saved without compress (same layout).
+
+        Note: it is necesary close this file in end use (last block is written when file is closed).
+
+        >>> with CompressedBlockFile("test_compressed.tmp", "zlib", "wb") as cbf:
+        ...     cbf.dump("Test value1")
+        ...     pos = cbf.get_cursor_position()
+        ...     cbf.dump("Value to get by position")
+        >>> with CompressedBlockFile("test_compressed.tmp", "zlib") as cbf:
+        ...     print(cbf.get_by_cursor_position(pos))
+        ...     print(list(cbf.load_items()))
+        Value to get by position
+        ['Test value1', 'Value to get by position']
+
+        :param path_and_file: path to file to open or create
+        :param compression: 'zlib', 'lzma', 'bz2', object with compress and decompress methods or None
+        :param mode: wb, rb or ab. By defatul: rb
+        :param block_size: (only to write) min size in bytes of uncompressed data to compress a block.
+            By default: 64 KB
+        :param cache_blocks: (only to read) number of uncompressed blocks to cache. By default: 8
+        """
+        self.path_and_file = path_and_file
+        self.compression = compression
+        self.codec = get_compression_codec(compression)
+        self.mode = mode
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.raw_bytes_read = 0
+        self.raw_bytes_written = 0
+
+        self.file = None
+        self.block = None
+        self.block_pos = None
+        self.dict_cache_blocks = None
+        self.open()
+
+    def open(self):
+        """
+        Open the file
+
+        :return: None
+        """
+        self.file = open_counting_file(self.path_and_file, self.mode)
+        self.block = bytearray()
+        self.block_pos = self.file.tell()
+        self.dict_cache_blocks = OrderedDict()
+
+    def close(self, ensure_space=False, fun_err_space=None):
+        """
+        Write the last block (if file is opened to write) and close the file
+
+        :param ensure_space: True to write the last block only if space enough in disk (retry until have space).
+            By default: False
+        :param fun_err_space: event previous to sleep if error. By default: None
+        :return: None
+        """
+        if self.file is not None:
+            if "r" not in self.mode:
+                self.flush_block(ensure_space, fun_err_space)
+            self.file.close()
+            self.bytes_read += self.file.raw.bytes_read
+            self.bytes_written += self.file.raw.bytes_written
+            self.file = None
+            self.dict_cache_blocks = None
+
+    def __enter__(self):
+        if self.file is None:
+            self.open()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_cursor_position(self):
+        """
+        Get position to dump next value
+
+        :return: tuple of position of block and position in uncompressed block
+        """
+        return self.block_pos, len(self.block)
+
+    def dump(self, value):
+        """
+        Dump one single value in file (it is compressed and written when block is full)
+
+        :param value: Value to dump in file
+        :return: None
+        """
+        self.block += pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(self.block) >= self.block_size:
+            self.flush_block()
+
+    def dump_ensure_space(self, value, fun_err_space=None):
+        """
+        Dump one single value in file, if block is full it is written only if space enough in disk.
+        If is not enough space, then it retry until have space
+
+        :param value: Value to dump in file
+        :param fun_err_space: event previous to sleep if error. By default: None
+        :return: None
+        """
+        self.block += pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(self.block) >= self.block_size:
+            self.flush_block(True, fun_err_space)
+
+    def dump_items(self, iter_to_save, ensure_space=False, fun_err_space=None):
+        """
+        Serialize one iterable in file
+
+        :param iter_to_save: iterable with items to save
+        :param ensure_space: True to dump value if space enough in disk. By default: False
+        :param fun_err_space: event previous to sleep if error. By default: None
+        :return: None
+        """
+        if ensure_space:
+            for value in iter_to_save:
+                self.dump_ensure_space(value, fun_err_space)
+        else:
+            for value in iter_to_save:
+                self.dump(value)
+
+    def flush_block(self, ensure_space=False, fun_err_space=None):
+        """
+        Compress and write the current block (if it has values)
+
+        :param ensure_space: True to write only if space enough in disk (retry until have space). By default: False
+        :param fun_err_space: event previous to sleep if error, with params times_waiting, time_to_retry and err.
+            By default: None
+        :return: None
+        """
+        if not self.block:
+            return
+
+        if self.codec is None:
+            compressed = bytes(self.block)
+        else:
+            compressed = self.codec.compress(bytes(self.block))
+        frame = _STRUCT_BLOCK_SIZE.pack(len(compressed)) + compressed
+
+        times_waiting = 0
+        retry = True
+        while retry:
+            try:
+                self.file.write(frame)
+                retry = False
+            except IOError as err:
+                if ensure_space and "No space left on device" in str(err):
+                    times_waiting += 1
+                    time_to_retry = min(0.1 * times_waiting, 3600)
+                    if fun_err_space is not None:
+                        fun_err_space(times_waiting, time_to_retry, err)
+                    time.sleep(time_to_retry)
+                else:
+                    raise
+
+        self.raw_bytes_written += len(self.block)
+        self.block_pos += len(frame)
+        self.block = bytearray()
+
+    def _read_block(self, end_pos=None):
+        """
+        Read and decompress the block in current position of file
+
+        :param end_pos: position in file where blocks end. If None, then blocks end in end of file. By default: None
+        :return: uncompressed block or None if end of blocks
+        """
+        if end_pos is not None and self.file.tell() >= end_pos:
+            return None
+
+        header = self.file.read(_STRUCT_BLOCK_SIZE.size)
+        if len(header) < _STRUCT_BLOCK_SIZE.size:
+            return None
+
+        block = self.file.read(_STRUCT_BLOCK_SIZE.unpack(header)[0])
+        if self.codec is not None:
+            block = self.codec.decompress(block)
+        self.raw_bytes_read += len(block)
+        return block
+
+    def get_block(self, block_pos):
+        """
+        Get an uncompressed block from cache or from file
+
+        :param block_pos: position of block in file
+        :return: uncompressed block
+        """
+        try:
+            self.dict_cache_blocks.move_to_end(block_pos)
+            return self.dict_cache_blocks[block_pos]
+        except KeyError:
+            self.file.seek(block_pos)
+            block = self._read_block()
+            self.dict_cache_blocks[block_pos] = block
+            if len(self.dict_cache_blocks) > self.cache_blocks:
+                self.dict_cache_blocks.popitem(last=False)
+            return block
+
+    def get_by_cursor_position(self, cursor_pos):
+        """
+        Get value by cursor position in file
+
+        :param cursor_pos: tuple of position of block and position in uncompressed block
+        :return: value in this cursor position
+        """
+        block_pos, value_pos = cursor_pos
+        return pickle.loads(memoryview(self.get_block(block_pos))[value_pos:])
+
+    def load_items(self, block_pos=0, end_pos=None):
+        """
+        Deserialize item by item from the start of a block to the end of file (block by block)
+
+        :param block_pos: position of first block to read. By default: 0 (start of file)
+        :param end_pos: position in file where blocks end. If None, then blocks end in end of file. By default: None
+        :return: generator of values
+        """
+        self.file.seek(block_pos)
+        block = self._read_block(end_pos)
+        while block is not None:
+            buffer = io.BytesIO(block)
+            len_block = len(block)
+            while buffer.tell() < len_block:
+                yield pickle.load(buffer)
+            block = self._read_block(end_pos)
+
+
+def _bisect_first_keys(list_first_keys, key, reverse=False):
+    """
+    Get the index of the last block that can have the key (the last block with first key lower or equal than key, or
+    greater or equal if reverse)
+
+    >>> from sorted_in_disk.binary_files import _bisect_first_keys
+    >>> _bisect_first_keys(["a", "d", "g"], "e")
+    1
+    >>> _bisect_first_keys(["g", "d", "a"], "e", reverse=True)
+    0
+
+    :param list_first_keys: list of first key of each block sorted
+    :param key: key to search
+    :param reverse: True if keys are sorted in reverse. By default: False
+    :return: index of block (0 if key is before the first block)
+    """
+    lo, hi = 0, len(list_first_keys)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key < list_first_keys[mid] if not reverse else list_first_keys[mid] < key:
+            hi = mid
+        else:
+            lo = mid + 1
+    return max(lo - 1, 0)
+
+
+class BlockRunFile(CompressedBlockFile):
+
+    def __init__(self, path_and_file, compression=None, mode='rb', block_size=64 * 1024, cache_blocks=8):
+        """
+        File of one run (tuples of key and list of data, sorted by key) in blocks, with layout of SSTable: blocks
+        (compressed if compression is defined) and a footer with a sparse index (first key and position of each
+        block), the number of keys, the number of data and min and max keys. The footer is pickled after the last
+        block and its position is saved in the last 8 bytes of file.
+
+        With the index the file can be read from one key (only the block with the key is searched), without read
+        previous blocks.
+
+        Note: it is necesary close this file in end use (footer is written when file is closed).
+
+        >>> with BlockRunFile("test_run.tmp", mode="wb", block_size=16) as brf:
+        ...     brf.dump_items([("a", [1]), ("b", [2, 3]), ("c", [4]), ("d", [5])])
+        >>> with BlockRunFile("test_run.tmp") as brf:
+        ...     print(brf.count_keys, brf.count_values, brf.min_key, brf.max_key)
+        ...     print(list(brf.load_items_from_key("c")))
+        4 5 a d
+        [('c', [4]), ('d', [5])]
+
+        :param path_and_file: path to file to open or create
+        :param compression: 'zlib', 'lzma', 'bz2', object with compress and decompress methods or None to not
+            compress blocks. By default: None
+        :param mode: wb or rb. By defatul: rb
+        :param block_size: (only to write) min size in bytes of uncompressed data of a block. By default: 64 KB
+        :param cache_blocks: (only to read) number of uncompressed blocks to cache. By default: 8
+        """
+        self.list_first_keys = None
+        self.list_block_positions = None
+        self.count_keys = 0
+        self.count_values = 0
+        self.min_key = None
+        self.max_key = None
+        self.end_blocks_pos = None
+        super().__init__(path_and_file, compression, mode, block_size, cache_blocks)
+
+    def open(self):
+        """
+        Open the file (and load the footer if it is opened to read)
+
+        :return: None
+        """
+        super().open()
+        if "r" in self.mode:
+            self.file.seek(-_STRUCT_FOOTER_POS.size, os.SEEK_END)
+            self.end_blocks_pos = _STRUCT_FOOTER_POS.unpack(self.file.read(_STRUCT_FOOTER_POS.size))[0]
+            self.file.seek(self.end_blocks_pos)
+            dict_footer = pickle.load(self.file)
+            self.list_first_keys = dict_footer["first_keys"]
+            self.list_block_positions = dict_footer["block_positions"]
+            self.count_keys = dict_footer["count_keys"]
+            self.count_values = dict_footer["count_values"]
+            self.min_key = dict_footer["min_key"]
+            self.max_key = dict_footer["max_key"]
+        else:
+            self.list_first_keys = list()
+            self.list_block_positions = list()
+
+    def close(self, ensure_space=False, fun_err_space=None):
+        """
+        Write the last block and the footer (if file is opened to write) and close the file
+
+        :param ensure_space: True to write only if space enough in disk (retry until have space). By default: False
+        :param fun_err_space: event previous to sleep if error. By default: None
+        :return: None
+        """
+        if self.file is not None and "r" not in self.mode:
+            self.flush_block(ensure_space, fun_err_space)
+            self.end_blocks_pos = self.block_pos
+            dict_footer = {"first_keys": self.list_first_keys,
+                           "block_positions": self.list_block_positions,
+                           "count_keys": self.count_keys,
+                           "count_values": self.count_values,
+                           "min_key": self.min_key,
+                           "max_key": self.max_key}
+            self.file.write(pickle.dumps(dict_footer, pickle.HIGHEST_PROTOCOL) +
+                            _STRUCT_FOOTER_POS.pack(self.end_blocks_pos))
+        super().close(ensure_space, fun_err_space)
+
+    def _add_to_index(self, tup):
+        """
+        Add a tuple key and list of data to the footer (index the key if it is the first of block)
+
+        :param tup: tuple key and list of data
+        :return: None
+        """
+        key = tup[0]
+        if not self.block:
+            self.list_first_keys.append(key)
+            self.list_block_positions.append(self.block_pos)
+
+        if self.count_keys == 0:
+            self.min_key = self.max_key = key
+        elif key < self.min_key:
+            self.min_key = key
+        elif self.max_key < key:
+            self.max_key = key
+
+        self.count_keys += 1
+        self.count_values += len(tup[1])
+
+    def dump(self, value):
+        """
+        Dump one tuple key and list of data in file (keys must be dumped sorted)
+
+        :param value: tuple key and list of data
+        :return: None
+        """
+        self._add_to_index(value)
+        super().dump(value)
+
+    def dump_ensure_space(self, value, fun_err_space=None):
+        """
+        Dump one tuple key and list of data in file (keys must be dumped sorted), if block is full it is written
+        only if space enough in disk. If is not enough space, then it retry until have space
+
+        :param value: tuple key and list of data
+        :param fun_err_space: event previous to sleep if error. By default: None
+        :return: None
+        """
+        self._add_to_index(value)
+        super().dump_ensure_space(value, fun_err_space)
+
+    def load_items(self, block_pos=0, end_pos=None):
+        """
+        Deserialize tuple by tuple from the start of a block to the last block (footer is not read)
+
+        :param block_pos: position of first block to read. By default: 0 (first block)
+        :param end_pos: position in file where blocks end. If None, then blocks end in footer. By default: None
+        :return: generator of tuples key and list of data
+        """
+        return super().load_items(block_pos, self.end_blocks_pos if end_pos is None else end_pos)
+
+    def load_items_from_key(self, start_key, reverse=False):
+        """
+        Deserialize tuple by tuple from the first key greater or equal than start_key (lower or equal if reverse)
+        to the end. Previous blocks are not read.
+
+        :param start_key: first key to return (included)
+        :param reverse: True if keys are sorted in reverse. By default: False
+        :return: generator of tuples key and list of data
+        """
+        if not self.list_first_keys:
+            return
+
+        iblock = _bisect_first_keys(self.list_first_keys, start_key, reverse)
+        iter_items = self.load_items(self.list_block_positions[iblock])
+        for tup in iter_items:
+            if not (start_key < tup[0] if reverse else tup[0] < start_key):
+                yield tup
+                break
+
+        for tup in iter_items:
+            yield tup
+
+
+class MMapBinaryFile(object):
+
+    def __init__(self, path_and_file):
+        """
+        Open a binary file (wrote with EasyBinaryFile) only to read values by cursor position from a memory map.
+
+        Values are loaded directly from the mapped buffer (with memoryview slices), without a seek and read
+        (syscall and buffer refill) per value. Random reads are cheap when the file is in the page cache.
+
+        Note: it is necesary close this file in end use.
+
+        >>> from easy_binary_file import EasyBinaryFile
+        >>> with EasyBinaryFile("test_mmap_object.tmp") as ebf:
+        ...     ebf.dump("Test value1")
+        ...     pos = ebf.get_cursor_position()
+        ...     ebf.dump(b"Value to get by position")
+        >>> with MMapBinaryFile("test_mmap_object.tmp") as mbf:
+        ...     print(mbf.get_by_cursor_position(pos))
+        b'Value to get by position'
+
+        :param path_and_file: path to file to open
+        """
+        self.path_and_file = path_and_file
+        self.file = None
+        self.mmap = None
+        self.buffer = None
+        self.open()
+
+    def open(self):
+        """
+        Open the file and map it in memory (an empty file can not be mapped, but it has not values to read)
+
+        :return: None
+        """
+        self.file = open(self.path_and_file, 'rb')
+        if os.fstat(self.file.fileno()).st_size > 0:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.buffer = memoryview(self.mmap)
+
+    def close(self):
+        """
+        Close the memory map and the file
+
+        :return: None
+        """
+        if self.buffer is not None:
+            self.buffer.release()
+            self.buffer = None
+
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        if self.file is None:
+            self.open()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_by_cursor_position(self, cursor_pos):
+        """
+        Get value by cursor position in file
+
+        :param cursor_pos: cursor position
+        :return: value in this cursor position
+        """
+        # Unpickler ignores bytes after the end of value, then it is not necessary to know the size of value
+        return pickle.loads(self.buffer[cursor_pos:])
+
+
+def load_by_cursor_positions(binary_file, sorted_positions, max_gap=64 * 1024):
+    """
+    Load values of several cursor positions in ascending order (reading forward in file). Near positions (with
+    max_gap bytes or less between them) are read with one single read.
+
+    >>> from easy_binary_file import EasyBinaryFile
+    >>> with EasyBinaryFile("test_positions.tmp") as ebf:
+    ...     positions = []
+    ...     for value in ["a", "b", "c"]:
+    ...         positions.append(ebf.get_cursor_position())
+    ...         ebf.dump(value)
+    >>> with EasyBinaryFile("test_positions.tmp", "rb") as ebf:
+    ...     sorted(load_by_cursor_positions(ebf, positions).values())
+    ['a', 'b', 'c']
+
+    :param binary_file: EasyBinaryFile opened in rb mode, MMapBinaryFile or CompressedBlockFile
+    :param sorted_positions: list of cursor positions sorted in ascending order (without duplicates)
+    :param max_gap: max bytes between two positions to read them in same read. By default: 64 KB
+    :return: dict of values by cursor position
+    """
+    dict_pos_values = dict()
+
+    if isinstance(binary_file, (MMapBinaryFile, CompressedBlockFile)):
+        for cursor_pos in sorted_positions:
+            dict_pos_values[cursor_pos] = binary_file.get_by_cursor_position(cursor_pos)
+        return dict_pos_values
+
+    file = binary_file.file
+    num_positions = len(sorted_positions)
+    i_first = 0
+    while i_first < num_positions:
+        i_last = i_first
+        while i_last + 1 < num_positions and sorted_positions[i_last + 1] - sorted_positions[i_last] <= max_gap:
+            i_last += 1
+
+        first_pos = sorted_positions[i_first]
+        last_pos = sorted_positions[i_last]
+        file.seek(first_pos)
+        if i_last > i_first:
+            # Each value ends before the start of the next position, then all values except last are in the buffer
+            buffer = memoryview(file.read(last_pos - first_pos))
+            for cursor_pos in sorted_positions[i_first:i_last]:
+                dict_pos_values[cursor_pos] = pickle.loads(buffer[cursor_pos - first_pos:])
+            buffer.release()
+
+        # The file is in the last position, then last value is loaded reading forward
+        dict_pos_values[last_pos] = pickle.load(file)
+        i_first = i_last + 1
+
+    return dict_pos_values
+
+
+__test__ = {
+    'import_test': """
+                   >>> from sorted_in_disk.binary_files import *
+
+                   """,
+    'clean_test_files': """
+                        >>> from pathlib import Path
+                        >>> Path("test_mmap_object.tmp").unlink(missing_ok=True)
+                        >>> Path("test_positions.tmp").unlink(missing_ok=True)
+                        >>> Path("test_counting.tmp").unlink(missing_ok=True)
+                        >>> Path("test_compressed.tmp").unlink(missing_ok=True)
+                        >>> Path("test_run.tmp").unlink(missing_ok=True)
+
+                        """}
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# @autor: Ramón Invarato Menéndez
+
+import math
+import struct
+
+
+__test__ = {'import_test': """
+                           >>> from sorted_in_disk.key_codec import *
+
+                           """}
+
+
+_TAG_NEG_INF = 0x10
+_TAG_NUMBER = 0x11
+_TAG_POS_INF = 0x12
+_TAG_NAN = 0x13
+_TAG_BYTES = 0x20
+_TAG_STR = 0x30
+_TAG_TUPLE = 0x40
+
+_END_TUPLE = b"\x00"
+_END_BYTES = b"\x00\x01"
+_ESCAPED_ZERO = b"\x00\xff"
+
+_TYPE_BOOL = 0
+_TYPE_INT = 1
+_TYPE_FLOAT = 2
+
+_INVERT_TABLE = bytes(range(255, -1, -1))
+
+_STRUCT_DOUBLE = struct.Struct(">d")
+
+
+def _invert(encoded):
+    """
+    Invert all bytes to reverse the order of an encoded value
+
+    :param encoded: bytes to invert
+    :return: bytes inverted
+    """
+    return encoded.translate(_INVERT_TABLE)
+
+
+def _encode_int(number):
+    """
+    Encode an integer with 2 bytes of length (length is inverted for negative numbers) and its magnitude in big
+    endian (magnitude is inverted for negative numbers)
+
+    :param number: integer to encode
+    :return: bytes of integer
+    """
+    if number >= 0:
+        magnitude = number.to_bytes((number.bit_length() + 7) // 8, "big")
+        return (0x8000 + len(magnitude)).to_bytes(2, "big") + magnitude
+
+    magnitude = (-number).to_bytes(((-number).bit_length() + 7) // 8, "big")
+    return (0x7FFF - len(magnitude)).to_bytes(2, "big") + _invert(magnitude)
+
+
+def _encode_number(number):
+    """
+    Encode a bool, int or float: integer part (floor), fractional part (if it is not 0) and type
+
+    :param number: number to encode
+    :return: bytes of number
+    """
+    if isinstance(number, float):
+        if math.isnan(number):
+            return bytes((_TAG_NAN,))
+        if math.isinf(number):
+            return bytes((_TAG_NEG_INF if number < 0 else _TAG_POS_INF,))
+
+        # Distance to the truncated number is exact (number - floor can be rounded to 1.0 if number is a little
+        # negative), then for negative numbers integer part is the floor and fraction is the distance to trunc
+        integer = math.trunc(number)
+        fraction = abs(number - integer)
+        if fraction and number < 0:
+            integer -= 1
+        type_number = _TYPE_FLOAT
+    else:
+        integer = int(number)
+        fraction = 0
+        type_number = _TYPE_BOOL if isinstance(number, bool) else _TYPE_INT
+
+    if fraction:
+        # Fraction is in (0, 1), then bytes of positive double are sorted as numbers. Negative numbers have the
+        # floor as integer part, then a greater fraction is a smaller number (bytes are inverted)
+        if integer < 0:
+            encoded_fraction = b"\x01" + _invert(_STRUCT_DOUBLE.pack(fraction))
+        else:
+            encoded_fraction = b"\x01" + _STRUCT_DOUBLE.pack(fraction)
+    else:
+        encoded_fraction = b"\x00"
+
+    return bytes((_TAG_NUMBER,)) + _encode_int(integer) + encoded_fraction + bytes((type_number,))
+
+
+def _encode(key, descending=False):
+    """
+    Encode a key in bytes sorted as the key
+
+    :param key: str, bytes, bool, int, float or tuple of these
+    :param descending: True to reverse order of this key. If key is a tuple, then it can be a tuple of bools to
+        reverse order of each component (components without a bool are ascending)
+    :return: bytes of key
+    """
+    if isinstance(key, tuple):
+        if isinstance(descending, tuple):
+            components = [_encode(component, descending[icomponent] if icomponent < len(descending) else False)
+                          for icomponent, component in enumerate(key)]
+            return bytes((_TAG_TUPLE,)) + b"".join(components) + _END_TUPLE
+
+        encoded = bytes((_TAG_TUPLE,)) + b"".join(_encode(component) for component in key) + _END_TUPLE
+    elif isinstance(key, str):
+        encoded = bytes((_TAG_STR,)) + \
+                  key.encode("utf-8", "surrogatepass").replace(b"\x00", _ESCAPED_ZERO) + \
+                  _END_BYTES
+    elif isinstance(key, (bytes, bytearray)):
+        encoded = bytes((_TAG_BYTES,)) + bytes(key).replace(b"\x00", _ESCAPED_ZERO) + _END_BYTES
+    elif isinstance(key, (int, float)):
+        encoded = _encode_number(key)
+    else:
+        raise TypeError("Type of key not allowed to encode: {}".format(type(key)))
+
+    if descending is True:
+        return _invert(encoded)
+    return encoded
+
+
+def _decode(encoded, pos=0, descending=False):
+    """
+    Decode a key from encoded bytes
+
+    :param encoded: bytes with encoded key
+    :param pos: position of first byte of key. By default: 0
+    :param descending: same descending used to encode the key. By default: False
+    :return: tuple of key and position of next byte after the key
+    """
+    mask = 0xFF if descending is True else 0x00
+    tag = encoded[pos] ^ mask
+    pos += 1
+
+    if tag == _TAG_TUPLE:
+        list_components = list()
+        end_tuple = _END_TUPLE[0] ^ mask
+        icomponent = 0
+        while encoded[pos] != end_tuple:
+            if isinstance(descending, tuple):
+                descending_component = descending[icomponent] if icomponent < len(descending) else False
+            else:
+                descending_component = descending
+            component, pos = _decode(encoded, pos, descending_component)
+            list_components.append(component)
+            icomponent += 1
+        return tuple(list_components), pos + 1
+
+    if tag == _TAG_STR or tag == _TAG_BYTES:
+        zero = 0x00 ^ mask
+        list_chunks = list()
+        while True:
+            pos_zero = encoded.index(zero, pos)
+            list_chunks.append(encoded[pos:pos_zero])
+            if encoded[pos_zero + 1] ^ mask == 0xFF:
+                list_chunks.append(bytes((zero,)))
+                pos = pos_zero + 2
+            else:
+                pos = pos_zero + 2
+                break
+
+        raw = b"".join(list_chunks)
+        if mask:
+            raw = _invert(raw)
+
+        if tag == _TAG_STR:
+            return raw.decode("utf-8", "surrogatepass"), pos
+        return raw, pos
+
+    if tag == _TAG_NAN:
+        return math.nan, pos
+    if tag == _TAG_NEG_INF:
+        return -math.inf, pos
+    if tag == _TAG_POS_INF:
+        return math.inf, pos
+
+    if tag == _TAG_NUMBER:
+        len_prefix = ((encoded[pos] ^ mask) << 8) | (encoded[pos + 1] ^ mask)
+        pos += 2
+        if len_prefix >= 0x8000:
+            len_magnitude = len_prefix - 0x8000
+            magnitude = encoded[pos:pos + len_magnitude]
+            if mask:
+                magnitude = _invert(magnitude)
+            integer = int.from_bytes(magnitude, "big")
+        else:
+            len_magnitude = 0x7FFF - len_prefix
+            magnitude = encoded[pos:pos + len_magnitude]
+            if not mask:
+                magnitude = _invert(magnitude)
+            integer = -int.from_bytes(magnitude, "big")
+        pos += len_magnitude
+
+        fraction = 0.0
+        if encoded[pos] ^ mask:
+            encoded_fraction = encoded[pos + 1:pos + 9]
+            if bool(mask) != (integer < 0):
+                encoded_fraction = _invert(encoded_fraction)
+            fraction = _STRUCT_DOUBLE.unpack(encoded_fraction)[0]
+            pos += 9
+        else:
+            pos += 1
+
+        type_number = encoded[pos] ^ mask
+        pos += 1
+        if type_number == _TYPE_FLOAT:
+            if fraction and integer < 0:
+                return float(integer + 1) - fraction, pos
+            return float(integer) + fraction, pos
+        if type_number == _TYPE_BOOL:
+            return bool(integer), pos
+        return integer, pos
+
+    raise ValueError("Encoded key not valid (tag {} in position {})".format(tag, pos - 1))
+
+
+class KeyCodec(object):
+
+    def __init__(self, descending=False):
+        """
+        Encode keys (str, bytes, bool, int, float and tuples of these) in bytes that are sorted in same way as keys
+        (bytes are compared with memcmp, quicker than compare tuples or mixed types, smaller than pickled keys and
+        independent of pickle).
+
+        Numbers are sorted by value (int and float can be mixed; if values are equal, then bool is before int and
+        int is before float), then -inf, numbers, inf and nan. Different types are sorted in this order: numbers,
+        bytes, str and tuples.
+
+        >>> from sorted_in_disk.key_codec import KeyCodec
+        >>> kc = KeyCodec()
+        >>> keys = [("b", 2), ("a", 10.5), ("a", -3), ("a", 2)]
+        >>> sorted(keys, key=kc.encode) == sorted(keys)
+        True
+        >>> kc.decode(kc.encode(("a", -3.25, b"xyz")))
+        ('a', -3.25, b'xyz')
+
+        Descending components:
+        >>> kc = KeyCodec(descending=(False, True))
+        >>> sorted(keys, key=kc.encode)
+        [('a', 10.5), ('a', 2), ('a', -3), ('b', 2)]
+
+        Note: it is picklable to send to other processes.
+
+        :param descending: True to reverse order of keys. If keys are tuples, then it can be a tuple of bools to
+            reverse order of each component (components without a bool are ascending). By default: False
+        """
+        self.descending = descending
+
+    def encode(self, key):
+        """
+        Encode a key
+
+        :param key: key to encode
+        :return: bytes of encoded key
+        """
+        return _encode(key, self.descending)
+
+    def decode(self, encoded):
+        """
+        Decode a key encoded with encode()
+
+        :param encoded: bytes of encoded key
+        :return: key
+        """
+        return _decode(encoded, 0, self.descending)[0]
+
+    def __eq__(self, other):
+        return isinstance(other, KeyCodec) and self.descending == other.descending
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.descending)
+
+    def __repr__(self):
+        return "KeyCodec(descending={})".format(self.descending)
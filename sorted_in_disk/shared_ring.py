@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# @autor: Ramón Invarato Menéndez
+
+import multiprocessing
+import struct
+import time
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+
+
+__test__ = {'import_test': """
+                           >>> from sorted_in_disk.shared_ring import *
+
+                           """}
+
+
+_STRUCT_COUNTER = struct.Struct(">Q")
+_STRUCT_FRAME_SIZE = struct.Struct(">I")
+# Flag in size of frame if the payload continues in next frame (payloads bigger than ring are split in parts)
+_FLAG_MORE_PARTS = 0x80000000
+
+
+class SharedMemoryRing(object):
+    """
+    Ring buffer in shared memory to send elements from one producer process to one consumer process. Elements are
+    grouped in batches, each batch is pickled once and written as a frame (length prefixed) in the ring, then the
+    consumer unpickles each batch from the shared memory (without pipe and without copy if the frame is not split in
+    the end of ring). A batch bigger than the ring is written in several frames (parts of half of ring) that the
+    consumer joins while the producer writes them.
+
+    Interface is similar to QQueue (put, put_iterable, end, get and empty), then it can replace the queue of a write
+    process.
+
+    >>> ring = SharedMemoryRing(1024, batch_size=2)
+    >>> ring.put_iterable([("key1", "a"), ("key2", "b"), ("key3", "c")])
+    >>> ring.end()
+    >>> ring.get(timeout=1)
+    ('key1', 'a')
+    >>> ring.get_batch(timeout=1)
+    [('key2', 'b')]
+    >>> ring.get_batch(timeout=1)
+    [('key3', 'c')]
+    >>> list(ring)
+    []
+    >>> ring.empty()
+    True
+    >>> ring.unlink()
+
+    Note: the ring must be released with unlink by the process that created it (when consumer ended). If the
+    consumer is other process, then the producer should set its liveness check (set_fun_is_consumer_alive) to raise
+    an error instead of wait forever for free space if the consumer dies.
+    """
+
+    def __init__(self, ring_size=16 * 1024 * 1024, batch_size=1000):
+        """
+        :param ring_size: size in bytes of ring (a bigger batch pickled is written in parts). By default: 16 MB
+        :param batch_size: number of elements of each batch. By default: 1000
+        :exception ImportError: raise if multiprocessing.shared_memory is not available (Python < 3.8)
+        """
+        if shared_memory is None:
+            raise ImportError("multiprocessing.shared_memory is required (Python >= 3.8)")
+
+        self.ring_size = ring_size
+        self.batch_size = batch_size
+
+        # Header with the counter of bytes read by consumer, then the ring
+        self.shm = shared_memory.SharedMemory(create=True, size=_STRUCT_COUNTER.size + ring_size)
+        _STRUCT_COUNTER.pack_into(self.shm.buf, 0, 0)
+        self.sem_frames = multiprocessing.Semaphore(0)
+
+        self._init_local_state()
+
+    def _init_local_state(self):
+        # Producer state
+        self.batch = list()
+        self.count_bytes_written = 0
+        self.fun_is_consumer_alive = None
+        # Consumer state
+        self.count_bytes_read = 0
+        self.list_elements = list()
+        self.index_element = 0
+        self.list_parts = list()
+        self.is_ended = False
+        self.is_unlinked = False
+
+    def __getstate__(self):
+        return self.shm.name, self.ring_size, self.batch_size, self.sem_frames
+
+    def __setstate__(self, state):
+        name, self.ring_size, self.batch_size, self.sem_frames = state
+        self.shm = shared_memory.SharedMemory(name=name)
+        self._init_local_state()
+
+    def set_fun_is_consumer_alive(self, fun_is_consumer_alive):
+        """
+        Set the function to check if the consumer is alive while the producer waits for free space in ring (only in
+        the producer process, it is not sent to other processes)
+
+        :param fun_is_consumer_alive: function without args to return False if consumer died (for example is_alive
+            of consumer process) or None to not check
+        :return: None
+        """
+        self.fun_is_consumer_alive = fun_is_consumer_alive
+
+    def is_consumer_alive(self):
+        """
+        :return: False if consumer died (True if the liveness check is not set)
+        """
+        return self.fun_is_consumer_alive is None or self.fun_is_consumer_alive()
+
+    def _write_bytes(self, pos, data):
+        """
+        Write bytes in ring (split in two parts if the end of ring is reached)
+
+        :param pos: counter of bytes written (position in ring is this modulo ring_size)
+        :param data: bytes to write
+        :return: None
+        """
+        start = _STRUCT_COUNTER.size + pos % self.ring_size
+        first_size = min(len(data), _STRUCT_COUNTER.size + self.ring_size - start)
+        self.shm.buf[start:start + first_size] = data[:first_size]
+        if first_size < len(data):
+            self.shm.buf[_STRUCT_COUNTER.size:_STRUCT_COUNTER.size + len(data) - first_size] = data[first_size:]
+
+    def _read_bytes(self, pos, size):
+        """
+        Read bytes from ring (a memoryview of shared memory if bytes are not split in the end of ring)
+
+        :param pos: counter of bytes read (position in ring is this modulo ring_size)
+        :param size: number of bytes to read
+        :return: bytes or memoryview
+        """
+        start = _STRUCT_COUNTER.size + pos % self.ring_size
+        first_size = min(size, _STRUCT_COUNTER.size + self.ring_size - start)
+        if first_size == size:
+            return self.shm.buf[start:start + size]
+        return bytes(self.shm.buf[start:start + first_size]) + \
+            bytes(self.shm.buf[_STRUCT_COUNTER.size:_STRUCT_COUNTER.size + size - first_size])
+
+    def write_frame(self, payload, wait=True):
+        """
+        Write a frame (size and payload) in ring. If the frame is bigger than the ring, then the payload is split in
+        parts of half of ring written in consecutive frames (the consumer must read parts to free space for the next
+        ones).
+
+        :param payload: bytes to write (empty to mark the end)
+        :param wait: True to wait for free space if the ring is full (parts after the first one always wait).
+            By default: True
+        :exception BrokenPipeError: raise if consumer died while waiting for free space
+        :return: True if frame was written (False only if wait is False and ring is full)
+        """
+        if _STRUCT_FRAME_SIZE.size + len(payload) <= self.ring_size:
+            return self._write_part(payload, 0, wait)
+
+        part_size = self.ring_size // 2 - _STRUCT_FRAME_SIZE.size
+        view_payload = memoryview(payload)
+        try:
+            for start in range(0, len(payload), part_size):
+                flag = _FLAG_MORE_PARTS if start + part_size < len(payload) else 0
+                if not self._write_part(view_payload[start:start + part_size], flag, wait or start > 0):
+                    return False
+        finally:
+            view_payload.release()
+        return True
+
+    def _write_part(self, payload, flag, wait):
+        """
+        Write one frame (size with flag and payload) in ring
+
+        :param payload: bytes to write (smaller than ring)
+        :param flag: _FLAG_MORE_PARTS if the payload continues in next frame or 0
+        :param wait: True to wait for free space if the ring is full
+        :exception BrokenPipeError: raise if consumer died while waiting for free space
+        :return: True if frame was written (False only if wait is False and ring is full)
+        """
+        frame_size = _STRUCT_FRAME_SIZE.size + len(payload)
+
+        times_waiting = 0
+        while self.ring_size - (self.count_bytes_written - _STRUCT_COUNTER.unpack_from(self.shm.buf, 0)[0]) < \
+                frame_size:
+            if not wait:
+                return False
+            if not self.is_consumer_alive():
+                raise BrokenPipeError("Consumer of ring is not alive, batch of {} bytes can not be "
+                                      "written".format(frame_size))
+            times_waiting += 1
+            time.sleep(min(0.0001 * times_waiting, 0.01))
+
+        self._write_bytes(self.count_bytes_written, _STRUCT_FRAME_SIZE.pack(len(payload) | flag))
+        self._write_bytes(self.count_bytes_written + _STRUCT_FRAME_SIZE.size, payload)
+        self.count_bytes_written += frame_size
+        self.sem_frames.release()
+        return True
+
+    def flush(self):
+        """
+        Write the batch of elements put (if any) in ring
+
+        :return: None
+        """
+        if self.batch:
+            self.write_frame(pickle.dumps(self.batch, protocol=pickle.HIGHEST_PROTOCOL))
+            self.batch = list()
+
+    def put(self, element):
+        """
+        Put one element (it is written in ring when the batch is full)
+
+        :param element: element to send
+        :return: None
+        """
+        self.batch.append(element)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def put_iterable(self, iterable):
+        """
+        Put all elements of iterable (all are written in ring at the end)
+
+        :param iterable: iterable of elements to send
+        :return: None
+        """
+        for element in iterable:
+            self.put(element)
+        self.flush()
+
+    def end(self):
+        """
+        Write the last batch and mark the end of elements
+
+        :return: None
+        """
+        self.flush()
+        self.write_frame(b"")
+
+    def get_batch(self, timeout=None):
+        """
+        Get the elements of the current batch not got yet or the elements of the next batch
+
+        :param timeout: max seconds to wait for each frame of a batch. If None, then wait forever. By default: None
+        :exception queue.Empty: raise if there is not a batch in timeout or if the end was read (parts of a batch
+            read before timeout are kept to the next call)
+        :return: list of elements
+        """
+        if self.index_element < len(self.list_elements):
+            batch = self.list_elements[self.index_element:]
+            self.list_elements = list()
+            self.index_element = 0
+            return batch
+
+        while True:
+            if self.is_ended or not self.sem_frames.acquire(timeout=timeout):
+                raise queue.Empty
+
+            frame_header = _STRUCT_FRAME_SIZE.unpack(bytes(self._read_bytes(self.count_bytes_read,
+                                                                            _STRUCT_FRAME_SIZE.size)))[0]
+            payload_size = frame_header & ~_FLAG_MORE_PARTS
+            if frame_header == 0:
+                self.is_ended = True
+                batch = None
+            else:
+                payload = self._read_bytes(self.count_bytes_read + _STRUCT_FRAME_SIZE.size, payload_size)
+                if frame_header & _FLAG_MORE_PARTS or self.list_parts:
+                    # Part of a batch bigger than ring (it is copied to free its space in ring)
+                    self.list_parts.append(bytes(payload))
+                    batch = None
+                else:
+                    # Batch is unpickled from shared memory (then memory of frame is released to producer)
+                    batch = pickle.loads(payload)
+                if isinstance(payload, memoryview):
+                    payload.release()
+
+            self.count_bytes_read += _STRUCT_FRAME_SIZE.size + payload_size
+            _STRUCT_COUNTER.pack_into(self.shm.buf, 0, self.count_bytes_read)
+
+            if self.is_ended:
+                raise queue.Empty
+            if not frame_header & _FLAG_MORE_PARTS:
+                if self.list_parts:
+                    batch = pickle.loads(b"".join(self.list_parts))
+                    self.list_parts = list()
+                return batch
+
+    def get(self, timeout=None):
+        """
+        Get one element
+
+        :param timeout: max seconds to wait for a batch. If None, then wait forever. By default: None
+        :exception queue.Empty: raise if there is not a batch in timeout or if the end was read
+        :return: element
+        """
+        if self.index_element >= len(self.list_elements):
+            self.list_elements = self.get_batch(timeout=timeout)
+            self.index_element = 0
+
+        element = self.list_elements[self.index_element]
+        self.index_element += 1
+        return element
+
+    def __iter__(self):
+        """
+        :return: generator of elements until the end is read
+        """
+        while not self.is_ended:
+            try:
+                yield self.get()
+            except queue.Empty:
+                pass
+        while self.index_element < len(self.list_elements):
+            yield self.get()
+
+    def empty(self):
+        """
+        :return: True if the end was read and all elements were got
+        """
+        return self.is_ended and self.index_element >= len(self.list_elements)
+
+    def close(self):
+        """
+        Close access to shared memory in this process
+
+        :return: None
+        """
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Close and release shared memory (only the process that created the ring, when consumer ended). It can be
+        called more than once.
+
+        :return: None
+        """
+        if not self.is_unlinked:
+            self.shm.close()
+            self.shm.unlink()
+            self.is_unlinked = True
+
+
+class SharedMemoryRingDispatcher(object):
+    """
+    Producer of several rings (one per consumer). Each batch is pickled once and written in the next ring with free
+    space (round robin), then consumers with more throughput receive more batches.
+
+    >>> list_rings = [SharedMemoryRing(1024, batch_size=2) for _ in range(2)]
+    >>> dispatcher = SharedMemoryRingDispatcher(list_rings)
+    >>> dispatcher.put_iterable(range(5))
+    >>> dispatcher.end()
+    >>> [list(ring) for ring in list_rings]
+    [[0, 1, 4], [2, 3]]
+    >>> for ring in list_rings:
+    ...     ring.unlink()
+
+    Note: rings are not released by the dispatcher (use unlink of each ring).
+    """
+
+    def __init__(self, list_rings):
+        """
+        :param list_rings: list of SharedMemoryRing (one per consumer)
+        """
+        self.list_rings = list_rings
+        self.batch_size = list_rings[0].batch_size
+        self.batch = list()
+        self.index_ring = 0
+
+    def flush(self):
+        """
+        Write the batch of elements put (if any) in one ring
+
+        :exception BrokenPipeError: raise if all rings are full and the consumer of one of them died
+        :return: None
+        """
+        if self.batch:
+            payload = pickle.dumps(self.batch, protocol=pickle.HIGHEST_PROTOCOL)
+            self.batch = list()
+
+            num_rings = len(self.list_rings)
+            times_waiting = 0
+            while True:
+                for _ in range(num_rings):
+                    ring = self.list_rings[self.index_ring]
+                    self.index_ring = (self.index_ring + 1) % num_rings
+                    if ring.write_frame(payload, wait=False):
+                        return
+                # All rings are full (a dead consumer never frees space, then its data would be lost)
+                for ring in self.list_rings:
+                    if not ring.is_consumer_alive():
+                        raise BrokenPipeError("Consumer of one ring is not alive, batch of {} bytes can not be "
+                                              "written".format(len(payload)))
+                times_waiting += 1
+                time.sleep(min(0.0001 * times_waiting, 0.01))
+
+    def put(self, element):
+        """
+        Put one element (it is written in one ring when the batch is full)
+
+        :param element: element to send
+        :return: None
+        """
+        self.batch.append(element)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def put_iterable(self, iterable):
+        """
+        Put all elements of iterable (all are written in rings at the end)
+
+        :param iterable: iterable of elements to send
+        :return: None
+        """
+        for element in iterable:
+            self.put(element)
+        self.flush()
+
+    def end(self):
+        """
+        Write the last batch and mark the end of elements in all rings
+
+        :return: None
+        """
+        self.flush()
+        for ring in self.list_rings:
+            ring.end()
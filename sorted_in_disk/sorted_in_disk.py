@@ -8,12 +8,23 @@ import sys
 import time
 import multiprocessing
 import gc
+import copy
+import asyncio
+import heapq
+from bisect import bisect_right
+import pickle
+from itertools import chain, islice
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 import logging
 
-from .utils import human_size
+from .shared_ring import SharedMemoryRing, SharedMemoryRingDispatcher
+from .utils import human_size, write_iter_in_file, get_line_ranges, read_iter_from_file_range
+from .binary_files import MMapBinaryFile, CountingBinaryFile, CompressedBlockFile, BlockRunFile, \
+    get_compression_codec, load_by_cursor_positions
 
-from easy_binary_file import EasyBinaryFile, load_single_value, dump_single_value, quick_dump_items, quick_load_items
+from easy_binary_file import load_single_value, dump_single_value
 from quick_queue import QQueue
 
 
@@ -28,6 +39,27 @@ __test__ = {'import_test': """
 
                            """}
 
+# Number of tuples of each run read ahead in a thread (with read_ahead_threads)
+_READ_AHEAD_CHUNK = 1000
+# Number of keys to read ahead its values in a thread if prefetch_window is not defined (with read_ahead_threads)
+_READ_AHEAD_WINDOW = 1000
+# Size in bytes of each batch sent by a read process with "shared_memory" if batch_bytes is not defined
+_READ_BATCH_BYTES = 64 * 1024
+# Min size in bytes of ring of each read process and min number of batches in the ring
+_READ_RING_SIZE = 16 * 1024 * 1024
+_READ_RING_BATCHES = 16
+# Min size in bytes of uncompressed data of each block of pre-sorted files (runs)
+_RUN_BLOCK_SIZE = 64 * 1024
+# Sizes of keys and data in cache of writers are sampled with sys.getsizeof one time each this number of inserts
+_MEMORY_SAMPLE_EVERY = 100
+# Bytes of each new key in cache without the key (entry of dict and list of data) and of each data without the data
+_CACHE_KEY_OVERHEAD_BYTES = 3 * 8 * 3 // 2 + sys.getsizeof([None])
+_CACHE_DATA_OVERHEAD_BYTES = 8
+# Number of elements of each batch passed between the event loop and the thread of async methods
+_ASYNC_BATCH_SIZE = 1000
+# Max number of batches of async_save_and_sort waiting to be saved
+_ASYNC_QUEUE_BATCHES = 16
+
 
 def sorted_in_disk(iterable,
                    key=None,
@@ -43,8 +75,21 @@ def sorted_in_disk(iterable,
                    count_insert_to_check=1000000,
                    max_write_process_size=1024 * 1024 * 1024,
                    ensure_space=False,
+                   payload_runs=False,
+                   key_codec=None,
+                   compression=None,
+                   limit=None,
+                   unique=False,
+                   reduce=None,
+                   initial=None,
+                   combine=None,
 
                    write_processes=0,
+                   partition_keys=None,
+                   partition_sample_size=None,
+                   extract_in_write_processes=False,
+                   transport="queue",
+                   ring_size=16 * 1024 * 1024,
                    queue_max_size=1000,
                    size_bucket_list=None,
                    min_size_bucket_list=10,
@@ -54,6 +99,14 @@ def sorted_in_disk(iterable,
                    iter_m_queue_max_size=1000,
                    iter_min_size_bucket_list=10,
                    iter_max_size_bucket_list=None,
+                   iter_transport="queue",
+                   iter_batch_bytes=64 * 1024,
+
+                   max_merge_fanin=None,
+                   mmap_values=False,
+                   prefetch_window=None,
+                   read_ahead_threads=None,
+                   parallel_read_processes=None,
 
                    logging_level=logging.WARNING):
     """
@@ -118,6 +171,49 @@ def sorted_in_disk(iterable,
     >>> list(sid)
     ['valH|key0|valK', 'valB|key1|valE', 'valC|key2|valF', 'valA|key3|valD', 'valG|key4|valJ']
 
+    Example to save keys encoded in bytes (tuple keys with second component in descending order):
+    >>> from sorted_in_disk import KeyCodec
+    >>> iterable_unsorted = ["a|3", "b|1", "a|10"]
+    >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: (line.split("|")[0], int(line.split("|")[1])),
+    ...                      key_codec=KeyCodec(descending=(False, True)))
+    >>> list(sid.items())
+    [(('a', 10), 'a|10'), (('a', 3), 'a|3'), (('b', 1), 'b|1')]
+
+    Example to compress temporal files in blocks (and get bytes written and read to choose a compression):
+    >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF"]
+    >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1], compression="zlib")
+    >>> list(sid)
+    ['valB|key1|valE', 'valC|key2|valF', 'valA|key3|valD']
+    >>> io_stats = sid.get_io_stats()
+    >>> io_stats["bytes_written"] > 0 and io_stats["bytes_read"] > 0
+    True
+
+    Example to keep only the first sorted elements (without save all elements in disk):
+    >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF", "valD|key1|valG"]
+    >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1], limit=2)
+    >>> list(sid)
+    ['valB|key1|valE', 'valD|key1|valG']
+
+    Example to keep only one value per key (the last injected):
+    >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key3|valF"]
+    >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1], unique="last")
+    >>> list(sid)
+    ['valB|key1|valE', 'valC|key3|valF']
+
+    Example to count elements per key (values of each key are folded with reduce):
+    >>> from operator import add
+    >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key3|valF"]
+    >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1], value=lambda line: 1, reduce=add)
+    >>> list(sid.items())
+    [('key1', 1), ('key3', 2)]
+
+    Example to collect values per key in lists (the fold of each key starts from initial and lists of different
+    pre-sorted files are combined with combine):
+    >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1], value=lambda line: line[:4],
+    ...                      reduce=lambda acc, value: acc + [value], initial=[], combine=add)
+    >>> list(sid.items())
+    [('key1', ['valB']), ('key3', ['valA', 'valC'])]
+
     Example to remove tmp files if not full iterate (or if only_one_read=False):
     >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF"]
     >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1], only_one_read=False)
@@ -143,18 +239,68 @@ def sorted_in_disk(iterable,
     :param only_one_read: True to clean folder tmp_dir when you consume all data.
         If it is True only works if you read all returned data, if you not read all, then you need to clear instance
         to auto. By default: True
-    :param count_insert_to_check: counter to check if process have more size in memory than max_write_process_size.
-        By default: 1000000
-    :param max_write_process_size: max size in bytes to dump cache memory values to disk
-        (only execute when count_insert_to_check is reached). If None, then not import psutil and then only
-        check with count_insert_to_check. By default: 1024*1024*1024  # 1Gib
+    :param count_insert_to_check: max number of values in cache of each process, then cache is saved to disk
+        (one pre-sorted file). Cache is saved when the first of count_insert_to_check or max_write_process_size
+        is reached (with values by default, usually this count), then use None to check only
+        max_write_process_size. By default: 1000000
+    :param max_write_process_size: max size in bytes of cache of each process (keys and positions of values, or
+        values if payload_runs is True or unique is "last"), then cache is saved to disk. Size is estimated in each
+        insert with sizes sampled with sys.getsizeof (not with the memory of process), and values folded with
+        reduce or replaced with unique="last" are estimated again. If None, then only count_insert_to_check is
+        checked. By default: 1024*1024*1024  # 1Gib
     :param ensure_space: True to ensure disk space but is slowly. If not space then process launch warning message
         and wait for space. If False, then get and IOException if not enough space. By defatul: False
+    :param payload_runs: True to save values with their keys in pre-sorted files (runs) instead of one file with all
+        values. Values are saved in RAM memory until each run is saved (not positions), but read is sequential
+        (without random reads in the file with all values). By default: False
+    :param key_codec: KeyCodec to save keys encoded in bytes sorted as keys (quicker to compare, smaller and
+        independent of pickle). Keys must be str, bytes, bool, int, float or tuples of these. Keys are decoded when
+        they are read. If None, then keys are saved without encode. By default: None
+    :param compression: 'zlib', 'lzma', 'bz2' or object with compress(bytes) and decompress(bytes) methods (picklable
+        if write_processes!=0) to compress values and pre-sorted files in blocks (less bytes in disk, more CPU). If
+        None, then files are not compressed. By default: None
+    :param limit: number of first sorted elements to keep (the smallest, or the greatest if reverse). Each write
+        process keeps only this number of elements in a bounded heap (O(limit) memory) and never writes more to disk,
+        then read returns only the first limit elements. If None, then all elements are kept. By default: None
+    :param unique: True or 'first' to keep only the first injected value of each key, 'last' to keep the last one or
+        'any' to keep any (the cheapest). Duplicates are dropped in RAM memory before write their values in disk and
+        in the merge of pre-sorted files. With write_processes!=0, first and last are per write process (order
+        between processes is not kept). If False, then all values are kept. By default: False
+    :param reduce: function of two arguments (accumulated value and value) to fold all values of each key in one
+        value, for example reduce=operator.add. Values are folded in RAM memory before write them in disk (one folded
+        value per key and pre-sorted file) and folded values of different pre-sorted files are combined in the merge
+        with combine, then read returns one element per key. If None, then all values are kept. By default: None
+    :param initial: (only if reduce is defined) value to start the fold of each key, for example initial=0 and
+        reduce=lambda count, value: count + 1 to count values. It is copied for each key in each pre-sorted file, then
+        it must be neutral for combine (as 0 to add or [] to concatenate lists). If None, then the fold starts from
+        the first value of each key. By default: None
+    :param combine: (only if reduce is defined) function of two arguments (two folded values of the same key) to
+        combine folded values of different pre-sorted files, for example combine=operator.add (it must be associative
+        because the number of pre-sorted files depends on the cache). It is required if initial is defined. If None,
+        then reduce is used (then reduce must be associative and return the same type of values). By default: None
     :param write_processes: number of process to execute. If None then it is number of CPUs. If you pass one list
                      with paths pointing to folders, then each path implements one process (each process save data in
                      its own path; you can use one path to several processes if you define same path several times in
                      the list) and these paths are managed by `sorted_in_disk` (`tmp_dir` continues to be used for
                      save general state information). By default: 0
+    :param partition_keys: (only if write_processes!=0) list of keys to split keys in ranges (each key is the first
+        key of one range, except the first range), then each write process receives only one range and ranges are
+        read apart and concatenated (less pre-sorted files to merge at same time). With key_codec, ranges are split in
+        order of encoded keys (the order of sort). It must have less keys than write processes. If None, then all
+        write processes receive any key. By default: None
+    :param partition_sample_size: (only if write_processes!=0 and partition_keys is None) number of first elements of
+        iterable to sample keys to calculate partition_keys. If None, then not sample. By default: None
+    :param extract_in_write_processes: (only if write_processes!=0) True to send elements of iterable to write
+        processes and apply key and value functions there (useful if they are expensive, for example to parse JSON,
+        because this process only reads iterable). With partition_keys, keys are extracted in this process to choose
+        the write process. Functions must be picklable if processes are not started with fork (for example in Windows
+        or macOS), else a ValueError is raised. By default: False
+    :param transport: (only if write_processes!=0) "queue" to send elements to write processes with QQueue, or
+        "shared_memory" (Python >= 3.8) to send batches of pickled elements (size_bucket_list elements, 1000 if it is
+        None) in a ring buffer in shared memory per write process (one pickle per batch and without pipe).
+        By default: "queue"
+    :param ring_size: (only if transport is "shared_memory") size in bytes of ring buffer of each write process (a
+        bigger pickled batch is written in parts). By default: 16 MB
     :param queue_max_size: (only if write_processes!=0) max number of elements in queue. If None then is the max by default.
         By default: 1000
     :param read_process: True to get and prepare data in other process, False to use this one.
@@ -165,7 +311,27 @@ def sorted_in_disk(iterable,
                          Min == 1 and max == iter_max_size_bucket_list - 1. By default: 10
     :param iter_max_size_bucket_list: (only if sensor is enabled) max size bucket list. If None is infinite.
                                  By default: None
-    :param logging_level: Level of log. Only to debug or to remove psutil warning. By default: logging.WARNING
+    :param iter_transport: (only if read_process is True or with parallel_read_processes) "queue" to send sorted data
+        from read processes in a queue or "shared_memory" to send it in a ring buffer in shared memory (Python >= 3.8).
+        By default: "queue"
+    :param iter_batch_bytes: (only if read_process is True or with parallel_read_processes) size in bytes of each
+        batch of sorted data sent by a read process (tuples of each batch are pickled at once). If None, then tuples
+        are sent one by one in the queue. By default: 64 KB
+    :param max_merge_fanin: max number of pre-sorted files (runs) to read at same time. If the number of runs is
+        greater (after each save to disk in injection and before read), then groups of runs are merged in bigger
+        runs. Runs of each write process are merged apart, then with write_processes!=0 (without partition_keys) it
+        must be greater or equal than write_processes. If None, then never merge. By default: None
+    :param mmap_values: True to read values from files mapped in memory (without a seek and read per value).
+        By default: False
+    :param prefetch_window: number of keys to read ahead its values in order of positions in disk (forward reads
+        instead of random reads). If None, then each value is read when its key is returned. By default: None
+    :param read_ahead_threads: number of threads to read ahead the next blocks of each pre-sorted file and the
+        values of the next keys while the current ones are merged (the merge hardly ever waits for the disk). If
+        None, then files are read when data is needed. By default: None
+    :param parallel_read_processes: number of processes to merge sorted data in parallel when read. Keys are split in
+        ranges (sampled from pre-sorted files) and each process merges one range; ranges are returned in order.
+        If None or 1, then it is not used. By default: None
+    :param logging_level: Level of log. Only to debug. By default: logging.WARNING
     :param size_bucket_list: None to enable sensor size bucket list (require maxsize>0). If a number is defined
                              here then use this number to size_bucket_list and disable sensor. If maxsize<=0
                              and size_bucket_list==None then size_bucket_list is default to 1000; other wise,
@@ -187,6 +353,13 @@ def sorted_in_disk(iterable,
                         iter_m_queue_max_size=iter_m_queue_max_size,
                         iter_min_size_bucket_list=iter_min_size_bucket_list,
                         iter_max_size_bucket_list=iter_max_size_bucket_list,
+                        iter_transport=iter_transport,
+                        iter_batch_bytes=iter_batch_bytes,
+                        max_merge_fanin=max_merge_fanin,
+                        mmap_values=mmap_values,
+                        prefetch_window=prefetch_window,
+                        read_ahead_threads=read_ahead_threads,
+                        parallel_read_processes=parallel_read_processes,
                         logging_level=logging_level,
                         ).save_and_sort(iterable,
                                         func_key=key,
@@ -197,11 +370,161 @@ def sorted_in_disk(iterable,
                                         max_write_process_size=max_write_process_size,
                                         queue_max_size=queue_max_size,
                                         ensure_space=ensure_space,
+                                        payload_runs=payload_runs,
+                                        key_codec=key_codec,
+                                        compression=compression,
+                                        limit=limit,
+                                        unique=unique,
+                                        reduce=reduce,
+                                        initial=initial,
+                                        combine=combine,
+                                        partition_keys=partition_keys,
+                                        partition_sample_size=partition_sample_size,
+                                        extract_in_write_processes=extract_in_write_processes,
+                                        transport=transport,
+                                        ring_size=ring_size,
                                         size_bucket_list=size_bucket_list,
                                         min_size_bucket_list=min_size_bucket_list,
                                         max_size_bucket_list=max_size_bucket_list)
 
 
+def sorted_in_disk_file(path_to_file_read,
+                        key=None,
+                        value=None,
+                        reverse=False,
+
+                        tmp_dir=Path("sortInDiskTmps"),
+                        ensure_different_dirs=False,
+
+                        append=False,
+                        only_one_read=True,
+
+                        count_insert_to_check=1000000,
+                        max_write_process_size=1024 * 1024 * 1024,
+                        ensure_space=False,
+                        payload_runs=False,
+                        key_codec=None,
+                        compression=None,
+                        limit=None,
+                        unique=False,
+                        reduce=None,
+                        initial=None,
+                        combine=None,
+
+                        write_processes=None,
+                        encoding="utf-8",
+
+                        read_process=False,
+                        iter_m_queue_max_size=1000,
+                        iter_min_size_bucket_list=10,
+                        iter_max_size_bucket_list=None,
+                        iter_transport="queue",
+                        iter_batch_bytes=64 * 1024,
+
+                        max_merge_fanin=None,
+                        mmap_values=False,
+                        prefetch_window=None,
+                        read_ahead_threads=None,
+                        parallel_read_processes=None,
+
+                        logging_level=logging.WARNING):
+    """
+    Return a new sorted object SortedInDisk from the lines of a text file. The file is split in ranges of bytes
+    aligned to lines, one per write process, and each write process reads its own range directly (without queue and
+    without read lines in main process), then injection scales with cores and disk bandwidth.
+
+    >>> from sorted_in_disk.utils import write_iter_in_file
+    >>> write_iter_in_file("file_to_sort.txt", ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF"])
+    3
+    >>> sid = sorted_in_disk_file("file_to_sort.txt", key=lambda line: line.split("|")[1], write_processes=2)
+    >>> list(sid)
+    ['valB|key1|valE', 'valC|key2|valF', 'valA|key3|valD']
+    >>> Path("file_to_sort.txt").unlink()
+
+    Note: key and value functions are sent to write processes, then they must be picklable if processes are not
+    started with fork (for example in Windows or macOS).
+
+    :param path_to_file_read: path of text file to sort (each line is an element, stripped as in read_iter_from_file)
+    :param key: function to extract a comparison key from each line. If None is full line. By default: None
+    :param value: function to extract a value from each line. If None is full line. By default: None
+    :param reverse: True to reverse sort. By default: False
+    :param tmp_dir: path to temporal folder. By default: Path("sortInDiskTmps")
+    :param ensure_different_dirs: True to create one different tmp directory each time. By default: False
+    :param append: True to append data to previous data of tmp_dir. By default: False
+    :param only_one_read: True to delete temporal files when sorted data is fully consumed. By default: True
+    :param count_insert_to_check: max number of values in cache of each process (see sorted_in_disk).
+        By default: 1000000
+    :param max_write_process_size: max estimated size in bytes of cache of each process (see sorted_in_disk).
+        By default: 1 GiB
+    :param ensure_space: True to ensure disk space but is slowly. By default: False
+    :param payload_runs: True to save values in pre-sorted files (see sorted_in_disk). By default: False
+    :param key_codec: KeyCodec to save keys encoded (see sorted_in_disk). By default: None
+    :param compression: compression of temporal files (see sorted_in_disk). By default: None
+    :param limit: number of first sorted elements to keep (see sorted_in_disk). By default: None
+    :param unique: policy to keep one value per key (see sorted_in_disk; first and last are per range of file).
+        By default: False
+    :param reduce: function to fold values of each key (see sorted_in_disk). By default: None
+    :param initial: value to start the fold of each key (see sorted_in_disk). By default: None
+    :param combine: function to combine folded values of different pre-sorted files (see sorted_in_disk).
+        By default: None
+    :param write_processes: number of process (one range of file per process). If None then it is number of CPUs.
+        If you pass one list with paths pointing to folders, then each path implements one process. If 0, then the
+        file is read in main process. By default: None
+    :param encoding: encoding of file. By default: utf-8
+    :param read_process: True to get and prepare data in other process, False to use this one. By default: False
+    :param iter_m_queue_max_size: (only if read_process is True) max number of elements in queue. By default: 1000
+    :param iter_min_size_bucket_list: (only if sensor is enabled) min size bucket list. By default: 10
+    :param iter_max_size_bucket_list: (only if sensor is enabled) max size bucket list. By default: None
+    :param iter_transport: "queue" or "shared_memory" to send sorted data from read processes (see sorted_in_disk).
+        By default: "queue"
+    :param iter_batch_bytes: size in bytes of each batch sent by a read process (see sorted_in_disk).
+        By default: 64 KB
+    :param max_merge_fanin: max number of pre-sorted files to read at same time (see sorted_in_disk).
+        By default: None
+    :param mmap_values: True to read values from files mapped in memory. By default: False
+    :param prefetch_window: number of keys to read ahead its values (see sorted_in_disk). By default: None
+    :param read_ahead_threads: number of threads to read ahead pre-sorted files and values (see sorted_in_disk).
+        By default: None
+    :param parallel_read_processes: number of processes to merge sorted data in parallel when read (see
+        sorted_in_disk). By default: None
+    :param logging_level: Level of log. Only to debug. By default: logging.WARNING
+    :return: SortedInDisk object (you can iterate directly in for structure in same way as list)
+    """
+    return SortedInDisk(tmp_dir,
+                        delete_to_end=only_one_read,
+                        delete_previous=not append,
+                        ensure_different_dirs=ensure_different_dirs,
+                        read_process=read_process,
+                        iter_m_queue_max_size=iter_m_queue_max_size,
+                        iter_min_size_bucket_list=iter_min_size_bucket_list,
+                        iter_max_size_bucket_list=iter_max_size_bucket_list,
+                        iter_transport=iter_transport,
+                        iter_batch_bytes=iter_batch_bytes,
+                        max_merge_fanin=max_merge_fanin,
+                        mmap_values=mmap_values,
+                        prefetch_window=prefetch_window,
+                        read_ahead_threads=read_ahead_threads,
+                        parallel_read_processes=parallel_read_processes,
+                        logging_level=logging_level,
+                        ).save_and_sort_file(path_to_file_read,
+                                             func_key=key,
+                                             func_value=value,
+                                             reverse=reverse,
+                                             write_processes=write_processes,
+                                             count_insert_to_check=count_insert_to_check,
+                                             max_write_process_size=max_write_process_size,
+                                             ensure_space=ensure_space,
+                                             payload_runs=payload_runs,
+                                             key_codec=key_codec,
+                                             compression=compression,
+                                             limit=limit,
+                                             unique=unique,
+                                             reduce=reduce,
+                                             initial=initial,
+                                             combine=combine,
+                                             encoding=encoding)
+
+
 def _is_parent_process_killed():
     """
     Return if parent process was killed
@@ -210,38 +533,533 @@ def _is_parent_process_killed():
     return os.getppid() == 1
 
 
-def _get_func_process_memory(enable_consumption_check=True):
+def _is_parent_process_alive():
     """
-    Get a function to calculate current mount size of memory has consume the current process in the moment
-    to call the function
-    :param enable_consumption_check: True to get a function to check memory consumption, False to return -1 in the
-                                     function. If True but not installed psutil, then it will be returned -1 in the
-                                     same way.
-    :return: function to calculate memory consumption.
-             If function return -1 then get current mount of memory is not available
+    Return if parent process is alive
+    :return: True if parent process was not killed
     """
-    if enable_consumption_check:
-        try:
-            import psutil
+    return not _is_parent_process_killed()
+
+
+def _get_size_of(obj):
+    """
+    Get size in bytes of an object in RAM memory with sys.getsizeof (elements of tuples, lists and dicts are added).
+
+    >>> import sys
+    >>> from sorted_in_disk.sorted_in_disk import _get_size_of
+    >>> _get_size_of(("key", 1)) == sys.getsizeof(("key", 1)) + sys.getsizeof("key") + sys.getsizeof(1)
+    True
+
+    :param obj: object to measure
+    :return: size in bytes
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list)):
+        size += sum(_get_size_of(element) for element in obj)
+    elif isinstance(obj, dict):
+        size += sum(_get_size_of(key) + _get_size_of(value) for key, value in obj.items())
+    return size
+
+
+def _get_path_to_keys_sorted(dir_tmp_path, ipid, key_file):
+    """
+    Get path to one file of keys sorted (run)
+
+    :param dir_tmp_path: path to directory of the write process
+    :param ipid: id of write process (-1 if it is the main process)
+    :param key_file: number of file of keys sorted
+    :return: path to file of keys sorted
+    """
+    if ipid == -1:
+        return Path(dir_tmp_path, "keys_sorted_{}.db".format(key_file))
+    return Path(dir_tmp_path, "keys_sorted_{}_{}.db".format(ipid, key_file))
+
+
+def _open_full_data(path_full_data, mode, compression=None, mmap_values=False):
+    """
+    Open a full data file (file with values)
+
+    :param path_full_data: path to full data file
+    :param mode: ab to write or rb to read
+    :param compression: compression of values (see get_compression_codec). If None, then values are not compressed.
+        By default: None
+    :param mmap_values: (only to read not compressed values) True to map the file in memory. By default: False
+    :return: CompressedBlockFile, MMapBinaryFile or CountingBinaryFile
+    """
+    if compression is not None:
+        return CompressedBlockFile(path_full_data, compression, mode)
+    if mmap_values and mode == 'rb':
+        return MMapBinaryFile(path_full_data)
+    return CountingBinaryFile(path_full_data, mode)
+
+
+def _dump_run(path_to_keys_sorted, iter_items, compression=None):
+    """
+    Save a run (file of tuples key and data sorted by key in blocks with a sparse index, see BlockRunFile)
+
+    :param path_to_keys_sorted: path to file of keys sorted
+    :param iter_items: iterable of tuples key and data sorted by key
+    :param compression: compression of blocks (see get_compression_codec). If None, then they are not compressed.
+        By default: None
+    :return: bytes written to disk
+    """
+    with BlockRunFile(path_to_keys_sorted, compression, 'wb', block_size=_RUN_BLOCK_SIZE) as f_run:
+        f_run.dump_items(iter_items)
+
+    return f_run.bytes_written
+
+
+def _iter_load_run(path_to_keys_sorted, compression=None, list_bytes_read=None, start=None, reverse=False):
+    """
+    Load a run (file of tuples key and data sorted by key). When the generator ends (or is closed), bytes read from
+    disk are appended to list_bytes_read.
+
+    :param path_to_keys_sorted: path to file of keys sorted
+    :param compression: compression of blocks (see get_compression_codec). If None, then they are not compressed.
+        By default: None
+    :param list_bytes_read: list where append bytes read from disk. If None, then they are not counted.
+        By default: None
+    :param start: first key to load (included). Blocks before the block with this key are not read (they are
+        skipped with the index of run). If None, then from first key. By default: None
+    :param reverse: True if run is sorted in reverse. By default: False
+    :return: Generator of tuples key and data
+    """
+    f_run = BlockRunFile(path_to_keys_sorted, compression, 'rb')
+    if start is None:
+        iter_items = f_run.load_items()
+    else:
+        iter_items = f_run.load_items_from_key(start, reverse)
+
+    try:
+        for tup in iter_items:
+            yield tup
+    finally:
+        f_run.close()
+        if list_bytes_read is not None:
+            list_bytes_read.append(f_run.bytes_read)
+
+
+class _SortedRunsWriter(object):
+    """
+    Write values in the full data file and cache in RAM memory the positions of values by key. When the cache is
+    full, keys are sorted and saved to disk (one run) and the cache is cleared.
+
+    It is used in the same way by the main process (ipid = -1) and by each write process.
+
+    If payload_runs is True, then values are cached in RAM memory instead of positions and saved in the runs with
+    their keys (full data file is not used). Then runs are read sequentially and there are not random reads in
+    the full data file.
+
+    If key_codec is defined, then keys are encoded before cache them (runs have encoded keys).
+
+    If limit is defined, then only the first limit elements are kept in a heap (bounded in size, the greatest element
+    is replaced) and they are saved in the end (one run).
+
+    If unique is defined, then only one value of each key is kept in cache (duplicates are dropped before write their
+    values in disk, or with "last" the value is kept in cache and replaced, then it is written when the cache is
+    saved) and runs are merged with one value per key.
+
+    If reduce is defined, then values of each key are folded in cache (one value per key in RAM memory, the fold
+    starts from a copy of initial if it is defined) and the folded value is written when the cache is saved (one
+    value per key and run).
+    """
+
+    def __init__(self,
+                 dir_tmp_path,
+                 ipid,
+                 next_id_path_to_keys_sorted,
+                 reverse=False,
+                 count_insert_to_check=1000000,
+                 max_write_process_size=1024 * 1024 * 1024,
+                 ensure_space=False,
+                 max_merge_fanin=None,
+                 payload_runs=False,
+                 key_codec=None,
+                 compression=None,
+                 limit=None,
+                 unique=None,
+                 reduce=None,
+                 initial=None):
+        """
+        :param dir_tmp_path: path to directory where save files
+        :param ipid: id of write process (-1 if it is the main process)
+        :param next_id_path_to_keys_sorted: last id used in a file of keys sorted
+        :param reverse: True to reverse sort. By default: False
+        :param count_insert_to_check: max number of values in cache to save it to disk (None to not check).
+        :param max_write_process_size: max estimated size in bytes of cache to save it to disk (None to not check).
+        :param ensure_space: True to ensure disk space but is slowly. If not space then process launch warning message
+            and wait for space. If False, then get and IOException if not enough space
+        :param max_merge_fanin: max number of files of keys sorted. If it is reached, then groups of files are
+            merged in bigger files. If None, then never merge. By default: None
+        :param payload_runs: True to save values in runs instead of positions of values in full data file.
+            By default: False
+        :param key_codec: KeyCodec to encode keys. If None, then keys are not encoded. By default: None
+        :param compression: compression of full data file and runs (see get_compression_codec). If None, then
+            files are not compressed. By default: None
+        :param limit: number of first sorted elements to keep. If None, then all elements are kept. By default: None
+        :param unique: "first", "last" or "any" to keep one value per key (see _get_unique_policy). If None, then all
+            values are kept. By default: None
+        :param reduce: function with args accumulated value and value to fold values of each key. If None, then values
+            are not folded. By default: None
+        :param initial: (only if reduce is defined) value to start the fold of each key in each run (it is copied
+            for each key). If None, then the fold starts from the first value of the key. By default: None
+        """
+        self.dir_tmp_path = dir_tmp_path
+        self.ipid = ipid
+        self.count_key_file = next_id_path_to_keys_sorted
+        self.reverse = reverse
+        self.count_insert_to_check = count_insert_to_check
+        self.max_write_process_size = max_write_process_size
+        self.ensure_space = ensure_space
+        self.max_merge_fanin = max_merge_fanin
+        self.payload_runs = payload_runs
+        self.key_codec = key_codec
+        self.compression = compression
+        self.limit = limit
+        self.unique = unique
+        self.reduce = reduce
+        self.initial = initial
+
+        if ipid == -1:
+            self.path_full_data = Path(dir_tmp_path, "full_data.db")
+        else:
+            self.path_full_data = Path(dir_tmp_path, "full_data_{}.db".format(ipid))
+
+        self.f_full_data = None
+        self.dict_keysortable_fpositions = {}
+        self.list_paths_to_keys_sorted = list()
+        self.cache_bulk_counter = 0
+        self.total_bulk_counter = 0
+        # Estimated bytes of cache and mean sizes of keys and data sampled
+        self.cache_bytes = 0
+        self.count_inserts_sampled = 0
+        self.key_bytes = 0
+        self.count_key_samples = 0
+        self.data_bytes = 0
+        self.count_data_samples = 0
+        # Folds sampled and mean growth in bytes of accumulated values by fold (if reduce is defined)
+        self.count_folds_sampled = 0
+        self.fold_bytes = 0
+        self.count_fold_samples = 0
+        self.list_bytes_written = list()
+        self.heap_limit = list()
+        self.count_heap_limit = 0
+
+    def log_ids(self):
+        """
+        :return: string with ids of process to log
+        """
+        if self.ipid == -1:
+            return "ppid:{} | pid:{}".format(os.getppid(), os.getpid())
+        return "id:{} | ppid:{} | pid:{}".format(self.ipid, os.getppid(), os.getpid())
+
+    def __enter__(self):
+        if not self.payload_runs:
+            self.f_full_data = _open_full_data(self.path_full_data, 'ab', self.compression)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            if self.limit is not None:
+                self.save_heap_limit()
+
+            self.total_bulk_counter += self.cache_bulk_counter
+            self.cache_bulk_counter = 0
+            # Full data file is open yet, reduced values (or last values) are written when cache is saved
+            self.save_cache()
+
+        if self.f_full_data is not None:
+            self.f_full_data.close()
+            self.list_bytes_written.append(self.f_full_data.bytes_written)
+            self.f_full_data = None
+
+    def evt_err_space_dump(self, _, time_to_retry, err):
+        logging.error("[NOT SPACE ON DEVICE (WAITING TO CONTINUE {} SECONDS) -> "
+                      "{}]: {}".format(time_to_retry, self.log_ids(), err))
+
+    def add(self, sort_key, value):
+        """
+        Write the value in full data file and save in cache its position by key (or save in cache the value if
+        payload_runs is True). If limit is defined, then it is saved in the heap of first elements.
+
+        :param sort_key: key to sort
+        :param value: value to save
+        :return: None
+        """
+        if self.key_codec is not None:
+            sort_key = self.key_codec.encode(sort_key)
+
+        if self.limit is None:
+            self.add_to_cache(sort_key, value)
+        else:
+            self.add_to_heap_limit(sort_key, value)
+
+    def add_to_heap_limit(self, sort_key, value):
+        """
+        Save the value in the heap of first elements if it is one of the first limit elements. The top of heap is the
+        last element (greatest key and, between equal keys, the last added to maintain the stable sort), then it is
+        replaced if a lower element is added.
+
+        :param sort_key: key to sort (encoded if key_codec is defined)
+        :param value: value to save
+        :return: None
+        """
+        self.count_heap_limit += 1
+        item = [sort_key if self.reverse else _ReverseKey(sort_key), -self.count_heap_limit, value]
+        if len(self.heap_limit) < self.limit:
+            heapq.heappush(self.heap_limit, item)
+        elif self.heap_limit[0] < item:
+            heapq.heapreplace(self.heap_limit, item)
+
+    def save_heap_limit(self):
+        """
+        Write the elements of the heap of first elements in the full data file and cache (in order of sort, then
+        equal keys keep the order of injection) and clear the heap.
+
+        :return: None
+        """
+        heap_limit = self.heap_limit
+        self.heap_limit = list()
+        heap_limit.sort(reverse=True)
+        for sort_key, _, value in heap_limit:
+            self.add_to_cache(sort_key if self.reverse else sort_key.key, value)
+
+    def add_to_cache(self, sort_key, value):
+        """
+        Write the value in full data file and save in cache its position by key (or save in cache the value if
+        payload_runs is True)
+
+        :param sort_key: key to sort (encoded if key_codec is defined)
+        :param value: value to save
+        :return: None
+        """
+        if self.reduce is not None:
+            list_reduced = self.dict_keysortable_fpositions.get(sort_key)
+            if list_reduced is not None:
+                # The value is folded in RAM memory (it is written when cache is saved)
+                list_reduced[0] = self.reduce(list_reduced[0], value)
+                if self.max_write_process_size is not None:
+                    self.add_fold_bytes(list_reduced)
+                    self.check_cache()
+                return
+            data = value if self.initial is None else self.reduce(copy.deepcopy(self.initial), value)
+            is_new_key = True
+            self.dict_keysortable_fpositions[sort_key] = [data]
+        else:
+            is_duplicate = self.unique is not None and sort_key in self.dict_keysortable_fpositions
+            if is_duplicate and self.unique != "last":
+                # The duplicate is dropped before write its value in disk
+                return
+
+            if self.unique == "last":
+                # The value is kept in RAM memory until the cache is saved (a replaced value is never written)
+                data = value
+            else:
+                data = self.write_value(value)
+
+            if is_duplicate:
+                # Only the last value is kept
+                list_last = self.dict_keysortable_fpositions[sort_key]
+                list_last[0] = data
+                if self.max_write_process_size is not None:
+                    self.replace_cache_bytes(list_last, data)
+                    self.check_cache()
+                return
+
+            try:
+                self.dict_keysortable_fpositions[sort_key].append(data)
+                is_new_key = False
+            except KeyError:
+                self.dict_keysortable_fpositions[sort_key] = [data]
+                is_new_key = True
+
+        self.cache_bulk_counter += 1
+        if self.max_write_process_size is not None:
+            self.add_cache_bytes(sort_key, data, is_new_key)
+            if self.reduce is not None:
+                # Estimated bytes of the accumulated value, bytes measured and number of folds since it was measured
+                self.dict_keysortable_fpositions[sort_key] += [self.data_bytes, self.data_bytes, 0]
+            elif self.unique == "last":
+                # Estimated bytes of the value kept
+                self.dict_keysortable_fpositions[sort_key].append(self.data_bytes)
+
+        self.check_cache()
+
+    def check_cache(self):
+        """
+        Save cache to disk if it has count_insert_to_check values or more estimated bytes than max_write_process_size
+        (what first)
+
+        :return: None
+        """
+        if (self.count_insert_to_check is not None and self.count_insert_to_check < self.cache_bulk_counter) or \
+                (self.max_write_process_size is not None and self.max_write_process_size <= self.cache_bytes):
+            self.total_bulk_counter += self.cache_bulk_counter
+            self.cache_bulk_counter = 0
+            logging.debug("[MEMORY CHECK -> {}]: mem<{}>, els<{}>".format(self.log_ids(),
+                                                                          self.cache_bytes,
+                                                                          self.total_bulk_counter))
+            # Cache is saved to disk and set cache to empty
+            self.save_cache()
+
+    def add_cache_bytes(self, sort_key, data, is_new_key):
+        """
+        Add the estimated bytes of one data (and of its key if it is new in cache) to the bytes of cache. Sizes are
+        measured with sys.getsizeof one time each _MEMORY_SAMPLE_EVERY inserts (and always until there is a sample
+        of a key and of a data), and the mean sizes sampled are added in the rest of inserts.
+
+        :param sort_key: key to sort (encoded if key_codec is defined)
+        :param data: data saved in cache (position of value in full data file, or value)
+        :param is_new_key: True if the key was added to cache with this data
+        :return: None
+        """
+        is_sample = self.sample_data_bytes(data)
+        self.cache_bytes += self.data_bytes + _CACHE_DATA_OVERHEAD_BYTES
+
+        if is_new_key:
+            if is_sample or not self.count_key_samples:
+                self.count_key_samples += 1
+                self.key_bytes += (_get_size_of(sort_key) - self.key_bytes) / self.count_key_samples
+            self.cache_bytes += self.key_bytes + _CACHE_KEY_OVERHEAD_BYTES
+
+    def replace_cache_bytes(self, list_last, data):
+        """
+        Replace the estimated bytes of the value kept of one key (if unique is "last") by the estimated bytes of the
+        new value in the bytes of cache. The new value is sampled like in add_cache_bytes.
 
-            def get_process_memory():
-                """
-                :return: bites of this process size in memory
-                """
-                process = psutil.Process(os.getpid())
-                return process.memory_info().rss
+        :param list_last: list in cache with the value kept and its estimated bytes
+        :param data: new value to keep
+        :return: None
+        """
+        self.sample_data_bytes(data)
+        self.cache_bytes += self.data_bytes - list_last[1]
+        list_last[1] = self.data_bytes
+
+    def sample_data_bytes(self, data):
+        """
+        Measure the bytes of one data with sys.getsizeof one time each _MEMORY_SAMPLE_EVERY inserts (and always until
+        there is a sample) to update the mean size of data sampled.
+
+        :param data: data saved in cache (position of value in full data file, or value)
+        :return: True if the data was measured
+        """
+        is_sample = self.count_inserts_sampled % _MEMORY_SAMPLE_EVERY == 0 or not self.count_data_samples
+        self.count_inserts_sampled += 1
+
+        if is_sample:
+            self.count_data_samples += 1
+            self.data_bytes += (_get_size_of(data) - self.data_bytes) / self.count_data_samples
+        return is_sample
+
+    def add_fold_bytes(self, list_reduced):
+        """
+        Add the estimated growth of one accumulated value after a fold to the bytes of cache. The accumulated value is
+        measured with sys.getsizeof one time each _MEMORY_SAMPLE_EVERY folds (and always in the first fold), and the
+        mean growth by fold sampled is added in the rest of folds.
+
+        :param list_reduced: list in cache with the accumulated value, its estimated bytes, the bytes measured and the
+            number of folds since it was measured
+        :return: None
+        """
+        is_sample = self.count_folds_sampled % _MEMORY_SAMPLE_EVERY == 0
+        self.count_folds_sampled += 1
+        list_reduced[3] += 1
+
+        if is_sample:
+            data_bytes = _get_size_of(list_reduced[0])
+            self.count_fold_samples += 1
+            fold_bytes = (data_bytes - list_reduced[2]) / list_reduced[3]
+            self.fold_bytes += (fold_bytes - self.fold_bytes) / self.count_fold_samples
+            self.cache_bytes += data_bytes - list_reduced[1]
+            list_reduced[1:] = data_bytes, data_bytes, 0
+        else:
+            list_reduced[1] += self.fold_bytes
+            self.cache_bytes += self.fold_bytes
+
+    def write_value(self, value):
+        """
+        Write the value in full data file (if payload_runs is False)
+
+        :param value: value to save
+        :return: data to save in cache (position of value in full data file, or value if payload_runs is True)
+        """
+        if self.payload_runs:
+            return value
+
+        data = self.f_full_data.get_cursor_position()
+
+        if self.ensure_space:
+            self.f_full_data.dump(value)
+        else:
+            self.f_full_data.dump_ensure_space(value, fun_err_space=self.evt_err_space_dump)
+
+        return data
+
+    def save_cache(self):
+        """
+        Sort keys in cache and save to disk in a new file of keys sorted. Then cache is cleared.
+
+        :return: None
+        """
+        self.count_key_file += 1
+        logging.debug("[SAVING MEMORY -> {}]: key<{}>".format(self.log_ids(), self.count_key_file))
+
+        if self.dict_keysortable_fpositions:
+            if self.reduce is None and self.unique != "last":
+                def gen_key_value_sorted(mdict_to_save, mreverse):
+                    # When it is sorted, it assign each key to his value
+                    for key in sorted(mdict_to_save.keys(), reverse=mreverse):
+                        yield key, mdict_to_save[key]
+            else:
+                def gen_key_value_sorted(mdict_to_save, mreverse):
+                    # Folded values (or last values) are written in full data file in order of keys
+                    for key in sorted(mdict_to_save.keys(), reverse=mreverse):
+                        yield key, [self.write_value(mdict_to_save[key][0])]
+
+            path_to_keys_sorted = _get_path_to_keys_sorted(self.dir_tmp_path, self.ipid, self.count_key_file)
+            self.list_bytes_written.append(_dump_run(path_to_keys_sorted,
+                                                     gen_key_value_sorted(self.dict_keysortable_fpositions,
+                                                                          self.reverse),
+                                                     self.compression))
+            self.list_paths_to_keys_sorted.append(path_to_keys_sorted)
+
+            self.dict_keysortable_fpositions = {}
+            self.cache_bytes = 0
+            gc.collect()
 
-            return get_process_memory
-        except ModuleNotFoundError:
-            logging.warning("psutil module not found, auto-disabled memory check "
-                            "(only check by counter count_insert_to_check). "
-                            "To use auto memory check, install psutil "
-                            "(PIP installation: pip install psutil)")
+            if self.max_merge_fanin is not None and len(self.list_paths_to_keys_sorted) > self.max_merge_fanin:
+                logging.debug("[MERGING RUNS -> {}]: runs<{}>".format(self.log_ids(),
+                                                                     len(self.list_paths_to_keys_sorted)))
+                self.list_paths_to_keys_sorted = _cascade_merge_runs(self.list_paths_to_keys_sorted,
+                                                                     self.max_merge_fanin,
+                                                                     self.get_new_path_to_keys_sorted,
+                                                                     self.reverse,
+                                                                     self.compression,
+                                                                     self.list_bytes_written,
+                                                                     self.unique)
+
+    def get_new_path_to_keys_sorted(self):
+        """
+        :return: path to a new file of keys sorted
+        """
+        self.count_key_file += 1
+        return _get_path_to_keys_sorted(self.dir_tmp_path, self.ipid, self.count_key_file)
 
-    def get_process_memory():
-        return -1
+    def get_bytes_written(self):
+        """
+        :return: bytes written to disk by this writer (full data file and runs)
+        """
+        return sum(self.list_bytes_written)
 
-    return get_process_memory
+    def get_tup_full_list_parts(self):
+        """
+        :return: tuple with information about temporal files of this writer: path to full data file, list of paths
+                 to keys sorted, last id used in a file of keys sorted and number of values
+        """
+        return (self.path_full_data,
+                self.list_paths_to_keys_sorted,
+                self.count_key_file,
+                self.total_bulk_counter)
 
 
 def _write_process(proxy_queue,
@@ -251,6 +1069,7 @@ def _write_process(proxy_queue,
 
                    dir_tmp_path,
                    proxy_dict,
+                   proxy_dict_bytes_written,
 
                    count_insert_to_check,
                    max_write_process_size,
@@ -259,6 +1078,16 @@ def _write_process(proxy_queue,
                    next_id_path_to_keys_sorted,
 
                    ensure_space,
+                   max_merge_fanin,
+                   payload_runs,
+                   key_codec,
+                   compression,
+                   limit,
+                   unique,
+                   reduce,
+                   initial,
+                   func_key,
+                   func_value,
                    logging_level):
     """
     Process to inject data.
@@ -269,101 +1098,62 @@ def _write_process(proxy_queue,
     :param ipid: pid of this process
     :param dir_tmp_path: path to tmp directories
     :param proxy_dict: dict of sorted indexation
-    :param count_insert_to_check: counter to check if process have more size in memory than max_write_process_size.
-    :param max_write_process_size: max size in bytes to dump cache memory values to disk.
+    :param proxy_dict_bytes_written: dict where save bytes written to disk by this process
+    :param count_insert_to_check: max number of values in cache to save it to disk (None to not check).
+    :param max_write_process_size: max estimated size in bytes of cache to save it to disk (None to not check).
     :param reverse: True to reverse sort. By default: False
     :param ensure_space: True to ensure disk space but is slowly. If not space then process launch warning message
         and wait for space. If False, then get and IOException if not enough space
+    :param max_merge_fanin: max number of files of keys sorted of this process (None to never merge)
+    :param payload_runs: True to save values in runs instead of positions of values in full data file
+    :param key_codec: KeyCodec to encode keys (None to not encode)
+    :param compression: compression of full data file and runs (None to not compress)
+    :param limit: number of first sorted elements to keep (None to keep all)
+    :param unique: "first", "last" or "any" to keep one value per key (None to keep all)
+    :param reduce: function to fold values of each key (None to not fold)
+    :param initial: value to start the fold of each key (None to start from the first value)
+    :param func_key: function to extract the key of each element received from queue. If None, then elements are
+        tuples of key and element
+    :param func_value: function to extract the value of each element (or of element of each tuple). If None, then the
+        element is the value
     :return: None
     """
     logging.basicConfig(stream=sys.stderr, level=logging_level)
 
-    get_process_memory = _get_func_process_memory(max_write_process_size is not None)
-
     logging.debug("[START -> id:{} | ppid:{} | pid:{}]".format(ipid, os.getppid(), os.getpid()))
 
-    def sort_cache_and_save(dir_tmp_path, ipid, key_file, dict_to_save, reverse):
-        path_to_keys_sorted = None
-        if dict_to_save:
-            def gen_key_value_sorted(mdict_to_save, mreverse):
-                # When it is sorted, it assign each key to his value
-                for key in sorted(mdict_to_save.keys(), reverse=mreverse):
-                    yield key, mdict_to_save[key]
-
-            path_to_keys_sorted = Path(dir_tmp_path, "keys_sorted_{}_{}.db".format(ipid, key_file))
-            quick_dump_items(path_to_keys_sorted, gen_key_value_sorted(dict_to_save, reverse))
-
-            del dict_to_save
-            gc.collect()
-        return path_to_keys_sorted
-
-    count_key_file = next_id_path_to_keys_sorted
-    cache_bulk_counter = 0
-    total_bulk_counter = 0
     times_waiting = 0
 
-    dict_keysortable_fpositions = {}
-    list_paths_to_keys_sorted = list()
-
-    def evt_err_space_dump(_, time_to_retry, err):
-        logging.error("[NOT SPACE ON DEVICE (WAITING TO CONTINUE {} SECONDS) -> "
-                      "id:{} | ppid:{} | pid:{}]: {}".format(time_to_retry,
-                                                             ipid,
-                                                             os.getppid(),
-                                                             os.getpid(), err))
-
-    path_full_data = Path(dir_tmp_path, "full_data_{}.db".format(ipid))
-    with EasyBinaryFile(path_full_data, mode='ab') as f_full_data:
+    writer = _SortedRunsWriter(dir_tmp_path,
+                               ipid,
+                               next_id_path_to_keys_sorted,
+                               reverse=reverse,
+                               count_insert_to_check=count_insert_to_check,
+                               max_write_process_size=max_write_process_size,
+                               ensure_space=ensure_space,
+                               max_merge_fanin=max_merge_fanin,
+                               payload_runs=payload_runs,
+                               key_codec=key_codec,
+                               compression=compression,
+                               limit=limit,
+                               unique=unique,
+                               reduce=reduce,
+                               initial=initial)
+
+    with writer:
         loop_enable = True
         gc.collect()
         while loop_enable:
             try:
-                sort_key, value = proxy_queue.get(timeout=0.1)
+                element = proxy_queue.get(timeout=0.1)
                 times_waiting = 0
-                start_cursor_pos = f_full_data.get_cursor_position()
-
-                if ensure_space:
-                    f_full_data.dump(value)
+                if func_key is not None:
+                    # Key and value are extracted in this process
+                    writer.add(func_key(element), element if func_value is None else func_value(element))
+                elif func_value is not None:
+                    writer.add(element[0], func_value(element[1]))
                 else:
-                    f_full_data.dump_ensure_space(value, fun_err_space=evt_err_space_dump)
-
-                try:
-                    fpositions = dict_keysortable_fpositions[sort_key]
-                    fpositions.append(start_cursor_pos)
-                    dict_keysortable_fpositions[sort_key] = fpositions
-                except KeyError:
-                    dict_keysortable_fpositions[sort_key] = [start_cursor_pos]
-
-                if count_insert_to_check is not None:
-                    cache_bulk_counter += 1
-
-                    if count_insert_to_check < cache_bulk_counter:
-                        process_memory = get_process_memory()
-                        total_bulk_counter += cache_bulk_counter
-                        cache_bulk_counter = 0
-                        logging.debug("[MEMORY CHECK -> id:{} | ppid:{} | pid:{}]: "
-                                      "mem<{}>, els<{}>, ~qsize<{}>".format(ipid,
-                                                                            os.getppid(),
-                                                                            os.getpid(),
-                                                                            process_memory,
-                                                                            total_bulk_counter,
-                                                                            proxy_queue.qsize()))
-                        if process_memory == -1 is None or max_write_process_size < process_memory:
-                            # If process have more size than limit, then cache is saved to disk and set cache to empty
-                            count_key_file += 1
-                            logging.debug("[SAVING MEMORY -> id:{} | ppid:{} | pid:{}]: key<{}>".format(ipid,
-                                                                                                        os.getppid(),
-                                                                                                        os.getpid(),
-                                                                                                        count_key_file))
-                            paths_to_keys_sorted = sort_cache_and_save(dir_tmp_path,
-                                                                       ipid,
-                                                                       count_key_file,
-                                                                       dict_keysortable_fpositions,
-                                                                       reverse)
-                            list_paths_to_keys_sorted.append(paths_to_keys_sorted)
-                            del dict_keysortable_fpositions
-                            gc.collect()
-                            dict_keysortable_fpositions = {}
+                    writer.add(element[0], element[1])
             except queue.Empty:
                 loop_enable = not (proxy_end_event.is_set() and proxy_queue.empty())
                 if loop_enable:
@@ -394,32 +1184,186 @@ def _write_process(proxy_queue,
                 logging.error("[ERROR -> id:{} | ppid:{} | pid:{}]: {}".format(ipid, os.getppid(), os.getpid(), err))
                 raise
 
-    total_bulk_counter += cache_bulk_counter
+        logging.debug("[LOOP STOP -> id:{} | ppid:{} | pid:{}]".format(ipid, os.getppid(), os.getpid()))
+        gc.collect()
+
+    _send_writer_parts(writer, ipid, proxy_dict, proxy_dict_bytes_written)
 
-    logging.debug("[LOOP STOP -> id:{} | ppid:{} | pid:{}]".format(ipid, os.getppid(), os.getpid()))
     gc.collect()
+    logging.debug("[END -> id:{} | ppid:{} | pid:{}]".format(ipid, os.getppid(), os.getpid()))
 
-    paths_to_keys_sorted = sort_cache_and_save(dir_tmp_path,
-                                               ipid,
-                                               count_key_file + 1,
-                                               dict_keysortable_fpositions,
-                                               reverse)
-    if paths_to_keys_sorted is not None:
-        list_paths_to_keys_sorted.append(paths_to_keys_sorted)
-
-    next_id_path_to_keys_sorted = count_key_file + 1
-    if len(list_paths_to_keys_sorted) > 0:
-        proxy_dict[ipid] = (path_full_data,
-                            list_paths_to_keys_sorted,
-                            next_id_path_to_keys_sorted,
-                            total_bulk_counter)
-    else:
-        path_full_data.unlink()
+
+def _send_writer_parts(writer, ipid, proxy_dict, proxy_dict_bytes_written):
+    """
+    Send information of files saved by a write process to main process (full data file is deleted if it has not
+    pre-sorted files).
+
+    :param writer: _SortedRunsWriter closed
+    :param ipid: pid of write process
+    :param proxy_dict: dict of sorted indexation
+    :param proxy_dict_bytes_written: dict where save bytes written to disk by write process
+    :return: None
+    """
+    proxy_dict_bytes_written[ipid] = writer.get_bytes_written()
+
+    tup_full_list_parts = writer.get_tup_full_list_parts()
+    if len(tup_full_list_parts[1]) > 0:
+        proxy_dict[ipid] = tup_full_list_parts
+    elif tup_full_list_parts[0].exists():
+        tup_full_list_parts[0].unlink()
+
+
+def _write_file_range_process(path_to_file_read,
+                              start_pos,
+                              end_pos,
+                              encoding,
+                              func_key,
+                              func_value,
+                              ipid,
+
+                              dir_tmp_path,
+                              proxy_dict,
+                              proxy_dict_bytes_written,
+
+                              count_insert_to_check,
+                              max_write_process_size,
+                              reverse,
+
+                              next_id_path_to_keys_sorted,
+
+                              ensure_space,
+                              max_merge_fanin,
+                              payload_runs,
+                              key_codec,
+                              compression,
+                              limit,
+                              unique,
+                              reduce,
+                              initial,
+                              logging_level):
+    """
+    Process to inject lines of a range of bytes of a text file (this process reads its range, without queue).
+
+    :param path_to_file_read: path of text file
+    :param start_pos: position in bytes of first line of range
+    :param end_pos: position in bytes of end of range (excluded)
+    :param encoding: encoding of file
+    :param func_key: function to extract the key of each line
+    :param func_value: function to extract the value of each line
+    :param ipid: pid of this process
+    :param dir_tmp_path: path to tmp directories
+    :param proxy_dict: dict of sorted indexation
+    :param proxy_dict_bytes_written: dict where save bytes written to disk by this process
+    :param count_insert_to_check: max number of values in cache to save it to disk (None to not check).
+    :param max_write_process_size: max estimated size in bytes of cache to save it to disk (None to not check).
+    :param reverse: True to reverse sort. By default: False
+    :param next_id_path_to_keys_sorted: next id of files of keys sorted of this process
+    :param ensure_space: True to ensure disk space but is slowly. If not space then process launch warning message
+        and wait for space. If False, then get and IOException if not enough space
+    :param max_merge_fanin: max number of files of keys sorted of this process (None to never merge)
+    :param payload_runs: True to save values in runs instead of positions of values in full data file
+    :param key_codec: KeyCodec to encode keys (None to not encode)
+    :param compression: compression of full data file and runs (None to not compress)
+    :param limit: number of first sorted elements to keep (None to keep all)
+    :param unique: "first", "last" or "any" to keep one value per key (None to keep all)
+    :param reduce: function to fold values of each key (None to not fold)
+    :param initial: value to start the fold of each key (None to start from the first value)
+    :return: None
+    """
+    logging.basicConfig(stream=sys.stderr, level=logging_level)
+
+    logging.debug("[START RANGE {}-{} -> id:{} | ppid:{} | pid:{}]".format(start_pos,
+                                                                          end_pos,
+                                                                          ipid,
+                                                                          os.getppid(),
+                                                                          os.getpid()))
+
+    writer = _SortedRunsWriter(dir_tmp_path,
+                               ipid,
+                               next_id_path_to_keys_sorted,
+                               reverse=reverse,
+                               count_insert_to_check=count_insert_to_check,
+                               max_write_process_size=max_write_process_size,
+                               ensure_space=ensure_space,
+                               max_merge_fanin=max_merge_fanin,
+                               payload_runs=payload_runs,
+                               key_codec=key_codec,
+                               compression=compression,
+                               limit=limit,
+                               unique=unique,
+                               reduce=reduce,
+                               initial=initial)
+
+    with writer:
+        try:
+            for line in read_iter_from_file_range(path_to_file_read, start_pos, end_pos, encoding):
+                writer.add(func_key(line), func_value(line))
+        except Exception as err:
+            logging.error("[ERROR -> id:{} | ppid:{} | pid:{}]: {}".format(ipid, os.getppid(), os.getpid(), err))
+            raise
+
+        logging.debug("[LOOP STOP -> id:{} | ppid:{} | pid:{}]".format(ipid, os.getppid(), os.getpid()))
+        gc.collect()
+
+    _send_writer_parts(writer, ipid, proxy_dict, proxy_dict_bytes_written)
 
     gc.collect()
     logging.debug("[END -> id:{} | ppid:{} | pid:{}]".format(ipid, os.getppid(), os.getpid()))
 
 
+def _get_element(element):
+    """
+    Identity function (picklable to be sent to write processes).
+
+    :param element: any element
+    :return: same element
+    """
+    return element
+
+
+def _get_start_method():
+    """
+    Get the start method of processes without fix it (multiprocessing.get_start_method fixes the method by default
+    if it is not set, then the application could not set it later).
+
+    >>> import multiprocessing
+    >>> from sorted_in_disk.sorted_in_disk import _get_start_method
+    >>> _get_start_method() in multiprocessing.get_all_start_methods()
+    True
+
+    :return: start method set, or the method by default of platform if it is not set
+    """
+    start_method = multiprocessing.get_start_method(allow_none=True)
+    if start_method is None:
+        # The first method is the method by default of platform
+        start_method = multiprocessing.get_all_start_methods()[0]
+    return start_method
+
+
+def _check_picklable_functions(dict_name_func):
+    """
+    Check if functions can be sent to other processes (only if processes are not started with fork, fork copies
+    functions without pickle).
+
+    :param dict_name_func: dict of name of arg and function (None is not checked)
+    :exception ValueError: raise if one function is not picklable
+    :return: None
+    """
+    start_method = _get_start_method()
+    if start_method == "fork":
+        return
+
+    for name, func in dict_name_func.items():
+        if func is None:
+            continue
+        try:
+            pickle.dumps(func)
+        except (pickle.PicklingError, AttributeError, TypeError) as err:
+            raise ValueError("{} must be picklable to be used in write processes (start method '{}'), use a "
+                             "function defined at module level instead of a lambda or a local "
+                             "function: {}".format(name, start_method, err))
+
+
 def _get_next(iter_f):
     """
     Get function than get next of iterable in each call
@@ -438,116 +1382,1015 @@ def _get_next(iter_f):
     return f_next
 
 
-def _iter_get_data_from_files(dict_ipid_tup_full_list_parts, reverse=False):
+class _ReverseKey(object):
     """
-    Generator to read first line in all sorted buckets and sort all obtained lines, then obtain first until to consume
-    buckets all.
-
-    :param dict_ipid_tup_full_list_parts: dict with information about temporal files
-    :param reverse: True to reverse sort. By default: False
-    :return: Generator to return tuples key and line after sort.
+    Wrapper of a key to invert its order. Used to get a max heap from heapq (min heap) when sort is reversed.
     """
-    full_data_counter = dict()
-    l_get = list()
-    for ipid, tup in dict_ipid_tup_full_list_parts.items():
-        f_full_data_open = EasyBinaryFile(tup[0], mode='rb')
+    __slots__ = ("key",)
 
-        for path_to_keys_sorted in tup[1]:
-            f_next = _get_next(quick_load_items(path_to_keys_sorted))
-            l_get.append(f_next() + (f_next, f_full_data_open))
-            try:
-                full_data_counter[f_full_data_open] += 1
-            except KeyError:
-                full_data_counter[f_full_data_open] = 1
+    def __init__(self, key):
+        self.key = key
 
-    l_get = sorted(l_get, key=lambda mtup: mtup[0], reverse=reverse)
+    def __lt__(self, other):
+        return other.key < self.key
 
-    # To several sorted files
-    while len(l_get) > 1:
-        key, fpositions, f_next, f_full_data = l_get[0]
-        for f_pos in fpositions:
-            f_full_data.seek(f_pos)
-            yield key, f_full_data.load()
+    def __eq__(self, other):
+        return self.key == other.key
 
-        new_tup = f_next()
-        if new_tup is None:
-            l_get.pop(0)
-            full_data_counter[f_full_data] -= 1
-            if full_data_counter[f_full_data] == 0:
-                f_full_data.close()
-                del full_data_counter[f_full_data]
-        else:
-            l_get[0] = new_tup + (f_next, f_full_data)
-            if (not reverse and l_get[0][0] > l_get[1][0]) or (reverse and l_get[0][0] < l_get[1][0]):
-                l_get = sorted(l_get, key=lambda mtup: mtup[0], reverse=reverse)
-
-    # To one sorted file
-    if len(l_get) == 1:
-        el_get = l_get[0]
-        while el_get is not None:
-            key, fpositions, f_next, f_full_data = el_get
-
-            for f_pos in fpositions:
-                yield key, f_full_data.get_by_cursor_position(f_pos)
-
-            new_tup = f_next()
-            if new_tup is None:
-                el_get = None
-                full_data_counter[f_full_data] -= 1
-                if full_data_counter[f_full_data] == 0:
-                    f_full_data.close()
-                    del full_data_counter[f_full_data]
-            else:
-                el_get = new_tup + (f_next, f_full_data)
 
-    for f in full_data_counter.keys():
-        f.close()
+class _SortedGroup(object):
+    """
+    Values of one key returned by groups. Values are read (lazy) when the group is iterated, and the number of values
+    is known without read them (from positions of values in pre-sorted files).
+    """
+    __slots__ = ("list_tup_data_f_full_data", "count")
 
-    del full_data_counter
+    def __init__(self, list_tup_data_f_full_data):
+        """
+        :param list_tup_data_f_full_data: list of tuples data (positions of values, or values if full data file is
+            None) and full data file
+        """
+        self.list_tup_data_f_full_data = list_tup_data_f_full_data
+        self.count = sum(len(data) for data, _ in list_tup_data_f_full_data)
 
+    def __len__(self):
+        return self.count
 
-def _read_process(proxy_queue_iter,
-                  proxy_queue_iter_init_args,
-                  proxy_start_event_iter,
-                  proxy_end_event_iter,
+    def __iter__(self):
+        for data, f_full_data in self.list_tup_data_f_full_data:
+            if f_full_data is None:
+                for value in data:
+                    yield value
+            else:
+                for f_pos in data:
+                    yield f_full_data.get_by_cursor_position(f_pos)
 
-                  dict_ipid_tup_full_list_parts,
-                  reverse,
+    def __repr__(self):
+        return "_SortedGroup(count={})".format(self.count)
 
-                  logging_level):
+
+def _iter_merged_groups(it_merged, list_f_full_data):
     """
-    Consumer process of sorted data
+    Group merged tuples of consecutive equal keys (the merge returns one tuple per key and run) in one _SortedGroup
+    per key.
 
-    :param proxy_queue_iter: queue to work
-    :param proxy_start_event_iter: start flag process notification
-    :param proxy_end_event_iter: end flag process notification
-    :param dict_ipid_tup_full_list_parts: dict with information about temporal files
-    :param reverse: True to reverse sort. By default: False
-    :param logging_level: Level of log. Only to debug or to remove psutil warning. By default: logging.WARNING
-    :return: None
+    :param it_merged: iterable of merged tuples key, data and index of run
+    :param list_f_full_data: list of full data file of each run (None if runs have values)
+    :return: generator of tuples key and _SortedGroup
     """
-    logging.basicConfig(stream=sys.stderr, level=logging_level)
+    list_tup_data_f_full_data = None
+    prev_key = None
+    for key, data, irun in it_merged:
+        if list_tup_data_f_full_data is not None and key == prev_key:
+            list_tup_data_f_full_data.append((data, list_f_full_data[irun]))
+        else:
+            if list_tup_data_f_full_data is not None:
+                yield prev_key, _SortedGroup(list_tup_data_f_full_data)
+            prev_key = key
+            list_tup_data_f_full_data = [(data, list_f_full_data[irun])]
+    if list_tup_data_f_full_data is not None:
+        yield prev_key, _SortedGroup(list_tup_data_f_full_data)
 
-    logging.debug("[START GETTER -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
-    proxy_start_event_iter.set()
+
+def _iter_merge_sorted_runs(list_runs, reverse=False):
+    """
+    K-way merge of sorted runs with a priority queue (heap). Each step cost O(log k) with k the number of runs.
+
+    Equal keys in different runs are returned in the same order of runs in list_runs (stable merge).
+
+    >>> from sorted_in_disk.sorted_in_disk import _iter_merge_sorted_runs
+    >>> list(_iter_merge_sorted_runs([[("a", 1), ("c", 2)], [("a", 3), ("b", 4)]]))
+    [('a', 1, 0), ('a', 3, 1), ('b', 4, 1), ('c', 2, 0)]
+    >>> list(_iter_merge_sorted_runs([[("c", 1), ("a", 2)], [("c", 3), ("b", 4)]], reverse=True))
+    [('c', 1, 0), ('c', 3, 1), ('b', 4, 1), ('a', 2, 0)]
+
+    :param list_runs: list of iterables of tuples (key, data), each one sorted by key
+    :param reverse: True if runs are sorted in reverse. By default: False
+    :return: Generator of tuples key, data and index of run in list_runs
+    """
+    heap = list()
+    for irun, run in enumerate(list_runs):
+        f_next = _get_next(iter(run))
+        tup = f_next()
+        if tup is not None:
+            # The index of run is unique, then data is never compared and equal keys keep order of runs
+            heap.append([_ReverseKey(tup[0]) if reverse else tup[0], irun, tup, f_next])
+
+    heapq.heapify(heap)
+
+    # To several sorted runs
+    while len(heap) > 1:
+        _, irun, tup, f_next = heap[0]
+        yield tup[0], tup[1], irun
+
+        new_tup = f_next()
+        if new_tup is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, [_ReverseKey(new_tup[0]) if reverse else new_tup[0], irun, new_tup, f_next])
+
+    # To one sorted run (not necessary to compare)
+    if heap:
+        _, irun, tup, f_next = heap[0]
+        while tup is not None:
+            yield tup[0], tup[1], irun
+            tup = f_next()
+
+
+def _iter_merge_equal_keys(list_runs, reverse=False, unique=None):
+    """
+    Merge sorted runs and join in one list the data of equal keys (in the order of runs, to maintain stable sort).
+
+    >>> from sorted_in_disk.sorted_in_disk import _iter_merge_equal_keys
+    >>> list(_iter_merge_equal_keys([[("a", [1]), ("c", [2])], [("a", [3]), ("b", [4])]]))
+    [('a', [1, 3]), ('b', [4]), ('c', [2])]
+    >>> list(_iter_merge_equal_keys([[("a", [1]), ("c", [2])], [("a", [3]), ("b", [4])]], unique="last"))
+    [('a', [3]), ('b', [4]), ('c', [2])]
+
+    :param list_runs: list of iterables of tuples (key, list of data), each one sorted by key
+    :param reverse: True if runs are sorted in reverse. By default: False
+    :param unique: "first", "last" or "any" to keep only one data per key. If None, then all data are joined.
+        By default: None
+    :return: Generator of tuples key and list of data
+    """
+    it_merged = _iter_merge_sorted_runs(list_runs, reverse)
+    if unique is not None:
+        it_merged = _iter_unique_keys(it_merged, unique)
+
+    prev_key = None
+    prev_data = None
+    for key, data, _ in it_merged:
+        if prev_data is not None and key == prev_key:
+            prev_data.extend(data)
+        else:
+            if prev_data is not None:
+                yield prev_key, prev_data
+            prev_key, prev_data = key, data
+
+    if prev_data is not None:
+        yield prev_key, prev_data
+
+
+def _iter_unique_keys(it_merged, unique):
+    """
+    Keep only one data of each key of merged tuples (equal keys are consecutive and in the order of runs)
+
+    >>> from sorted_in_disk.sorted_in_disk import _iter_unique_keys
+    >>> it_merged = [("a", [1], 0), ("a", [2, 3], 1), ("b", [4], 0)]
+    >>> list(_iter_unique_keys(it_merged, "first"))
+    [('a', [1], 0), ('b', [4], 0)]
+    >>> list(_iter_unique_keys(it_merged, "last"))
+    [('a', [3], 1), ('b', [4], 0)]
+
+    :param it_merged: iterable of merged tuples key, list of data and index of run
+    :param unique: "last" to keep the last data, "first" or "any" to keep the first data
+    :return: Generator to return tuples of key, list with one data and index of run
+    """
+    prev = None
+    for tup in it_merged:
+        if prev is None or tup[0] != prev[0]:
+            if prev is not None:
+                yield prev[0], prev[1][-1:] if unique == "last" else prev[1][:1], prev[2]
+            prev = tup
+        elif unique == "last":
+            prev = tup
+
+    if prev is not None:
+        yield prev[0], prev[1][-1:] if unique == "last" else prev[1][:1], prev[2]
+
+
+def _iter_reduce_values(it_items, combine):
+    """
+    Combine values of consecutive equal keys (values of each run are folded yet, then only folded values of different
+    runs are combined here).
+
+    >>> from operator import add
+    >>> from sorted_in_disk.sorted_in_disk import _iter_reduce_values
+    >>> list(_iter_reduce_values(iter([("a", 1), ("a", 2), ("b", 3)]), add))
+    [('a', 3), ('b', 3)]
+    >>> list(_iter_reduce_values(iter([("a", [1]), ("a", [2, 3]), ("b", [4])]), add))
+    [('a', [1, 2, 3]), ('b', [4])]
+
+    :param it_items: iterable of tuples key and folded value sorted by key
+    :param combine: function with args two folded values of the same key
+    :return: generator of tuples key and combined value (one per key)
+    """
+    is_first = True
+    prev_key = None
+    acc = None
+    for key, value in it_items:
+        if is_first:
+            is_first = False
+        elif key == prev_key:
+            acc = combine(acc, value)
+            continue
+        else:
+            yield prev_key, acc
+        prev_key = key
+        acc = value
+    if not is_first:
+        yield prev_key, acc
+
+
+def _iter_group_values(it_items):
+    """
+    Group values of consecutive equal keys in lists (only one group is in RAM memory).
+
+    >>> from sorted_in_disk.sorted_in_disk import _iter_group_values
+    >>> list(_iter_group_values(iter([("a", 1), ("a", 2), ("b", 3)])))
+    [('a', [1, 2]), ('b', [3])]
+
+    :param it_items: iterable of tuples key and value sorted by key
+    :return: generator of tuples key and list of its values
+    """
+    list_values = None
+    prev_key = None
+    for key, value in it_items:
+        if list_values is not None and key == prev_key:
+            list_values.append(value)
+        else:
+            if list_values is not None:
+                yield prev_key, list_values
+            prev_key = key
+            list_values = [value]
+    if list_values is not None:
+        yield prev_key, list_values
+
+
+def _iter_batches(it_items, batch_size):
+    """
+    Group consecutive elements in lists of batch_size elements (the last one can be smaller). Each batch is taken
+    from the iterable in one call (without a generator step per element).
+
+    >>> from sorted_in_disk.sorted_in_disk import _iter_batches
+    >>> list(_iter_batches(iter(range(5)), 2))
+    [[0, 1], [2, 3], [4]]
+
+    :param it_items: iterator of elements
+    :param batch_size: number of elements of each batch
+    :return: generator of lists of elements
+    """
+    while True:
+        batch = list(islice(it_items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _iter_pickled_batches(it_items, batch_bytes):
+    """
+    Pickle consecutive elements in batches of about batch_bytes bytes (one pickle per batch). The number of elements
+    of each batch is estimated with the size of the previous batch, then the first batch has one element (without
+    delay to the first element) and next batches grow to batch_bytes.
+
+    >>> import pickle
+    >>> from sorted_in_disk.sorted_in_disk import _iter_pickled_batches
+    >>> list_payloads = list(_iter_pickled_batches(iter(range(1000)), 64))
+    >>> [element for payload in list_payloads for element in pickle.loads(payload)] == list(range(1000))
+    True
+    >>> [len(pickle.loads(payload)) for payload in list_payloads[:3]]
+    [1, 3, 8]
+
+    :param it_items: iterator of elements
+    :param batch_bytes: approximate size in bytes of each pickled batch
+    :return: generator of bytes of each pickled list of elements
+    """
+    batch_size = 1
+    while True:
+        batch = list(islice(it_items, batch_size))
+        if not batch:
+            return
+        payload = pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL)
+        yield payload
+        batch_size = max(1, batch_bytes * len(batch) // len(payload))
+
+
+def _iter_queue_batches(queue_batches):
+    """
+    Get elements of batches of a queue until a None is got (mark of end). If an exception is got (mark of error of
+    the producer), then an EOFError is raised from it.
+
+    >>> import queue
+    >>> from sorted_in_disk.sorted_in_disk import _iter_queue_batches
+    >>> queue_batches = queue.Queue()
+    >>> for batch in ([1, 2], [3], None):
+    ...     queue_batches.put(batch)
+    >>> list(_iter_queue_batches(queue_batches))
+    [1, 2, 3]
+    >>> for batch in ([1, 2], ValueError("Producer failed")):
+    ...     queue_batches.put(batch)
+    >>> list(_iter_queue_batches(queue_batches))
+    Traceback (most recent call last):
+    ...
+    EOFError: Producer of batches ended by an error before the end
+
+    :param queue_batches: queue of lists of elements
+    :return: generator of elements of batches
+    :exception EOFError: raise if the producer puts an exception
+    """
+    for batch in iter(queue_batches.get, None):
+        if isinstance(batch, BaseException):
+            raise EOFError("Producer of batches ended by an error before the end") from batch
+        for element in batch:
+            yield element
+
+
+def _iter_join_groups(it_left_groups, it_right_groups, how="inner", reverse=False):
+    """
+    Join two iterables of groups sorted by key in one synchronized pass (each one is read sequentially).
+
+    >>> from sorted_in_disk.sorted_in_disk import _iter_join_groups
+    >>> list(_iter_join_groups(iter([("a", [1]), ("b", [2])]), iter([("b", [3]), ("c", [4])]), how="outer"))
+    [('a', [1], []), ('b', [2], [3]), ('c', [], [4])]
+
+    :param it_left_groups: iterable of tuples key and list of values sorted by key
+    :param it_right_groups: iterable of tuples key and list of values sorted by key (in same order)
+    :param how: "inner" to return only keys in both, "left" to return all keys of left or "outer" to return all keys.
+        By default: "inner"
+    :param reverse: True if keys are sorted in reverse order. By default: False
+    :return: generator of tuples key, list of left values and list of right values (empty if key is not in one side)
+    """
+    keep_left = how in ("left", "outer")
+    keep_right = how == "outer"
+
+    left = next(it_left_groups, None)
+    right = next(it_right_groups, None)
+    while left is not None and right is not None:
+        if left[0] == right[0]:
+            yield left[0], left[1], right[1]
+            left = next(it_left_groups, None)
+            right = next(it_right_groups, None)
+        elif (left[0] > right[0]) if reverse else (left[0] < right[0]):
+            if keep_left:
+                yield left[0], left[1], []
+            left = next(it_left_groups, None)
+        else:
+            if keep_right:
+                yield right[0], [], right[1]
+            right = next(it_right_groups, None)
+
+    # Only one side can have more groups
+    while keep_left and left is not None:
+        yield left[0], left[1], []
+        left = next(it_left_groups, None)
+    while keep_right and right is not None:
+        yield right[0], [], right[1]
+        right = next(it_right_groups, None)
+
+
+def _get_unique_policy(unique):
+    """
+    Get the policy to keep one value per key
+
+    >>> from sorted_in_disk.sorted_in_disk import _get_unique_policy
+    >>> _get_unique_policy(True), _get_unique_policy("last"), _get_unique_policy(False)
+    ('first', 'last', None)
+
+    :param unique: False or None to keep all values, True or "first" to keep the first injected value, "last" to
+        keep the last injected value or "any" to keep any value (the cheapest, now the first)
+    :exception ValueError: raise if unique is not allowed
+    :return: "first", "last", "any" or None
+    """
+    if unique is None or unique is False:
+        return None
+    if unique is True:
+        return "first"
+    if unique in ("first", "last", "any"):
+        return unique
+    raise ValueError("unique={} not allowed, it must be True, False, None, 'first', 'last' or 'any'".format(unique))
+
+
+def _cascade_merge_runs(list_paths_to_keys_sorted,
+                        max_merge_fanin,
+                        get_new_path_to_keys_sorted,
+                        reverse=False,
+                        compression=None,
+                        list_bytes_written=None,
+                        unique=None):
+    """
+    Merge groups of files of keys sorted (runs) in bigger files until have no more than max_merge_fanin files.
+
+    In each pass it is merged the group of consecutive files with less size (consecutive files to maintain the
+    stable sort), then small files are merged more times than big files.
+
+    Note: all files must be indexes of the same full data file.
+
+    :param list_paths_to_keys_sorted: list of paths to files of keys sorted
+    :param max_merge_fanin: max number of files of keys sorted to return (min 1)
+    :param get_new_path_to_keys_sorted: function without args to get a path to a new file of keys sorted
+    :param reverse: True if files are sorted in reverse. By default: False
+    :param compression: compression of files (None if they are not compressed). By default: None
+    :param list_bytes_written: list where append bytes written to disk. If None, then they are not counted.
+        By default: None
+    :param unique: "first", "last" or "any" to keep one data per key in merged files. If None, then all data are
+        kept. By default: None
+    :return: new list of paths to files of keys sorted
+    """
+    list_paths_to_keys_sorted = list(list_paths_to_keys_sorted)
+    while len(list_paths_to_keys_sorted) > max_merge_fanin:
+        num_paths = len(list_paths_to_keys_sorted)
+        if max_merge_fanin < 2:
+            size_group = num_paths
+        else:
+            size_group = min(max_merge_fanin, num_paths - max_merge_fanin + 1)
+
+        sizes = [path_to_keys_sorted.stat().st_size for path_to_keys_sorted in list_paths_to_keys_sorted]
+        start_group = min(range(num_paths - size_group + 1), key=lambda i: sum(sizes[i:i + size_group]))
+        group_paths = list_paths_to_keys_sorted[start_group:start_group + size_group]
+
+        path_merged = get_new_path_to_keys_sorted()
+        bytes_written = _dump_run(path_merged,
+                                  _iter_merge_equal_keys([_iter_load_run(path_to_keys_sorted, compression)
+                                                          for path_to_keys_sorted in group_paths],
+                                                         reverse,
+                                                         unique),
+                                  compression)
+        if list_bytes_written is not None:
+            list_bytes_written.append(bytes_written)
+        for path_to_keys_sorted in group_paths:
+            path_to_keys_sorted.unlink()
+
+        list_paths_to_keys_sorted[start_group:start_group + size_group] = [path_merged]
+
+    return list_paths_to_keys_sorted
+
+
+def _load_window_values(window, list_f_full_data):
+    """
+    Read the values of a window of merged keys. Positions of values of each full data file are sorted and read in
+    ascending order (near positions in one read).
+
+    :param window: list of merged tuples key, positions of values and index of run
+    :param list_f_full_data: list of opened full data files by index of run
+    :return: dict with a dict of values by position for each full data file
+    """
+    dict_f_positions = dict()
+    for _, fpositions, irun in window:
+        f_full_data = list_f_full_data[irun]
+        try:
+            dict_f_positions[f_full_data].extend(fpositions)
+        except KeyError:
+            dict_f_positions[f_full_data] = list(fpositions)
+
+    return {f_full_data: load_by_cursor_positions(f_full_data, sorted(set(positions)))
+            for f_full_data, positions in dict_f_positions.items()}
+
+
+def _iter_prefetch_values(it_merged, list_f_full_data, prefetch_window, executor=None):
+    """
+    Read ahead the values of the next prefetch_window merged keys. Positions of values of each full data file are
+    sorted and read in ascending order (near positions in one read), then values are returned in order of keys.
+    Random reads are transformed in forward reads with memory bounded by prefetch_window.
+
+    If executor is defined, then values of the next window are read in a thread while the current window is
+    returned (memory bounded by two windows).
+
+    :param it_merged: iterable of merged tuples key, positions of values and index of run
+    :param list_f_full_data: list of opened full data files by index of run
+    :param prefetch_window: number of keys to read ahead
+    :param executor: concurrent.futures.Executor to read values of the next window. If None, then values are read
+        when the window is returned. By default: None
+    :return: Generator to return tuples key and value
+    """
+    window = list(islice(it_merged, prefetch_window))
+    future_values = None
+    if executor is not None and window:
+        future_values = executor.submit(_load_window_values, window, list_f_full_data)
+
+    try:
+        while window:
+            if future_values is None:
+                dict_f_pos_values = _load_window_values(window, list_f_full_data)
+            else:
+                dict_f_pos_values = future_values.result()
+                future_values = None
+
+            next_window = list(islice(it_merged, prefetch_window))
+            if executor is not None and next_window:
+                future_values = executor.submit(_load_window_values, next_window, list_f_full_data)
+
+            for key, fpositions, irun in window:
+                dict_pos_values = dict_f_pos_values[list_f_full_data[irun]]
+                for f_pos in fpositions:
+                    yield key, dict_pos_values[f_pos]
+
+            del dict_f_pos_values
+            window = next_window
+    finally:
+        if future_values is not None:
+            # Files are not closed while they are read
+            future_values.cancel()
+            wait([future_values])
+
+
+def _next_chunk(it, chunk_size):
+    return list(islice(it, chunk_size))
+
+
+def _iter_read_ahead(it, executor, chunk_size=_READ_AHEAD_CHUNK):
+    """
+    Read ahead an iterable in chunks in a thread of executor. The next chunk is read while the current chunk is
+    returned (memory bounded by two chunks). Reads of files release the GIL, then the consumer hardly ever waits
+    for the disk.
+
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> from sorted_in_disk.sorted_in_disk import _iter_read_ahead
+    >>> with ThreadPoolExecutor(1) as executor:
+    ...     list(_iter_read_ahead(iter(range(7)), executor, chunk_size=3))
+    [0, 1, 2, 3, 4, 5, 6]
+
+    :param it: iterator to read (it is only advanced by one thread at the same time)
+    :param executor: concurrent.futures.Executor to read chunks
+    :param chunk_size: number of elements of each chunk. By default: _READ_AHEAD_CHUNK
+    :return: Generator of elements of it in the same order
+    """
+    future_chunk = executor.submit(_next_chunk, it, chunk_size)
+    try:
+        while future_chunk is not None:
+            chunk = future_chunk.result()
+            if len(chunk) < chunk_size:
+                future_chunk = None
+            else:
+                future_chunk = executor.submit(_next_chunk, it, chunk_size)
+
+            for element in chunk:
+                yield element
+    finally:
+        if future_chunk is not None:
+            # The iterator is not closed while it is read
+            future_chunk.cancel()
+            wait([future_chunk])
+
+
+def _iter_run_in_range(run, start=None, stop=None, reverse=False):
+    """
+    Filter a sorted run to return only tuples with keys in range from start (included) to stop (excluded) in order
+    of the run (with reverse, start is the greatest key).
+
+    >>> from sorted_in_disk.sorted_in_disk import _iter_run_in_range
+    >>> run = [(1, "a"), (2, "b"), (3, "c"), (4, "d")]
+    >>> list(_iter_run_in_range(run, start=2, stop=4))
+    [(2, 'b'), (3, 'c')]
+    >>> list(_iter_run_in_range(run[::-1], start=3, reverse=True))
+    [(3, 'c'), (2, 'b'), (1, 'a')]
+
+    :param run: iterable of tuples key and data sorted by key
+    :param start: first key of range (included). If None, then from first key of run. By default: None
+    :param stop: key to end the range (excluded). If None, then to last key of run. By default: None
+    :param reverse: True if run is sorted in reverse. By default: False
+    :return: Generator to return tuples of run in range
+    """
+    iter_run = iter(run)
+    if start is not None:
+        for tup in iter_run:
+            if not (start < tup[0] if reverse else tup[0] < start):
+                iter_run = chain((tup,), iter_run)
+                break
+
+    if stop is None:
+        for tup in iter_run:
+            yield tup
+    else:
+        for tup in iter_run:
+            if not (stop < tup[0] if reverse else tup[0] < stop):
+                return
+            yield tup
+
+
+def _get_range_splitters(dict_ipid_tup_full_list_parts,
+                         num_ranges,
+                         total_counter,
+                         reverse=False,
+                         compression=None,
+                         samples_per_range=128,
+                         start=None,
+                         stop=None):
+    """
+    Choose keys to split all sorted data (or keys from start to stop) in ranges with a similar number of values. Keys
+    are sampled from the pre-sorted files (runs) without read values.
+
+    :param dict_ipid_tup_full_list_parts: dict with information about temporal files
+    :param num_ranges: number of ranges to split
+    :param total_counter: total number of values saved (to calculate the sample rate)
+    :param reverse: True to reverse sort. By default: False
+    :param compression: compression of runs (None if they are not compressed). By default: None
+    :param samples_per_range: number of keys to sample by range. By default: 128
+    :param start: first key to sample (included). If None, then from first key. By default: None
+    :param stop: key to stop to sample (excluded). If None, then to last key. By default: None
+    :return: sorted list of keys to split (first key of each range except the first one). Ranges with same key are
+        joined, then the list can have less than num_ranges - 1 keys
+    """
+    sample_step = max(1, total_counter // (num_ranges * samples_per_range))
+    list_sample_keys = list()
+    for _, tup in dict_ipid_tup_full_list_parts.items():
+        for path_to_keys_sorted in tup[1]:
+            run = _iter_run_in_range(_iter_load_run(path_to_keys_sorted, compression, start=start, reverse=reverse),
+                                     stop=stop,
+                                     reverse=reverse)
+            for key, _ in islice(run, 0, None, sample_step):
+                list_sample_keys.append(key)
+
+    if not list_sample_keys:
+        return list()
+
+    list_sample_keys.sort(reverse=reverse)
+
+    return _get_quantile_keys(list_sample_keys, num_ranges)
+
+
+def _get_quantile_keys(list_sorted_keys, num_ranges):
+    """
+    Choose keys to split a sorted list of keys in ranges with a similar number of keys.
+
+    >>> from sorted_in_disk.sorted_in_disk import _get_quantile_keys
+    >>> _get_quantile_keys([1, 2, 3, 4, 5, 6, 7, 8], 4)
+    [3, 5, 7]
+    >>> _get_quantile_keys([1, 1, 1, 1, 1, 1, 2, 2], 4)
+    [2]
+
+    :param list_sorted_keys: sorted list of keys
+    :param num_ranges: number of ranges to split
+    :return: sorted list of keys to split (first key of each range except the first one). Ranges with same key are
+        joined, then the list can have less than num_ranges - 1 keys
+    """
+    list_splitters = list()
+    for irange in range(1, num_ranges):
+        key = list_sorted_keys[irange * len(list_sorted_keys) // num_ranges]
+        if not list_splitters or list_splitters[-1] != key:
+            list_splitters.append(key)
+
+    if list_splitters and list_splitters[0] == list_sorted_keys[0]:
+        # The first range would be empty
+        list_splitters.pop(0)
+
+    return list_splitters
+
+
+def _get_func_partition(partition_keys, reverse=False, key_codec=None):
+    """
+    Get a function to choose the partition (range of keys) of each key. Partitions are numbered in order of read.
+
+    >>> from sorted_in_disk.sorted_in_disk import _get_func_partition
+    >>> from sorted_in_disk.key_codec import KeyCodec
+    >>> get_partition = _get_func_partition([10, 20])
+    >>> [get_partition(key) for key in (5, 10, 15, 20, 25)]
+    [0, 1, 1, 2, 2]
+    >>> get_partition = _get_func_partition([10, 20], reverse=True)
+    >>> [get_partition(key) for key in (5, 10, 15, 20, 25)]
+    [2, 1, 1, 0, 0]
+    >>> key_codec = KeyCodec(descending=True)
+    >>> get_partition = _get_func_partition(sorted(key_codec.encode(key) for key in (10, 20)), key_codec=key_codec)
+    >>> [get_partition(key) for key in (5, 10, 15, 20, 25)]
+    [2, 2, 1, 1, 0]
+
+    :param partition_keys: list of keys in ascending order (encoded if key_codec is defined), each one is the first
+        key of one range (except the first range)
+    :param reverse: True to reverse sort. By default: False
+    :param key_codec: KeyCodec to encode each key before choose its partition (write processes sort encoded keys).
+        If None, then keys are not encoded. By default: None
+    :return: function with arg key to return the number of partition
+    """
+    if reverse:
+        last_partition = len(partition_keys)
+
+        def get_partition_key(key):
+            return last_partition - bisect_right(partition_keys, key)
+    else:
+        def get_partition_key(key):
+            return bisect_right(partition_keys, key)
+
+    if key_codec is None:
+        return get_partition_key
+
+    encode = key_codec.encode
+
+    def get_partition(key):
+        return get_partition_key(encode(key))
+
+    return get_partition
+
+
+def _iter_decode_keys(it_merged, key_codec):
+    """
+    Decode keys of merged tuples (each key is decoded one time, not one time per value)
+
+    :param it_merged: iterable of merged tuples key, data and index of run
+    :param key_codec: KeyCodec used to encode keys
+    :return: Generator to return tuples of decoded key, data and index of run
+    """
+    decode = key_codec.decode
+    for key, data, irun in it_merged:
+        yield decode(key), data, irun
+
+
+def _iter_get_data_from_files(dict_ipid_tup_full_list_parts,
+                              reverse=False,
+                              payload_runs=False,
+                              mmap_values=False,
+                              prefetch_window=None,
+                              read_ahead_threads=None,
+                              start=None,
+                              stop=None,
+                              partitioned=False,
+                              key_codec=None,
+                              compression=None,
+                              list_bytes_read=None,
+                              limit=None,
+                              unique=None,
+                              reduce=None,
+                              groups=False,
+                              batch_size=None):
+    """
+    Generator to merge all sorted buckets (runs of keys sorted) in one sorted stream and get each value from
+    the full data file.
+
+    :param dict_ipid_tup_full_list_parts: dict with information about temporal files
+    :param reverse: True to reverse sort. By default: False
+    :param payload_runs: True if runs have values instead of positions of values in full data file (then full data
+        file is not read). By default: False
+    :param mmap_values: True to read values from full data files mapped in memory. By default: False
+    :param prefetch_window: number of keys to read ahead its values in order of positions in full data files.
+        If None, then each value is read when its key is returned. By default: None
+    :param read_ahead_threads: number of threads to read ahead the next blocks of each run and the values of the
+        next window of keys (of prefetch_window keys or _READ_AHEAD_WINDOW if it is not defined) while the current
+        ones are merged. If None, then runs and values are read when they are needed. By default: None
+    :param start: first key to return (included, encoded if key_codec is defined). If None, then from first key.
+        By default: None
+    :param stop: key to stop (excluded, encoded if key_codec is defined). If None, then to last key.
+        By default: None
+    :param partitioned: True if each write process has its own range of keys (write processes are numbered in
+        order of ranges), then runs of each write process are merged apart and concatenated. By default: False
+    :param key_codec: KeyCodec used to encode keys of runs (keys are decoded). If None, then keys are not encoded.
+        By default: None
+    :param compression: compression of full data files and runs (mmap_values is not used if files are
+        compressed). If None, then files are not compressed. By default: None
+    :param list_bytes_read: list where append bytes read from disk when generator ends (bytes read with
+        mmap_values are not counted). If None, then they are not counted. By default: None
+    :param limit: max number of tuples to return (the merge stops). If None, then all. By default: None
+    :param unique: "first", "last" or "any" to return one value per key (duplicates of different runs are dropped in
+        the merge). If None, then all values are returned. By default: None
+    :param reduce: function with args two folded values of the same key to combine folded values of different runs
+        (one tuple per key is returned). If None, then values are not combined. By default: None
+    :param groups: True to return one tuple per key with a _SortedGroup of its values (values are read when the
+        group is iterated, prefetch_window is not used). By default: False
+    :param batch_size: number of tuples to return in each list (lists of tuples key and line are returned instead of
+        tuples). If None, then tuples are returned one by one. By default: None
+    :return: Generator to return tuples key and line after sort (or key and _SortedGroup if groups is True, or lists
+        of tuples if batch_size is defined).
+    """
+    if batch_size is not None:
+        it_data = _iter_get_data_from_files(dict_ipid_tup_full_list_parts,
+                                            reverse=reverse,
+                                            payload_runs=payload_runs,
+                                            mmap_values=mmap_values,
+                                            prefetch_window=prefetch_window,
+                                            read_ahead_threads=read_ahead_threads,
+                                            start=start,
+                                            stop=stop,
+                                            partitioned=partitioned,
+                                            key_codec=key_codec,
+                                            compression=compression,
+                                            list_bytes_read=list_bytes_read,
+                                            limit=limit,
+                                            unique=unique,
+                                            reduce=reduce,
+                                            groups=groups)
+        try:
+            for batch in _iter_batches(it_data, batch_size):
+                yield batch
+        finally:
+            it_data.close()
+        return
+
+    if groups and (limit is not None or reduce is not None):
+        # Values are limited or folded in the stream of tuples, then each group is built with values read
+        it_data = _iter_get_data_from_files(dict_ipid_tup_full_list_parts,
+                                            reverse=reverse,
+                                            payload_runs=payload_runs,
+                                            mmap_values=mmap_values,
+                                            prefetch_window=prefetch_window,
+                                            read_ahead_threads=read_ahead_threads,
+                                            start=start,
+                                            stop=stop,
+                                            partitioned=partitioned,
+                                            key_codec=key_codec,
+                                            compression=compression,
+                                            list_bytes_read=list_bytes_read,
+                                            limit=limit,
+                                            unique=unique,
+                                            reduce=reduce)
+        try:
+            for key, list_values in _iter_group_values(it_data):
+                yield key, _SortedGroup([(list_values, None)])
+        finally:
+            it_data.close()
+        return
+
+    if reduce is not None:
+        it_data = _iter_get_data_from_files(dict_ipid_tup_full_list_parts,
+                                            reverse=reverse,
+                                            payload_runs=payload_runs,
+                                            mmap_values=mmap_values,
+                                            prefetch_window=prefetch_window,
+                                            read_ahead_threads=read_ahead_threads,
+                                            start=start,
+                                            stop=stop,
+                                            partitioned=partitioned,
+                                            key_codec=key_codec,
+                                            compression=compression,
+                                            list_bytes_read=list_bytes_read,
+                                            limit=limit,
+                                            unique=unique)
+        try:
+            for tup_key_value in _iter_reduce_values(it_data, reduce):
+                yield tup_key_value
+        finally:
+            it_data.close()
+        return
+
+    if limit is not None:
+        it_data = _iter_get_data_from_files(dict_ipid_tup_full_list_parts,
+                                            reverse=reverse,
+                                            payload_runs=payload_runs,
+                                            mmap_values=mmap_values,
+                                            prefetch_window=prefetch_window,
+                                            read_ahead_threads=read_ahead_threads,
+                                            start=start,
+                                            stop=stop,
+                                            partitioned=partitioned,
+                                            key_codec=key_codec,
+                                            compression=compression,
+                                            list_bytes_read=list_bytes_read,
+                                            unique=unique)
+        try:
+            for tup_key_value in islice(it_data, limit):
+                yield tup_key_value
+        finally:
+            # Files are closed (and bytes read are counted) without read the rest
+            it_data.close()
+        return
+
+    if partitioned:
+        for ipid in sorted(dict_ipid_tup_full_list_parts.keys()):
+            for tup_key_value in _iter_get_data_from_files({ipid: dict_ipid_tup_full_list_parts[ipid]},
+                                                           reverse=reverse,
+                                                           payload_runs=payload_runs,
+                                                           mmap_values=mmap_values,
+                                                           prefetch_window=prefetch_window,
+                                                           read_ahead_threads=read_ahead_threads,
+                                                           start=start,
+                                                           stop=stop,
+                                                           key_codec=key_codec,
+                                                           compression=compression,
+                                                           list_bytes_read=list_bytes_read,
+                                                           unique=unique,
+                                                           groups=groups):
+                yield tup_key_value
+        return
+
+    list_runs = list()
+    list_runs_read_ahead = list()
+    list_f_full_data = list()
+    list_f_full_data_open = list()
+    list_bytes_read_runs = list()
+    executor = None
+    try:
+        if read_ahead_threads:
+            executor = ThreadPoolExecutor(read_ahead_threads)
+
+        for ipid, tup in dict_ipid_tup_full_list_parts.items():
+            if payload_runs:
+                f_full_data_open = None
+            else:
+                f_full_data_open = _open_full_data(tup[0], 'rb', compression, mmap_values)
+                list_f_full_data_open.append(f_full_data_open)
+
+            for path_to_keys_sorted in tup[1]:
+                # Each run is read from the block of start (previous blocks are not read)
+                list_runs.append(_iter_load_run(path_to_keys_sorted, compression, list_bytes_read_runs, start, reverse))
+                list_f_full_data.append(f_full_data_open)
+
+        list_runs_to_merge = list_runs
+        if stop is not None:
+            list_runs_to_merge = [_iter_run_in_range(run, None, stop, reverse) for run in list_runs_to_merge]
+
+        if executor is not None:
+            # Next blocks of each run are read in the pool while the current block is merged (blocks after stop are
+            # not read ahead)
+            list_runs_read_ahead = [_iter_read_ahead(run, executor) for run in list_runs_to_merge]
+            list_runs_to_merge = list_runs_read_ahead
+
+        it_merged = _iter_merge_sorted_runs(list_runs_to_merge, reverse)
+        if unique is not None:
+            it_merged = _iter_unique_keys(it_merged, unique)
+        if key_codec is not None:
+            it_merged = _iter_decode_keys(it_merged, key_codec)
+
+        if groups:
+            # Positions of values of each key are known in the merge, then values are read only if they are iterated
+            for tup_key_group in _iter_merged_groups(it_merged, list_f_full_data):
+                yield tup_key_group
+        elif payload_runs:
+            # Values are read sequentially with the runs
+            for key, values, _ in it_merged:
+                for value in values:
+                    yield key, value
+        elif prefetch_window or executor is not None:
+            for tup_key_value in _iter_prefetch_values(it_merged, list_f_full_data,
+                                                       prefetch_window or _READ_AHEAD_WINDOW, executor):
+                yield tup_key_value
+        else:
+            for key, fpositions, irun in it_merged:
+                f_full_data = list_f_full_data[irun]
+                for f_pos in fpositions:
+                    yield key, f_full_data.get_by_cursor_position(f_pos)
+    finally:
+        for run in list_runs_read_ahead:
+            run.close()
+
+        if executor is not None:
+            # Runs and files are not closed while a thread is reading them
+            executor.shutdown(wait=True)
+
+        for run in list_runs:
+            run.close()
+
+        for f in list_f_full_data_open:
+            f.close()
+
+        if list_bytes_read is not None:
+            list_bytes_read.append(sum(list_bytes_read_runs) +
+                                   sum(getattr(f, "bytes_read", 0) for f in list_f_full_data_open))
+
+
+def _read_process(proxy_queue_iter,
+                  proxy_queue_iter_init_args,
+                  proxy_start_event_iter,
+                  proxy_end_event_iter,
+
+                  dict_ipid_tup_full_list_parts,
+                  dict_read_args,
+                  batch_bytes,
+
+                  logging_level):
+    """
+    Consumer process of sorted data
+
+    :param proxy_queue_iter: queue to work (QQueue or SharedMemoryRing)
+    :param proxy_queue_iter_init_args: args to init QQueue in this process (None for SharedMemoryRing)
+    :param proxy_start_event_iter: start flag process notification
+    :param proxy_end_event_iter: end flag process notification
+    :param dict_ipid_tup_full_list_parts: dict with information about temporal files
+    :param dict_read_args: dict with args to read data (args of _iter_get_data_from_files)
+    :param batch_bytes: size in bytes of each batch of pickled tuples to put in queue (always with SharedMemoryRing).
+        If None, then tuples are put one by one
+    :param logging_level: Level of log. Only to debug. By default: logging.WARNING
+    :return: None
+    """
+    logging.basicConfig(stream=sys.stderr, level=logging_level)
+
+    logging.debug("[START GETTER -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+    proxy_start_event_iter.set()
     gc.collect()
 
-    proxy_queue_iter.init(**proxy_queue_iter_init_args)
+    is_ring = isinstance(proxy_queue_iter, SharedMemoryRing)
+    if is_ring:
+        # The consumer is the parent process (parts of a batch bigger than ring wait for free space)
+        proxy_queue_iter.set_fun_is_consumer_alive(_is_parent_process_alive)
+    if proxy_queue_iter_init_args is not None:
+        proxy_queue_iter.init(**proxy_queue_iter_init_args)
 
     if dict_ipid_tup_full_list_parts is not None:
-        for tup_key_loadpickle in _iter_get_data_from_files(dict_ipid_tup_full_list_parts, reverse):
-            loop_enable = True
-            while loop_enable:
-                try:
-                    proxy_queue_iter.put(tup_key_loadpickle, timeout=1)
-                    loop_enable = False
-                except queue.Full:
-                    if _is_parent_process_killed():
-                        logging.debug("[GETTER PARENT KILLED (TERMINATE) -> ppid:{} | pid:{}]".format(os.getppid(),
-                                                                                                      os.getpid()))
-                        exit()
+        it_data = _iter_get_data_from_files(dict_ipid_tup_full_list_parts, **dict_read_args)
+        if batch_bytes is not None:
+            # Each batch is pickled once here and unpickled at once by the consumer
+            it_data = _iter_pickled_batches(it_data, batch_bytes)
+    else:
+        it_data = iter(())
+
+    if not is_ring:
+        # Mark of end in the queue (the end event can be set before the last elements are in the pipe of queue)
+        it_data = chain(it_data, [None])
 
-        logging.debug("[LOOP GETTER STOP -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+    for element in it_data:
+        loop_enable = True
+        while loop_enable:
+            try:
+                if is_ring:
+                    if not proxy_queue_iter.write_frame(element, wait=False):
+                        raise queue.Full
+                else:
+                    proxy_queue_iter.put(element, timeout=1)
+                loop_enable = False
+            except (queue.Full, BrokenPipeError):
+                if _is_parent_process_killed():
+                    logging.debug("[GETTER PARENT KILLED (TERMINATE) -> ppid:{} | pid:{}]".format(os.getppid(),
+                                                                                                  os.getpid()))
+                    exit()
+                if is_ring:
+                    time.sleep(0.001)
+
+    logging.debug("[LOOP GETTER STOP -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
 
     proxy_queue_iter.end()
     proxy_end_event_iter.set()
@@ -555,6 +2398,67 @@ def _read_process(proxy_queue_iter,
     logging.debug("[END GETTER -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
 
 
+def _materialize(dict_ipid_tup_full_list_parts,
+                 path_to_file_write,
+                 file_format,
+                 fun_prepline,
+                 buffering,
+                 dict_read_args):
+    """
+    Merge all sorted data and write it in one file.
+
+    :param dict_ipid_tup_full_list_parts: dict with information about temporal files (None if there is not data)
+    :param path_to_file_write: path to file where write
+    :param file_format: "lines" to write values as text lines or "pickle" to dump tuples key and value
+    :param fun_prepline: (only if file_format is "lines") function with args count and value to return a line
+    :param buffering: size in bytes of buffer to write in file
+    :param dict_read_args: dict with args to read data (args of _iter_get_data_from_files)
+    :return: number of elements written
+    """
+    if dict_ipid_tup_full_list_parts is None:
+        it_items = iter(())
+    else:
+        it_items = _iter_get_data_from_files(dict_ipid_tup_full_list_parts, **dict_read_args)
+
+    if file_format == "lines":
+        return write_iter_in_file(path_to_file_write,
+                                  (value for _, value in it_items),
+                                  fun_prepline=fun_prepline,
+                                  buffering=buffering)
+
+    count = 0
+    with open(path_to_file_write, "wb", buffering=buffering) as f:
+        for count, tup_key_value in enumerate(it_items, 1):
+            pickle.dump(tup_key_value, f, pickle.HIGHEST_PROTOCOL)
+    return count
+
+
+def _materialize_process(dict_ipid_tup_full_list_parts,
+                         path_to_file_write,
+                         file_format,
+                         fun_prepline,
+                         buffering,
+                         dict_read_args,
+                         proxy_dict_result,
+                         logging_level):
+    """
+    Process to merge all sorted data and write it in one file.
+
+    :param proxy_dict_result: dict where save the number of elements written in "count"
+    :return: None
+    """
+    logging.basicConfig(stream=sys.stderr, level=logging_level)
+
+    logging.debug("[START MATERIALIZE -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+    proxy_dict_result["count"] = _materialize(dict_ipid_tup_full_list_parts,
+                                              path_to_file_write,
+                                              file_format,
+                                              fun_prepline,
+                                              buffering,
+                                              dict_read_args)
+    logging.debug("[END MATERIALIZE -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+
+
 def create_tmp_folder(dir_tmp_path, ensure_different_dirs=False):
     """
     Helper to create a temporal folder
@@ -641,6 +2545,16 @@ class SortedInDisk(object):
                  iter_size_bucket_list=None,
                  iter_min_size_bucket_list=10,
                  iter_max_size_bucket_list=None,
+                 iter_transport="queue",
+                 iter_batch_bytes=64 * 1024,
+
+                 max_merge_fanin=None,
+                 mmap_values=False,
+                 prefetch_window=None,
+                 read_ahead_threads=None,
+                 parallel_read_processes=None,
+                 reduce=None,
+                 combine=None,
 
                  logging_level=logging.WARNING):
         """
@@ -705,7 +2619,34 @@ class SortedInDisk(object):
                                      Min == 1 and max == iter_max_size_bucket_list - 1. By default: 10
         :param iter_max_size_bucket_list: (only if sensor is enabled) max size bucket list. If None is infinite.
                                      By default: None
-        :param logging_level: Level of log. Only to debug or to remove psutil warning. By default: logging.WARNING
+        :param iter_transport: (only if read_process is True or with parallel_read_processes) "queue" to send sorted
+            data from read processes in a queue or "shared_memory" to send it in a ring buffer in shared memory
+            (Python >= 3.8). By default: "queue"
+        :param iter_batch_bytes: (only if read_process is True or with parallel_read_processes) size in bytes of each
+            batch of sorted data sent by a read process (tuples of each batch are pickled at once). If None, then
+            tuples are sent one by one in the queue. By default: 64 KB
+        :param max_merge_fanin: max number of pre-sorted files (runs) to read at same time. If the number of runs is
+            greater (after each save to disk in injection and before read), then groups of runs are merged in bigger
+            runs. Runs of each write process are merged apart, then with write processes (without partition_keys)
+            it must be greater or equal than the number of write processes. If None, then never merge.
+            By default: None
+        :param mmap_values: True to read values from files mapped in memory (without a seek and read per value).
+            By default: False
+        :param prefetch_window: number of keys to read ahead its values in order of positions in disk (forward
+            reads instead of random reads). If None, then each value is read when its key is returned.
+            By default: None
+        :param read_ahead_threads: number of threads to read ahead the next blocks of each pre-sorted file and the
+            values of the next keys while the current ones are merged (the merge hardly ever waits for the disk). If
+            None, then files are read when data is needed. By default: None
+        :param parallel_read_processes: number of processes to merge sorted data in parallel when read. Keys are
+            split in ranges (sampled from pre-sorted files) and each process merges one range; ranges are returned in
+            order. If None or 1, then it is not used. By default: None
+        :param reduce: function to fold values of each key used to read data saved with reduce if delete_previous is
+            False (save_and_sort methods replace it). If None, then data saved with reduce can not be read until
+            reduce is defined. By default: None
+        :param combine: function to combine folded values of different pre-sorted files (see reduce). If None, then
+            reduce is used. By default: None
+        :param logging_level: Level of log. Only to debug. By default: logging.WARNING
         """
         self.logging_level = logging_level
         logging.basicConfig(stream=sys.stderr, level=self.logging_level)
@@ -713,6 +2654,22 @@ class SortedInDisk(object):
         if sys.version_info[0] < 3:
             raise IOError("Solo compatible con Python >= 3")
 
+        if max_merge_fanin is not None and max_merge_fanin < 1:
+            raise ValueError("max_merge_fanin must be great than 0 or None")
+
+        if parallel_read_processes is not None and parallel_read_processes < 1:
+            raise ValueError("parallel_read_processes must be great than 0 or None")
+
+        if read_ahead_threads is not None and read_ahead_threads < 1:
+            raise ValueError("read_ahead_threads must be great than 0 or None")
+
+        if iter_transport not in ("queue", "shared_memory"):
+            raise ValueError("iter_transport={} not allowed, it must be 'queue' or 'shared_memory'".format(
+                iter_transport))
+
+        if iter_batch_bytes is not None and iter_batch_bytes < 1:
+            raise ValueError("iter_batch_bytes must be great than 0 or None")
+
         if delete_previous:
             self.dir_tmp_path = path_to_tmp_dir
             self.delete_tmp(remove_tmp_folder=True)
@@ -724,12 +2681,26 @@ class SortedInDisk(object):
         self.dict_num_procceses = dict()
         self.manager = multiprocessing.Manager()
         self.proxy_dict = None
+        self.proxy_dict_bytes_written = None
+        self.list_shared_rings = list()
+        self.dict_io_stats = {"bytes_written": 0, "bytes_read": 0, "compression": None}
 
         self.read_process = read_process
         self.iter_m_queue_max_size = iter_m_queue_max_size
         self.iter_size_bucket_list = iter_size_bucket_list
         self.iter_min_size_bucket_list = iter_min_size_bucket_list
         self.iter_max_size_bucket_list = iter_max_size_bucket_list
+        self.iter_transport = iter_transport
+        self.iter_batch_bytes = iter_batch_bytes
+
+        self.max_merge_fanin = max_merge_fanin
+        self.mmap_values = mmap_values
+        self.prefetch_window = prefetch_window
+        self.read_ahead_threads = read_ahead_threads
+        self.parallel_read_processes = parallel_read_processes
+
+        self.reduce = reduce
+        self.combine = combine
 
     def tmp_paths(self, include_tmp_folder=True):
         dict_info = self.get_dict_saved_info()
@@ -778,10 +2749,146 @@ class SortedInDisk(object):
                 "reverse": False,
                 "empty": True,
                 "multiprocessing": False,
+                "payload_runs": False,
+                "key_codec": None,
+                "compression": None,
+                "limit": None,
+                "unique": None,
+                "reduce": False,
+                "partition_keys": None,
                 "total_counter": 0,
+                "bytes_written": 0,
                 "directories": set()
             }
 
+    @staticmethod
+    def _set_dict_info_payload_runs(dict_info, payload_runs):
+        """
+        Set in dict_info if runs have values. Values of runs can not be mixed with positions of values in full data
+        file when data is appended.
+
+        :param dict_info: dict info to update
+        :param payload_runs: True if runs have values
+        :exception ValueError: raise if previous data have other layout of runs
+        :return: None
+        """
+        if not dict_info["empty"] and dict_info.get("payload_runs", False) != payload_runs:
+            raise ValueError("payload_runs={} but previous data was saved with payload_runs={}, "
+                             "both must be equal to append data".format(payload_runs,
+                                                                         dict_info.get("payload_runs", False)))
+        dict_info["payload_runs"] = payload_runs
+
+    @staticmethod
+    def _set_dict_info_key_codec(dict_info, key_codec):
+        """
+        Set in dict_info the codec of keys. Encoded keys can not be mixed with other keys when data is appended.
+
+        :param dict_info: dict info to update
+        :param key_codec: KeyCodec or None if keys are not encoded
+        :exception ValueError: raise if previous data have keys encoded in other way
+        :return: None
+        """
+        if not dict_info["empty"] and dict_info.get("key_codec") != key_codec:
+            raise ValueError("key_codec={} but previous data was saved with key_codec={}, "
+                             "both must be equal to append data".format(key_codec, dict_info.get("key_codec")))
+        dict_info["key_codec"] = key_codec
+
+    @staticmethod
+    def _set_dict_info_compression(dict_info, compression):
+        """
+        Set in dict_info the compression of files. Compressed files can not be mixed with other files when data is
+        appended.
+
+        :param dict_info: dict info to update
+        :param compression: compression of files or None if files are not compressed
+        :exception ValueError: raise if compression is not supported or previous data have other compression
+        :return: None
+        """
+        get_compression_codec(compression)
+        if not dict_info["empty"] and dict_info.get("compression") != compression:
+            raise ValueError("compression={} but previous data was saved with compression={}, "
+                             "both must be equal to append data".format(compression, dict_info.get("compression")))
+        dict_info["compression"] = compression
+
+    @staticmethod
+    def _set_dict_info_limit(dict_info, limit):
+        """
+        Set in dict_info the number of first sorted elements to keep. Data saved with a limit can not be mixed with
+        data saved with other limit (or without limit) when data is appended.
+
+        :param dict_info: dict info to update
+        :param limit: number of first elements to keep or None to keep all
+        :exception ValueError: raise if limit is lower than 1 or previous data have other limit
+        :return: None
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be great than 0 or None")
+        if not dict_info["empty"] and dict_info.get("limit") != limit:
+            raise ValueError("limit={} but previous data was saved with limit={}, "
+                             "both must be equal to append data".format(limit, dict_info.get("limit")))
+        dict_info["limit"] = limit
+
+    @staticmethod
+    def _set_dict_info_unique(dict_info, unique):
+        """
+        Set in dict_info the policy to keep one value per key. Data saved with unique values can not be mixed with
+        data saved with other policy when data is appended.
+
+        :param dict_info: dict info to update (limit must be set before)
+        :param unique: "first", "last", "any" or None to keep all values
+        :exception ValueError: raise if previous data have other policy or if limit is defined too
+        :return: None
+        """
+        if unique is not None and dict_info.get("limit") is not None:
+            raise ValueError("unique can not be used with limit")
+        if not dict_info["empty"] and dict_info.get("unique") != unique:
+            raise ValueError("unique={} but previous data was saved with unique={}, "
+                             "both must be equal to append data".format(unique, dict_info.get("unique")))
+        dict_info["unique"] = unique
+
+    @staticmethod
+    def _set_dict_info_reduce(dict_info, reduce, initial=None, combine=None):
+        """
+        Set in dict_info if values of each key are folded (functions are not saved, they are kept in this instance).
+        Folded data can not be mixed with data not folded when data is appended.
+
+        :param dict_info: dict info to update (limit and unique must be set before)
+        :param reduce: function to fold values of each key or None
+        :param initial: value to start the fold of each key or None
+        :param combine: function to combine folded values of different pre-sorted files or None (reduce is used)
+        :exception ValueError: raise if previous data were folded in other way, if limit or unique are defined too,
+            if initial or combine are defined without reduce or if initial is defined without combine
+        :return: None
+        """
+        is_reduce = reduce is not None
+        if not is_reduce and (initial is not None or combine is not None):
+            raise ValueError("initial and combine can only be used with reduce")
+        if initial is not None and combine is None:
+            raise ValueError("combine must be defined if initial is defined (initial starts the fold of each key in "
+                             "each pre-sorted file, then reduce can not combine folded values)")
+        if is_reduce and (dict_info.get("limit") is not None or dict_info.get("unique") is not None):
+            raise ValueError("reduce can not be used with limit or unique")
+        if not dict_info["empty"] and dict_info.get("reduce", False) != is_reduce:
+            raise ValueError("reduce={} but previous data was saved with reduce={}, "
+                             "both must be equal to append data".format(is_reduce, dict_info.get("reduce", False)))
+        dict_info["reduce"] = is_reduce
+
+    @staticmethod
+    def _set_dict_info_partition_keys(dict_info, partition_keys):
+        """
+        Set in dict_info the keys that split data of write processes in ranges. If data is appended with other
+        ranges (or without ranges), then ranges are removed (data of all write processes is merged together).
+
+        :param dict_info: dict info to update
+        :param partition_keys: list of keys in ascending order (encoded if keys are encoded) or None if write processes
+            have not ranges
+        :return: None
+        """
+        if dict_info["empty"] or dict_info.get("partition_keys") == partition_keys:
+            dict_info["partition_keys"] = partition_keys
+        else:
+            dict_info["partition_keys"] = None
+
     def set_dict_saved_info(self, dict_to_save):
         """
         Save in disk a new dict with general information.
@@ -805,7 +2912,15 @@ class SortedInDisk(object):
                            count_insert_to_check=1000000,
                            max_write_process_size=1024 * 1024 * 1024,
 
-                           ensure_space=False):
+                           ensure_space=False,
+                           payload_runs=False,
+                           key_codec=None,
+                           compression=None,
+                           limit=None,
+                           unique=False,
+                           reduce=None,
+                           initial=None,
+                           combine=None):
         """
         Consume an iterable to be sorted. Take analysis in this iterable and save to disk (in temporal files).
         Mono thread, this one execute in current thread.
@@ -816,13 +2931,32 @@ class SortedInDisk(object):
         :param func_value: function to extract the value of each value of it_values.
             If None is full value of it_values. By default: None
         :param reverse: True to reverse sort. By default: False
-        :param count_insert_to_check: counter to check if process have more size in memory than max_write_process_size.
+        :param count_insert_to_check: max number of values in cache of each process (see sorted_in_disk).
             By default: 1000000
-        :param max_write_process_size: max size in bytes to dump cache memory values to disk
-            (only execute when count_insert_to_check is reached). If None, then not import psutil and then only
-            check with count_insert_to_check. By default: 1024*1024*1024  # 1Gib
+        :param max_write_process_size: max estimated size in bytes of cache of each process (see sorted_in_disk).
+            By default: 1024*1024*1024  # 1Gib
         :param ensure_space: True to ensure disk space but is slowly. If not space then process launch warning message
             and wait for space. If False, then get and IOException if not enough space
+        :param payload_runs: True to save values with their keys in runs instead of positions of values in full
+            data file. By default: False
+        :param key_codec: KeyCodec to save keys encoded in bytes sorted as keys (keys are decoded when they are read).
+            If None, then keys are saved without encode. By default: None
+        :param compression: 'zlib', 'lzma', 'bz2' or object with compress and decompress methods to compress values
+            and runs in blocks. If None, then files are not compressed. By default: None
+        :param limit: number of first sorted elements to keep (bounded heap in each write process, only these
+            elements are saved in disk and read). If None, then all elements are kept. By default: None
+        :param unique: True or 'first' to keep only the first injected value of each key, 'last' to keep the last one
+            or 'any' to keep any (duplicates are dropped before write their values in disk and in merges; first and
+            last are per write process). If False, then all values are kept. By default: False
+        :param reduce: function with args accumulated value and value to fold all values of each key in one value
+            (it must be associative; values are folded in cache before write them in disk and again in merges). If
+            None, then all values are kept. By default: None
+        :param initial: (only if reduce is defined) value to start the fold of each key (it is copied for each key in
+            each pre-sorted file, then it must be neutral for combine, as 0 to add or [] to concatenate). If None,
+            then the fold starts from the first value of each key. By default: None
+        :param combine: (only if reduce is defined) function with args two folded values of the same key to combine
+            folded values of different pre-sorted files (it must be associative). It is required if initial is
+            defined or if reduce returns a type different of values. If None, then reduce is used. By default: None
         :return: self
         """
         if func_key is None:
@@ -837,98 +2971,54 @@ class SortedInDisk(object):
 
             func_value = func_value_default
 
-        get_process_memory = _get_func_process_memory(max_write_process_size is not None)
-
         dict_info = self.get_dict_saved_info()
+        self._set_dict_info_payload_runs(dict_info, payload_runs)
+        self._set_dict_info_key_codec(dict_info, key_codec)
+        self._set_dict_info_compression(dict_info, compression)
+        unique = _get_unique_policy(unique)
+        self._set_dict_info_limit(dict_info, limit)
+        self._set_dict_info_unique(dict_info, unique)
+        self._set_dict_info_reduce(dict_info, reduce, initial, combine)
+        self.reduce = reduce
+        self.combine = combine
+        self._set_dict_info_partition_keys(dict_info, None)
 
-        def sort_cache_and_save(key_file, dict_to_save, reverse):
-            if dict_to_save:
-                def gen_key_value_sorted(dict_to_save, reverse):
-                    # When it is sorted, it assign each key to his value
-                    for key in sorted(dict_to_save.keys(), reverse=reverse):
-                        yield key, dict_to_save[key]
-
-                mpath_to_keys_sorted = Path(self.dir_tmp_path, "keys_sorted_{}.db".format(key_file))
-                quick_dump_items(mpath_to_keys_sorted, gen_key_value_sorted(dict_to_save, reverse))
-
-                del dict_to_save
-
-                return mpath_to_keys_sorted
-
-            return None
-
-        list_paths_to_keys_sorted = list()
-
-        def evt_err_space_dump(_, time_to_retry, err):
-            logging.error("[NOT SPACE ON DEVICE (WAITING TO CONTINUE {} SECONDS) -> "
-                          "ppid:{} | pid:{}]: {}".format(time_to_retry,
-                                                         os.getppid(),
-                                                         os.getpid(), err))
-
-        path_full_data = Path(self.dir_tmp_path, "full_data.db")
-        with EasyBinaryFile(path_full_data, mode='ab') as f_full_data_open:
-            dict_keysortable_fpositions = {}
-
-            if dict_info["dict_ipid_tup_full_list_parts"] is None:
-                count_key_file = 0
-            else:
-                count_key_file = dict_info["dict_ipid_tup_full_list_parts"][-1][2]
-
-            cache_bulk_counter = 0
-            total_bulk_counter = 0
+        if dict_info["dict_ipid_tup_full_list_parts"] is None:
+            count_key_file = 0
+        else:
+            count_key_file = dict_info["dict_ipid_tup_full_list_parts"][-1][2]
 
-            dict_info["reverse"] = reverse
-            dict_info["empty"] = False
-            dict_info["multiprocessing"] = False
-            dict_info["directories"].add(self.dir_tmp_path)
+        dict_info["reverse"] = reverse
+        dict_info["empty"] = False
+        dict_info["multiprocessing"] = False
+        dict_info["directories"].add(self.dir_tmp_path)
 
+        writer = _SortedRunsWriter(self.dir_tmp_path,
+                                   -1,
+                                   count_key_file,
+                                   reverse=reverse,
+                                   count_insert_to_check=count_insert_to_check,
+                                   max_write_process_size=max_write_process_size,
+                                   ensure_space=ensure_space,
+                                   max_merge_fanin=self.max_merge_fanin,
+                                   payload_runs=payload_runs,
+                                   key_codec=key_codec,
+                                   compression=compression,
+                                   limit=limit,
+                                   unique=unique,
+                                   reduce=reduce,
+                                   initial=initial)
+        with writer:
             for value in it_values:
-                mkey = func_key(value)
-                value = func_value(value)
+                writer.add(func_key(value), func_value(value))
 
-                start_cursor_pos = f_full_data_open.get_cursor_position()
+        dict_info["bytes_written"] = dict_info.get("bytes_written", 0) + writer.get_bytes_written()
 
-                if ensure_space:
-                    f_full_data_open.dump(value)
-                else:
-                    f_full_data_open.dump_ensure_space(value, fun_err_space=evt_err_space_dump)
+        path_full_data, \
+            list_paths_to_keys_sorted, \
+            next_id_path_to_keys_sorted, \
+            total_bulk_counter = writer.get_tup_full_list_parts()
 
-                try:
-                    fpositions = dict_keysortable_fpositions[mkey]
-                    fpositions.append(start_cursor_pos)
-                    dict_keysortable_fpositions[mkey] = fpositions
-                except KeyError:
-                    dict_keysortable_fpositions[mkey] = [start_cursor_pos]
-
-                cache_bulk_counter += 1
-                if count_insert_to_check is not None \
-                        and count_insert_to_check < cache_bulk_counter:
-                    process_memory = get_process_memory()
-                    total_bulk_counter += cache_bulk_counter
-                    cache_bulk_counter = 0
-                    logging.debug("[MEMORY CHECK -> ppid:{} | pid:{}]: mem<{}>, els<{}>".format(os.getppid(),
-                                                                                                os.getpid(),
-                                                                                                process_memory,
-                                                                                                total_bulk_counter))
-
-                    if process_memory == -1 or max_write_process_size < process_memory:
-                        # If process have more size than limit, then cache is saved to disk and set cache to empty
-                        count_key_file += 1
-                        logging.debug("[SAVING MEMORY -> ppid:{} | pid:{}]: key<{}>".format(os.getppid(),
-                                                                                            os.getpid(),
-                                                                                            count_key_file))
-                        path_to_keys_sorted = sort_cache_and_save(count_key_file, dict_keysortable_fpositions, reverse)
-                        if path_to_keys_sorted is not None:
-                            list_paths_to_keys_sorted.append(path_to_keys_sorted)
-                        dict_keysortable_fpositions = {}
-
-            total_bulk_counter += cache_bulk_counter
-
-        path_to_keys_sorted = sort_cache_and_save(count_key_file + 1, dict_keysortable_fpositions, reverse)
-        if path_to_keys_sorted is not None:
-            list_paths_to_keys_sorted.append(path_to_keys_sorted)
-
-        next_id_path_to_keys_sorted = count_key_file + 1
         if dict_info["dict_ipid_tup_full_list_parts"] is None:
             new_total_bulk_counter = total_bulk_counter
             dict_info["dict_ipid_tup_full_list_parts"] = {-1: (path_full_data,
@@ -956,26 +3046,44 @@ class SortedInDisk(object):
         """
         return self.values()
 
-    def items(self):
+    def items(self, start=None, stop=None):
         """
         Get a sorted iterable from disk to return sorted tuples of key and line, in each petition this get one sorted
         tuple.
 
+        With start or stop only keys in this range are returned. Each pre-sorted file is read from the block of start
+        (with its index) and the merge ends in stop, then a narrow range costs the size of the result instead of the
+        size of all data.
+
+        >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF", "valD|key4|valG"]
+        >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1], only_one_read=False)
+        >>> list(sid.items(start="key2", stop="key4"))
+        [('key2', 'valC|key2|valF'), ('key3', 'valA|key3|valD')]
+        >>> sid.clear()
+
         Note: If you consume full iterable then and delete_to_end is False, then you can to iterate more than one
         time and you need to delete temporal files by hand with clean.
 
         Note: This is a wrapper of iter_with_key().
 
+        :param start: first key to return (included; with reverse sort, it is the greatest key). If None, then from
+            first key. By default: None
+        :param stop: key to stop (excluded). If None, then to last key. By default: None
         :return: Sorted iterable of tuples key and value
         """
-        return self.iter_with_key(delete_to_end=self.delete_to_end,
+        return self.iter_with_key(start=start,
+                                  stop=stop,
+                                  delete_to_end=self.delete_to_end,
                                   enable_multiprocessing=self.read_process,
                                   queue_max_size=self.iter_m_queue_max_size,
                                   size_bucket_list=self.iter_size_bucket_list,
                                   min_size_bucket_list=self.iter_min_size_bucket_list,
-                                  max_size_bucket_list=self.iter_max_size_bucket_list)
+                                  max_size_bucket_list=self.iter_max_size_bucket_list,
+                                  parallel_read_processes=self.parallel_read_processes,
+                                  transport=self.iter_transport,
+                                  batch_bytes=self.iter_batch_bytes)
 
-    def values(self):
+    def values(self, start=None, stop=None):
         """
         Get a sorted iterable from disk to return sorted lines, in each petition this get one sorted line.
 
@@ -984,16 +3092,18 @@ class SortedInDisk(object):
 
         Note: This is a wrapper of items().
 
+        :param start: first key to return its value (included). If None, then from first key. By default: None
+        :param stop: key to stop (excluded). If None, then to last key. By default: None
         :return: Sorted iterable of values
         """
 
         def _iter_values(_self):
-            for _, value in _self.items():
+            for _, value in _self.items(start, stop):
                 yield value
 
         return _iter_values(self)
 
-    def keys(self):
+    def keys(self, start=None, stop=None):
         """
         Get a sorted iterable from disk to return sorted keys of lines, in each petition this get one sorted key.
 
@@ -1002,29 +3112,111 @@ class SortedInDisk(object):
 
         Note: This is a wrapper of items().
 
+        :param start: first key to return (included). If None, then from first key. By default: None
+        :param stop: key to stop (excluded). If None, then to last key. By default: None
         :return: Sorted iterable of keys sorted
         """
 
         def _iter_keys(_self):
-            for key, _ in _self.items():
+            for key, _ in _self.items(start, stop):
                 yield key
 
         return _iter_keys(self)
 
-    def join_multiprocess(self):
+    def groups(self, start=None, stop=None):
         """
-        Wait to end of all processes.
+        Get a sorted iterable from disk to return one tuple per key with a group of its values. The merge knows the
+        positions of values of each key, then the number of values of the group is known without read them (len of
+        group) and values are read only if the group is iterated (without compare keys again as itertools.groupby).
 
-        This call is necessary if multiprocess is enable,
-        because ensure end of all processes and need to update dict_info
+        >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key3|valF"]
+        >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1])
+        >>> [(key, len(group), list(group)) for key, group in sid.groups()]
+        [('key1', 1, ['valB|key1|valE']), ('key3', 2, ['valA|key3|valD', 'valC|key3|valF'])]
 
-        :return: dict of updated dict_info
+        Note: values of each group can be read until the end of the iteration (then files are closed). Groups are
+        always read in this process (read_process and parallel_read_processes are not used).
+
+        Note: This is a wrapper of iter_with_key().
+
+        :param start: first key to return (included). If None, then from first key. By default: None
+        :param stop: key to stop (excluded). If None, then to last key. By default: None
+        :return: Sorted iterable of tuples key and group of values (iterable with len)
+        """
+        return self.iter_with_key(start=start,
+                                  stop=stop,
+                                  delete_to_end=self.delete_to_end,
+                                  groups=True)
+
+    def iter_batches(self, batch_size, start=None, stop=None):
+        """
+        Get a sorted iterable from disk to return lists of sorted tuples of key and line (batch_size tuples in each
+        list, the last one can be smaller). Batches are built in the merge (in the read process if read_process is
+        True, then each batch is one element of queue), then consumers that process in chunks (for example bulk loads
+        to a data base) avoid the generators of each tuple.
+
+        >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF"]
+        >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1])
+        >>> list(sid.iter_batches(2))
+        [[('key1', 'valB|key1|valE'), ('key2', 'valC|key2|valF')], [('key3', 'valA|key3|valD')]]
+
+        Note: This is a wrapper of iter_with_key().
+
+        :param batch_size: number of tuples of each list
+        :param start: first key to return (included). If None, then from first key. By default: None
+        :param stop: key to stop (excluded). If None, then to last key. By default: None
+        :return: Sorted iterable of lists of tuples key and value
+        """
+        return self.iter_with_key(start=start,
+                                  stop=stop,
+                                  delete_to_end=self.delete_to_end,
+                                  enable_multiprocessing=self.read_process,
+                                  queue_max_size=self.iter_m_queue_max_size,
+                                  size_bucket_list=self.iter_size_bucket_list,
+                                  min_size_bucket_list=self.iter_min_size_bucket_list,
+                                  max_size_bucket_list=self.iter_max_size_bucket_list,
+                                  parallel_read_processes=self.parallel_read_processes,
+                                  transport=self.iter_transport,
+                                  batch_bytes=self.iter_batch_bytes,
+                                  batch_size=batch_size)
+
+    def _terminate_write_processes(self):
+        """
+        Terminate write processes and release their rings without update dict_info (data sent is discarded).
+
+        :return: None
         """
         for p in self.dict_num_procceses.values():
+            p.terminate()
             p.join()
 
         self.dict_num_procceses = dict()
 
+        for ring in self.list_shared_rings:
+            ring.unlink()
+        self.list_shared_rings = list()
+
+        self.proxy_dict = None
+        self.proxy_dict_bytes_written = None
+
+    def join_multiprocess(self):
+        """
+        Wait to end of all processes.
+
+        This call is necessary if multiprocess is enable,
+        because ensure end of all processes and need to update dict_info
+
+        :return: dict of updated dict_info
+        """
+        for p in self.dict_num_procceses.values():
+            p.join()
+
+        self.dict_num_procceses = dict()
+
+        for ring in self.list_shared_rings:
+            ring.unlink()
+        self.list_shared_rings = list()
+
         dict_info = self.get_dict_saved_info()
 
         if self.proxy_dict is None:
@@ -1032,24 +3224,28 @@ class SortedInDisk(object):
         else:
             proxy_dict = dict(self.proxy_dict)
             self.proxy_dict = None
+            bytes_written = sum(self.proxy_dict_bytes_written.values())
+            self.proxy_dict_bytes_written = None
 
             total_counter = dict_info["total_counter"]
+            # Previous data of write processes without new data is kept
+            dict_ipid_tup_full_list_parts = dict_info["dict_ipid_tup_full_list_parts"] or dict()
             for ipid in proxy_dict.keys():
                 total_counter += proxy_dict[ipid][3]
 
-                if dict_info["dict_ipid_tup_full_list_parts"]:
-                    try:
-                        prev_list_paths_keys_sorted = dict_info["dict_ipid_tup_full_list_parts"][ipid][1]
-                        prev_total_bulk_counter = dict_info["dict_ipid_tup_full_list_parts"][ipid][3]
-                        proxy_dict[ipid] = (proxy_dict[ipid][0],
-                                            prev_list_paths_keys_sorted + proxy_dict[ipid][1],
-                                            proxy_dict[ipid][2],
-                                            prev_total_bulk_counter + proxy_dict[ipid][3])
-                    except KeyError:
-                        pass
-
-            dict_info["dict_ipid_tup_full_list_parts"] = proxy_dict
+                try:
+                    prev_list_paths_keys_sorted = dict_ipid_tup_full_list_parts[ipid][1]
+                    prev_total_bulk_counter = dict_ipid_tup_full_list_parts[ipid][3]
+                    dict_ipid_tup_full_list_parts[ipid] = (proxy_dict[ipid][0],
+                                                           prev_list_paths_keys_sorted + proxy_dict[ipid][1],
+                                                           proxy_dict[ipid][2],
+                                                           prev_total_bulk_counter + proxy_dict[ipid][3])
+                except KeyError:
+                    dict_ipid_tup_full_list_parts[ipid] = proxy_dict[ipid]
+
+            dict_info["dict_ipid_tup_full_list_parts"] = dict_ipid_tup_full_list_parts
             dict_info["total_counter"] = total_counter
+            dict_info["bytes_written"] = dict_info.get("bytes_written", 0) + bytes_written
 
             self.set_dict_saved_info(dict_info)
 
@@ -1057,6 +3253,129 @@ class SortedInDisk(object):
 
             return dict_info
 
+    def merge_runs(self, max_merge_fanin=None):
+        """
+        Merge groups of pre-sorted files (runs) in bigger runs until have no more than max_merge_fanin runs to read at
+        same time. Runs of each write process are merged apart (each one point to its own full data file), then each
+        write process has max_merge_fanin divided by number of write processes. If write processes have ranges of
+        keys (partition_keys), then each one is read apart and each one has max_merge_fanin.
+
+        Note: If max_merge_fanin is lower than number of write processes (without partition_keys), then each write
+        process keeps one run (more runs than max_merge_fanin) and a warning is logged (save methods raise a
+        ValueError in this case).
+
+        Note: It is called before read if max_merge_fanin is defined in the instance.
+
+        :param max_merge_fanin: max number of runs. If None, then it is the max_merge_fanin of instance.
+            By default: None
+        :return: dict of updated dict_info
+        """
+        max_merge_fanin = self.max_merge_fanin if max_merge_fanin is None else max_merge_fanin
+
+        dict_info = self.get_dict_saved_info()
+        if dict_info["multiprocessing"]:
+            gc.collect()
+            dict_info = self.join_multiprocess()
+
+        dict_ipid_tup_full_list_parts = dict_info["dict_ipid_tup_full_list_parts"]
+        if dict_info["empty"] or max_merge_fanin is None or dict_ipid_tup_full_list_parts is None:
+            return dict_info
+
+        if dict_info.get("partition_keys") is not None:
+            # Each write process has its own range of keys and it is read apart
+            num_runs = max(len(tup[1]) for tup in dict_ipid_tup_full_list_parts.values())
+            max_merge_fanin_per_process = max_merge_fanin
+        else:
+            num_runs = sum(len(tup[1]) for tup in dict_ipid_tup_full_list_parts.values())
+            if max_merge_fanin < len(dict_ipid_tup_full_list_parts):
+                logging.warning("[ROOT MERGING RUNS -> ppid:{} | pid:{}]: max_merge_fanin={} is lower than the number "
+                                "of write processes ({}), then one run of each one is read".format(
+                                    os.getppid(), os.getpid(), max_merge_fanin, len(dict_ipid_tup_full_list_parts)))
+            max_merge_fanin_per_process = max(1, max_merge_fanin // len(dict_ipid_tup_full_list_parts))
+
+        if num_runs <= max_merge_fanin:
+            return dict_info
+
+        logging.debug("[ROOT MERGING RUNS -> ppid:{} | pid:{}]: runs<{}>".format(os.getppid(), os.getpid(), num_runs))
+
+        list_bytes_written = list()
+
+        for ipid, tup in dict_ipid_tup_full_list_parts.items():
+            path_full_data, list_paths_to_keys_sorted, next_id_path_to_keys_sorted, total_bulk_counter = tup
+            list_next_id = [next_id_path_to_keys_sorted]
+
+            def get_new_path_to_keys_sorted():
+                list_next_id[0] += 1
+                return _get_path_to_keys_sorted(path_full_data.parent, ipid, list_next_id[0])
+
+            list_paths_to_keys_sorted = _cascade_merge_runs(list_paths_to_keys_sorted,
+                                                            max_merge_fanin_per_process,
+                                                            get_new_path_to_keys_sorted,
+                                                            dict_info["reverse"],
+                                                            dict_info.get("compression"),
+                                                            list_bytes_written,
+                                                            dict_info.get("unique"))
+            dict_ipid_tup_full_list_parts[ipid] = (path_full_data,
+                                                   list_paths_to_keys_sorted,
+                                                   list_next_id[0],
+                                                   total_bulk_counter)
+
+        dict_info["bytes_written"] = dict_info.get("bytes_written", 0) + sum(list_bytes_written)
+        self.set_dict_saved_info(dict_info)
+
+        return dict_info
+
+    def _check_max_merge_fanin(self, num_processes):
+        """
+        Check if runs of write processes can be merged up to max_merge_fanin of instance. Runs of each write process
+        are merged apart (each one point to its own full data file), then each write process keeps one run at least.
+
+        :param num_processes: number of write processes (without ranges of keys)
+        :exception ValueError: raise if max_merge_fanin is lower than number of write processes
+        :return: None
+        """
+        if self.max_merge_fanin is not None and self.max_merge_fanin < num_processes:
+            raise ValueError("max_merge_fanin={} must be great or equal than the number of write processes ({}), "
+                             "because runs of each write process are merged apart "
+                             "(or use partition_keys)".format(self.max_merge_fanin, num_processes))
+
+    def _get_list_processes_paths(self, write_processes):
+        """
+        Get the path of directory of each write process.
+
+        :param write_processes: number of processes (None is number of CPUs) or list of paths (one per process)
+        :exception ValueError: raise if number of processes is lower than 1
+        :exception TypeError: raise if type of write_processes is not allowed
+        :return: list of paths of directories (one per process)
+        """
+        write_processes = multiprocessing.cpu_count() if write_processes is None else write_processes
+        if isinstance(write_processes, list):
+            list_processes_paths = write_processes
+            list_processes_paths = [create_tmp_folder(process_path) for process_path in list_processes_paths]
+        elif isinstance(write_processes, int):
+            if write_processes < 1:
+                raise ValueError("write_processes must be great than 0 or None")
+            list_processes_paths = [self.dir_tmp_path] * write_processes
+        else:
+            raise TypeError("Type object not allowed for write_processes")
+        return list_processes_paths
+
+    @staticmethod
+    def _get_next_id_path_to_keys_sorted(dict_info, ipid):
+        """
+        Get next id of files of keys sorted of a write process (to append data to previous data of this process).
+
+        :param dict_info: dict info of data saved
+        :param ipid: id of write process
+        :return: next id of files of keys sorted
+        """
+        if dict_info["dict_ipid_tup_full_list_parts"] is None:
+            return 0
+        try:
+            return dict_info["dict_ipid_tup_full_list_parts"][ipid][2]
+        except KeyError:
+            return 0
+
     def save_and_sort_multiprocess(self,
                                    it_values,
                                    func_key=None,
@@ -1070,6 +3389,19 @@ class SortedInDisk(object):
                                    queue_max_size=1000,
 
                                    ensure_space=False,
+                                   payload_runs=False,
+                                   key_codec=None,
+                                   compression=None,
+                                   limit=None,
+                                   unique=False,
+                                   reduce=None,
+                                   initial=None,
+                                   combine=None,
+                                   partition_keys=None,
+                                   partition_sample_size=None,
+                                   extract_in_write_processes=False,
+                                   transport="queue",
+                                   ring_size=16 * 1024 * 1024,
 
                                    size_bucket_list=None,
                                    min_size_bucket_list=10,
@@ -1084,11 +3416,10 @@ class SortedInDisk(object):
         :param func_value: function to extract the value of each value of it_values.
             If None is full value of it_values. By default: None
         :param reverse: True to reverse sort. By default: False
-        :param count_insert_to_check: counter to check if process have more size in memory than max_write_process_size.
+        :param count_insert_to_check: max number of values in cache of each process (see sorted_in_disk).
             By default: 1000000
-        :param max_write_process_size: max size in bytes to dump cache memory values to disk
-            (only execute when count_insert_to_check is reached). If None, then not import psutil and then only
-            check with count_insert_to_check. By default: 1024*1024*1024  # 1Gib
+        :param max_write_process_size: max estimated size in bytes of cache of each process (see sorted_in_disk).
+            By default: 1024*1024*1024  # 1Gib
         :param write_processes: number of process to execute. If None then it is number of CPUs. If you pass one list
                      with paths pointing to folders, then each path implements one process (each process save data in
                      its own path; you can use one path to several processes if you define same path several times in
@@ -1097,6 +3428,42 @@ class SortedInDisk(object):
         :param queue_max_size: max number of elements in queue. If None then is the max by default. By default: 1000
         :param ensure_space: True to ensure disk space but is slowly. If not space then process launch warning message
             and wait for space. If False, then get and IOException if not enough space
+        :param payload_runs: True to save values with their keys in runs instead of positions of values in full
+            data file. By default: False
+        :param key_codec: KeyCodec to save keys encoded in bytes sorted as keys (keys are decoded when they are read).
+            If None, then keys are saved without encode. By default: None
+        :param compression: 'zlib', 'lzma', 'bz2' or object with compress and decompress methods to compress values
+            and runs in blocks. If None, then files are not compressed. By default: None
+        :param limit: number of first sorted elements to keep (bounded heap in each write process, only these
+            elements are saved in disk and read). If None, then all elements are kept. By default: None
+        :param unique: True or 'first' to keep only the first injected value of each key, 'last' to keep the last one
+            or 'any' to keep any (duplicates are dropped before write their values in disk and in merges; first and
+            last are per write process). If False, then all values are kept. By default: False
+        :param reduce: function with args accumulated value and value to fold all values of each key in one value
+            (it must be associative; values are folded in cache before write them in disk and again in merges). If
+            None, then all values are kept. By default: None
+        :param initial: (only if reduce is defined) value to start the fold of each key (it is copied for each key in
+            each pre-sorted file, then it must be neutral for combine, as 0 to add or [] to concatenate). If None,
+            then the fold starts from the first value of each key. By default: None
+        :param combine: (only if reduce is defined) function with args two folded values of the same key to combine
+            folded values of different pre-sorted files (it must be associative). It is required if initial is
+            defined or if reduce returns a type different of values. If None, then reduce is used. By default: None
+        :param partition_keys: (only multiprocess) list of keys to split keys in ranges (each key is the first key
+            of one range, except the first range), then each write process receives only one range and runs of each
+            range are read apart (ranges are concatenated). With key_codec, ranges are split in order of encoded keys.
+            It must have less keys than write processes. If None, then all write processes receive any key.
+            By default: None
+        :param partition_sample_size: (only multiprocess and if partition_keys is None) number of first elements of
+            it_values to sample keys to calculate partition_keys. If None, then not sample. By default: None
+        :param extract_in_write_processes: (only multiprocess) True to send elements of it_values to write processes
+            and extract there keys and values with func_key and func_value (this process only reads it_values). With
+            partition_keys, keys are extracted in this process to choose the write process. Functions must be
+            picklable if processes are not started with fork. By default: False
+        :param transport: (only multiprocess) "queue" to send elements to write processes with QQueue or
+            "shared_memory" to send batches of elements pickled (size_bucket_list elements, 1000 if it is None) in a
+            ring buffer in shared memory of each write process (without pipe). By default: "queue"
+        :param ring_size: (only if transport is "shared_memory") size in bytes of ring of each write process (a
+            bigger batch pickled is written in parts). By default: 16 MB
         :param size_bucket_list: None to enable sensor size bucket list (require maxsize>0). If a number is defined
                                  here then use this number to size_bucket_list and disable sensor. If maxsize<=0
                                  and size_bucket_list==None then size_bucket_list is default to 1000; other wise,
@@ -1105,10 +3472,24 @@ class SortedInDisk(object):
                                      Min == 1 and max == max_size_bucket_list - 1. By default: 10
         :param max_size_bucket_list: (only if sensor is enabled) max size bucket list. If None is infinite.
                                      By default: None
+        :exception ValueError: raise if max_merge_fanin is lower than the number of write processes without
+            partition_keys
         :return: self
         """
         logging.debug("[ROOT START -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
 
+        if transport not in ("queue", "shared_memory"):
+            raise ValueError("transport={} not allowed, it must be 'queue' or 'shared_memory'".format(transport))
+
+        if extract_in_write_processes:
+            _check_picklable_functions({"key": func_key, "value": func_value})
+            # Functions to send to write processes (identity function of this module is picklable)
+            func_key_process = func_key or _get_element
+            func_value_process = func_value or _get_element
+        else:
+            func_key_process = None
+            func_value_process = None
+
         if func_key is None:
             def func_key_default(key):
                 return key
@@ -1121,34 +3502,85 @@ class SortedInDisk(object):
 
             func_value = func_value_default
 
+        list_processes_paths = self._get_list_processes_paths(write_processes)
+
+        if partition_keys is not None and key_codec is not None:
+            # Write processes sort encoded keys, then ranges are split in order of encoded keys
+            partition_keys = [key_codec.encode(key) for key in partition_keys]
+        elif partition_keys is None and partition_sample_size is not None:
+            it_values = iter(it_values)
+            list_sample_values = list(islice(it_values, partition_sample_size))
+            it_values = chain(list_sample_values, it_values)
+            if list_sample_values:
+                list_sample_keys = [func_key(v) for v in list_sample_values]
+                if key_codec is not None:
+                    list_sample_keys = [key_codec.encode(key) for key in list_sample_keys]
+                partition_keys = _get_quantile_keys(sorted(list_sample_keys), len(list_processes_paths))
+                del list_sample_keys
+            del list_sample_values
+
+        if partition_keys is not None:
+            partition_keys = sorted(partition_keys)
+            if len(partition_keys) >= len(list_processes_paths):
+                raise ValueError("partition_keys must have less keys than write processes")
+            # Keys are extracted in this process to choose the write process
+            func_key_process = None
+        else:
+            self._check_max_merge_fanin(len(list_processes_paths))
+
         dict_info = self.get_dict_saved_info()
+        # It is saved again if the injection fails (data of previous injections is kept)
+        prev_dict_info = copy.deepcopy(dict_info)
+        self._set_dict_info_payload_runs(dict_info, payload_runs)
+        self._set_dict_info_key_codec(dict_info, key_codec)
+        self._set_dict_info_compression(dict_info, compression)
+        unique = _get_unique_policy(unique)
+        self._set_dict_info_limit(dict_info, limit)
+        self._set_dict_info_unique(dict_info, unique)
+        self._set_dict_info_reduce(dict_info, reduce, initial, combine)
+        self.reduce = reduce
+        self.combine = combine
+        self._set_dict_info_partition_keys(dict_info, partition_keys)
 
         dict_info["reverse"] = reverse
         dict_info["empty"] = False
         dict_info["multiprocessing"] = True
         dict_info["directories"].add(self.dir_tmp_path)
-
-        write_processes = multiprocessing.cpu_count() if write_processes is None else write_processes
-        if isinstance(write_processes, list):
-            list_processes_paths = write_processes
-            list_processes_paths = [create_tmp_folder(process_path) for process_path in list_processes_paths]
-            dict_info["directories"] |= set(list_processes_paths)
-        elif isinstance(write_processes, int):
-            if write_processes < 1:
-                raise ValueError("write_processes must be great than 0 or None")
-            list_processes_paths = [self.dir_tmp_path] * write_processes
-        else:
-            raise TypeError("Type object not allowed for write_processes")
+        dict_info["directories"] |= set(list_processes_paths)
 
         self.set_dict_saved_info(dict_info)
 
-        proxy_queue = QQueue(queue_max_size,
-                             size_bucket_list=size_bucket_list,
-                             min_size_bucket_list=min_size_bucket_list,
-                             max_size_bucket_list=max_size_bucket_list,
-                             logging_level=self.logging_level)
+        if transport == "shared_memory":
+            # Each write process has its own ring (one producer and one consumer per ring)
+            list_process_queues = [SharedMemoryRing(ring_size,
+                                                    batch_size=1000 if size_bucket_list is None else size_bucket_list)
+                                   for _ in list_processes_paths]
+            if partition_keys is None:
+                list_proxy_queues = [SharedMemoryRingDispatcher(list_process_queues)] * len(list_processes_paths)
+            else:
+                list_proxy_queues = list_process_queues
+        elif partition_keys is None:
+            list_proxy_queues = [QQueue(queue_max_size,
+                                        size_bucket_list=size_bucket_list,
+                                        min_size_bucket_list=min_size_bucket_list,
+                                        max_size_bucket_list=max_size_bucket_list,
+                                        logging_level=self.logging_level)] * len(list_processes_paths)
+        else:
+            # Each write process has its own queue to receive only its range of keys
+            list_proxy_queues = [QQueue(queue_max_size,
+                                        size_bucket_list=size_bucket_list,
+                                        min_size_bucket_list=min_size_bucket_list,
+                                        max_size_bucket_list=max_size_bucket_list,
+                                        logging_level=self.logging_level)
+                                 for _ in list_processes_paths]
+
+        if transport != "shared_memory":
+            list_process_queues = list_proxy_queues
 
         self.join_multiprocess()
+        if transport == "shared_memory":
+            # Rings are released when write processes end (in join_multiprocess)
+            self.list_shared_rings = list_process_queues
 
         proxy_end_event = multiprocessing.Event()
         proxy_end_event.clear()
@@ -1159,24 +3591,27 @@ class SortedInDisk(object):
         logging.debug("[ROOT INITIALIZE CHILDS -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
 
         self.proxy_dict = self.manager.dict()
+        self.proxy_dict_bytes_written = self.manager.dict()
+
+        if self.max_merge_fanin is None:
+            max_merge_fanin_per_process = None
+        elif dict_info["partition_keys"] is not None:
+            max_merge_fanin_per_process = self.max_merge_fanin
+        else:
+            max_merge_fanin_per_process = max(1, self.max_merge_fanin // len(list_processes_paths))
 
         for procesnum, process_path in enumerate(list_processes_paths, 0):
-            if dict_info["dict_ipid_tup_full_list_parts"] is None:
-                next_id_path_to_keys_sorted = 0
-            else:
-                try:
-                    next_id_path_to_keys_sorted = dict_info["dict_ipid_tup_full_list_parts"][procesnum][2]
-                except KeyError:
-                    next_id_path_to_keys_sorted = 0
+            next_id_path_to_keys_sorted = self._get_next_id_path_to_keys_sorted(dict_info, procesnum)
 
             process = multiprocessing.Process(target=_write_process,
-                                              args=(proxy_queue,
+                                              args=(list_process_queues[procesnum],
                                                     proxy_start_event,
                                                     proxy_end_event,
                                                     procesnum,
 
                                                     process_path,
                                                     self.proxy_dict,
+                                                    self.proxy_dict_bytes_written,
 
                                                     count_insert_to_check,
                                                     max_write_process_size,
@@ -1184,9 +3619,22 @@ class SortedInDisk(object):
                                                     next_id_path_to_keys_sorted,
 
                                                     ensure_space,
+                                                    max_merge_fanin_per_process,
+                                                    payload_runs,
+                                                    key_codec,
+                                                    compression,
+                                                    limit,
+                                                    unique,
+                                                    reduce,
+                                                    initial,
+                                                    func_key_process,
+                                                    func_value_process,
                                                     self.logging_level))
             process.daemon = True
             process.start()
+            if transport == "shared_memory":
+                # A dead write process never frees space in its ring, then the writer raises instead of wait
+                list_process_queues[procesnum].set_fun_is_consumer_alive(process.is_alive)
             self.dict_num_procceses[procesnum] = process
 
         logging.debug("[ROOT START DATA ITERATION -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
@@ -1194,18 +3642,40 @@ class SortedInDisk(object):
         gc.collect()
         proxy_start_event.set()
 
-        if func_key is None and func_value is None:
-            proxy_queue.put_iterable(((v, v) for v in it_values))
-        elif func_value is None:
-            proxy_queue.put_iterable(((func_key(v), v) for v in it_values))
-        elif func_key is None:
-            proxy_queue.put_iterable(((v, func_value(v)) for v in it_values))
-        else:
-            proxy_queue.put_iterable(((func_key(v), func_value(v)) for v in it_values))
+        try:
+            if partition_keys is not None:
+                get_partition = _get_func_partition(partition_keys, reverse, key_codec)
+                if extract_in_write_processes:
+                    # Only the key is needed here to choose the write process, the value is extracted there
+                    for v in it_values:
+                        sort_key = func_key(v)
+                        list_proxy_queues[get_partition(sort_key)].put((sort_key, v))
+                else:
+                    for v in it_values:
+                        sort_key = func_key(v)
+                        list_proxy_queues[get_partition(sort_key)].put((sort_key, func_value(v)))
+            elif extract_in_write_processes:
+                list_proxy_queues[0].put_iterable(it_values)
+            elif func_key is None and func_value is None:
+                list_proxy_queues[0].put_iterable(((v, v) for v in it_values))
+            elif func_value is None:
+                list_proxy_queues[0].put_iterable(((func_key(v), v) for v in it_values))
+            elif func_key is None:
+                list_proxy_queues[0].put_iterable(((v, func_value(v)) for v in it_values))
+            else:
+                list_proxy_queues[0].put_iterable(((func_key(v), func_value(v)) for v in it_values))
 
-        logging.debug("[ROOT LINES PROCESSED: ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+            logging.debug("[ROOT LINES PROCESSED: ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+
+            for proxy_queue in set(list_proxy_queues):
+                proxy_queue.end()
+        except BaseException:
+            # A write process died (its ring is full forever) or the iteration of values failed, then the data of
+            # this injection is incomplete
+            self._terminate_write_processes()
+            self.set_dict_saved_info(prev_dict_info)
+            raise
 
-        proxy_queue.end()
         proxy_end_event.set()
 
         gc.collect()
@@ -1226,6 +3696,19 @@ class SortedInDisk(object):
                       queue_max_size=1000,
 
                       ensure_space=False,
+                      payload_runs=False,
+                      key_codec=None,
+                      compression=None,
+                      limit=None,
+                      unique=False,
+                      reduce=None,
+                      initial=None,
+                      combine=None,
+                      partition_keys=None,
+                      partition_sample_size=None,
+                      extract_in_write_processes=False,
+                      transport="queue",
+                      ring_size=16 * 1024 * 1024,
 
                       size_bucket_list=None,
                       min_size_bucket_list=10,
@@ -1239,11 +3722,10 @@ class SortedInDisk(object):
         :param func_value: function to extract the value of each value of it_values.
             If None is full value of it_values. By default: None
         :param reverse: True to reverse sort. By default: False
-        :param count_insert_to_check: counter to check if process have more size in memory than max_write_process_size.
+        :param count_insert_to_check: max number of values in cache of each process (see sorted_in_disk).
             By default: 1000000
-        :param max_write_process_size: max size in bytes to dump cache memory values to disk
-            (only execute when count_insert_to_check is reached). If None, then not import psutil and then only
-            check with count_insert_to_check. By default: 1024*1024*1024  # 1Gib
+        :param max_write_process_size: max estimated size in bytes of cache of each process (see sorted_in_disk).
+            By default: 1024*1024*1024  # 1Gib
             :param write_processes: number of process to execute. If None then it is number of CPUs. If you pass one list
                      with paths pointing to folders, then each path implements one process (each process save data in
                      its own path; you can use one path to several processes if you define same path several times in
@@ -1252,6 +3734,42 @@ class SortedInDisk(object):
         :param queue_max_size: max number of elements in queue. If None then is the max by default. By default: 1000
         :param ensure_space: True to ensure disk space but is slowly. If not space then process launch warning message
             and wait for space. If False, then get and IOException if not enough space
+        :param payload_runs: True to save values with their keys in runs instead of positions of values in full
+            data file. By default: False
+        :param key_codec: KeyCodec to save keys encoded in bytes sorted as keys (keys are decoded when they are read).
+            If None, then keys are saved without encode. By default: None
+        :param compression: 'zlib', 'lzma', 'bz2' or object with compress and decompress methods to compress values
+            and runs in blocks. If None, then files are not compressed. By default: None
+        :param limit: number of first sorted elements to keep (bounded heap in each write process, only these
+            elements are saved in disk and read). If None, then all elements are kept. By default: None
+        :param unique: True or 'first' to keep only the first injected value of each key, 'last' to keep the last one
+            or 'any' to keep any (duplicates are dropped before write their values in disk and in merges; first and
+            last are per write process). If False, then all values are kept. By default: False
+        :param reduce: function with args accumulated value and value to fold all values of each key in one value
+            (it must be associative; values are folded in cache before write them in disk and again in merges). If
+            None, then all values are kept. By default: None
+        :param initial: (only if reduce is defined) value to start the fold of each key (it is copied for each key in
+            each pre-sorted file, then it must be neutral for combine, as 0 to add or [] to concatenate). If None,
+            then the fold starts from the first value of each key. By default: None
+        :param combine: (only if reduce is defined) function with args two folded values of the same key to combine
+            folded values of different pre-sorted files (it must be associative). It is required if initial is
+            defined or if reduce returns a type different of values. If None, then reduce is used. By default: None
+        :param partition_keys: (only multiprocess) list of keys to split keys in ranges (each key is the first key
+            of one range, except the first range), then each write process receives only one range and runs of each
+            range are read apart (ranges are concatenated). With key_codec, ranges are split in order of encoded keys.
+            It must have less keys than write processes. If None, then all write processes receive any key.
+            By default: None
+        :param partition_sample_size: (only multiprocess and if partition_keys is None) number of first elements of
+            it_values to sample keys to calculate partition_keys. If None, then not sample. By default: None
+        :param extract_in_write_processes: (only multiprocess) True to send elements of it_values to write processes
+            and extract there keys and values with func_key and func_value (this process only reads it_values). With
+            partition_keys, keys are extracted in this process to choose the write process. Functions must be
+            picklable if processes are not started with fork. By default: False
+        :param transport: (only multiprocess) "queue" to send elements to write processes with QQueue or
+            "shared_memory" to send batches of elements pickled (size_bucket_list elements, 1000 if it is None) in a
+            ring buffer in shared memory of each write process (without pipe). By default: "queue"
+        :param ring_size: (only if transport is "shared_memory") size in bytes of ring of each write process (a
+            bigger batch pickled is written in parts). By default: 16 MB
         :param size_bucket_list: None to enable sensor size bucket list (require maxsize>0). If a number is defined
                                  here then use this number to size_bucket_list and disable sensor. If maxsize<=0
                                  and size_bucket_list==None then size_bucket_list is default to 1000; other wise,
@@ -1269,7 +3787,15 @@ class SortedInDisk(object):
                                     reverse=reverse,
                                     count_insert_to_check=count_insert_to_check,
                                     max_write_process_size=max_write_process_size,
-                                    ensure_space=ensure_space)
+                                    ensure_space=ensure_space,
+                                    payload_runs=payload_runs,
+                                    key_codec=key_codec,
+                                    compression=compression,
+                                    limit=limit,
+                                    unique=unique,
+                                    reduce=reduce,
+                                    initial=initial,
+                                    combine=combine)
         else:
             self.save_and_sort_multiprocess(it_values=it_values,
                                             func_key=func_key,
@@ -1280,19 +3806,524 @@ class SortedInDisk(object):
                                             write_processes=write_processes,
                                             queue_max_size=queue_max_size,
                                             ensure_space=ensure_space,
+                                            payload_runs=payload_runs,
+                                            key_codec=key_codec,
+                                            compression=compression,
+                                            limit=limit,
+                                            unique=unique,
+                                            reduce=reduce,
+                                            initial=initial,
+                                            combine=combine,
+                                            partition_keys=partition_keys,
+                                            partition_sample_size=partition_sample_size,
+                                            extract_in_write_processes=extract_in_write_processes,
+                                            transport=transport,
+                                            ring_size=ring_size,
                                             size_bucket_list=size_bucket_list,
                                             min_size_bucket_list=min_size_bucket_list,
                                             max_size_bucket_list=max_size_bucket_list)
         return self
 
+    async def async_save_and_sort(self, async_iterable, batch_size=_ASYNC_BATCH_SIZE, **kwargs_save_and_sort):
+        """
+        Asynchronous version of save_and_sort to inject an asynchronous iterable in an event loop. Elements are got in
+        the event loop and passed in batches to save_and_sort running in a thread (with write processes, it sends
+        them to write processes), then the event loop is not blocked by writes of disk or by waits to other processes.
+        If the asynchronous iterable raises an exception, then save_and_sort ends with an error (elements got until
+        now are not saved as sorted data) and the exception is raised.
+
+        >>> import asyncio
+        >>> async def generate_lines():
+        ...     for line in ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF"]:
+        ...         yield line
+        >>> sid = SortedInDisk()
+        >>> _ = asyncio.run(sid.async_save_and_sort(generate_lines(), func_key=lambda line: line.split("|")[1]))
+        >>> list(sid.keys())
+        ['key1', 'key2', 'key3']
+
+        :param async_iterable: asynchronous iterable of values
+        :param batch_size: number of elements passed to the thread in each batch. By default: 1000
+        :param kwargs_save_and_sort: args of save_and_sort (func_key, func_value, write_processes...)
+        :return: this SortedInDisk object
+        """
+        loop = asyncio.get_running_loop()
+        queue_batches = queue.Queue(maxsize=_ASYNC_QUEUE_BATCHES)
+        future_save = loop.run_in_executor(None, partial(self.save_and_sort,
+                                                         _iter_queue_batches(queue_batches),
+                                                         **kwargs_save_and_sort))
+
+        async def put_batch(batch):
+            # The queue is full while the thread saves, then the event loop waits without block
+            while not future_save.done():
+                try:
+                    queue_batches.put_nowait(batch)
+                    return
+                except queue.Full:
+                    await asyncio.wait([future_save], timeout=0.01)
+            if future_save.exception() is not None:
+                # save_and_sort failed, then the rest of the asynchronous iterable is not consumed
+                raise future_save.exception()
+
+        try:
+            batch = list()
+            async for value in async_iterable:
+                batch.append(value)
+                if len(batch) >= batch_size:
+                    await put_batch(batch)
+                    batch = list()
+            if batch:
+                await put_batch(batch)
+        except BaseException as err:
+            if not future_save.done():
+                # Mark of error (save_and_sort raises an error instead of save the elements got until now)
+                await put_batch(err)
+                await asyncio.wait([future_save])
+            # The error of save_and_sort is the consequence of this error (or it is this error)
+            future_save.exception()
+            raise
+
+        # Mark of end
+        await put_batch(None)
+
+        return await future_save
+
+    def save_and_sort_file(self,
+                           path_to_file_read,
+                           func_key=None,
+                           func_value=None,
+                           reverse=False,
+
+                           count_insert_to_check=1000000,
+                           max_write_process_size=1024 * 1024 * 1024,
+
+                           write_processes=None,
+
+                           ensure_space=False,
+                           payload_runs=False,
+                           key_codec=None,
+                           compression=None,
+                           limit=None,
+                           unique=False,
+                           reduce=None,
+                           initial=None,
+                           combine=None,
+                           encoding="utf-8"):
+        """
+        Consume lines of a text file to be sorted. The file is split in ranges of bytes aligned to lines (one per
+        write process) and each write process reads its own range and extracts keys and values (without queue and
+        without read the file in this process).
+
+        :param path_to_file_read: path of text file (each line is an element, stripped as in read_iter_from_file)
+        :param func_key: function to extract the key of each line (picklable if processes are not started with
+            fork). If None is full line. By default: None
+        :param func_value: function to extract the value of each line (picklable if processes are not started with
+            fork). If None is full line. By default: None
+        :param reverse: True to reverse sort. By default: False
+        :param count_insert_to_check: max number of values in cache of each process (see sorted_in_disk).
+            By default: 1000000
+        :param max_write_process_size: max estimated size in bytes of cache of each process (see sorted_in_disk).
+            By default: 1024*1024*1024  # 1Gib
+        :param write_processes: number of process to execute (one range of file per process). If None then it is
+            number of CPUs. If you pass one list with paths pointing to folders, then each path implements one
+            process. If 0 or [], then the file is read in this process (save_and_sort_mono). By default: None
+        :param ensure_space: True to ensure disk space but is slowly. If not space then process launch warning message
+            and wait for space. If False, then get and IOException if not enough space
+        :param payload_runs: True to save values with their keys in runs instead of positions of values in full
+            data file. By default: False
+        :param key_codec: KeyCodec to save keys encoded in bytes sorted as keys (keys are decoded when they are read).
+            If None, then keys are saved without encode. By default: None
+        :param compression: 'zlib', 'lzma', 'bz2' or object with compress and decompress methods to compress values
+            and runs in blocks. If None, then files are not compressed. By default: None
+        :param limit: number of first sorted elements to keep (bounded heap in each write process, only these
+            elements are saved in disk and read). If None, then all elements are kept. By default: None
+        :param unique: True or 'first' to keep only the first injected value of each key, 'last' to keep the last one
+            or 'any' to keep any (first and last are per range of file). If False, then all values are kept.
+            By default: False
+        :param reduce: function with args accumulated value and value to fold all values of each key in one value
+            (it must be associative). If None, then all values are kept. By default: None
+        :param initial: (only if reduce is defined) value to start the fold of each key (it is copied for each key in
+            each pre-sorted file, then it must be neutral for combine, as 0 to add or [] to concatenate). If None,
+            then the fold starts from the first value of each key. By default: None
+        :param combine: (only if reduce is defined) function with args two folded values of the same key to combine
+            folded values of different pre-sorted files (it must be associative). It is required if initial is
+            defined or if reduce returns a type different of values. If None, then reduce is used. By default: None
+        :param encoding: encoding of file. By default: utf-8
+        :exception ValueError: raise if functions are not picklable (only if processes are not started with fork) or
+            if max_merge_fanin is lower than the number of write processes
+        :return: self
+        """
+        if write_processes == 0 or write_processes == []:
+            return self.save_and_sort_mono(read_iter_from_file_range(path_to_file_read, encoding=encoding),
+                                           func_key=func_key,
+                                           func_value=func_value,
+                                           reverse=reverse,
+                                           count_insert_to_check=count_insert_to_check,
+                                           max_write_process_size=max_write_process_size,
+                                           ensure_space=ensure_space,
+                                           payload_runs=payload_runs,
+                                           key_codec=key_codec,
+                                           compression=compression,
+                                           limit=limit,
+                                           unique=unique,
+                                           reduce=reduce,
+                                           initial=initial,
+                                           combine=combine)
+
+        logging.debug("[ROOT START FILE -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+
+        _check_picklable_functions({"key": func_key, "value": func_value})
+        func_key = func_key or _get_element
+        func_value = func_value or _get_element
+
+        list_processes_paths = self._get_list_processes_paths(write_processes)
+        self._check_max_merge_fanin(len(list_processes_paths))
+        list_ranges = get_line_ranges(path_to_file_read, len(list_processes_paths))
+
+        dict_info = self.get_dict_saved_info()
+        self._set_dict_info_payload_runs(dict_info, payload_runs)
+        self._set_dict_info_key_codec(dict_info, key_codec)
+        self._set_dict_info_compression(dict_info, compression)
+        unique = _get_unique_policy(unique)
+        self._set_dict_info_limit(dict_info, limit)
+        self._set_dict_info_unique(dict_info, unique)
+        self._set_dict_info_reduce(dict_info, reduce, initial, combine)
+        self.reduce = reduce
+        self.combine = combine
+        self._set_dict_info_partition_keys(dict_info, None)
+
+        dict_info["reverse"] = reverse
+        dict_info["empty"] = False
+        dict_info["multiprocessing"] = True
+        dict_info["directories"].add(self.dir_tmp_path)
+        dict_info["directories"] |= set(list_processes_paths)
+
+        self.set_dict_saved_info(dict_info)
+
+        self.join_multiprocess()
+
+        self.proxy_dict = self.manager.dict()
+        self.proxy_dict_bytes_written = self.manager.dict()
+
+        if self.max_merge_fanin is None:
+            max_merge_fanin_per_process = None
+        else:
+            max_merge_fanin_per_process = max(1, self.max_merge_fanin // len(list_processes_paths))
+
+        for procesnum, (process_path, (start_pos, end_pos)) in enumerate(zip(list_processes_paths, list_ranges), 0):
+            process = multiprocessing.Process(target=_write_file_range_process,
+                                              args=(path_to_file_read,
+                                                    start_pos,
+                                                    end_pos,
+                                                    encoding,
+                                                    func_key,
+                                                    func_value,
+                                                    procesnum,
+
+                                                    process_path,
+                                                    self.proxy_dict,
+                                                    self.proxy_dict_bytes_written,
+
+                                                    count_insert_to_check,
+                                                    max_write_process_size,
+                                                    reverse,
+                                                    self._get_next_id_path_to_keys_sorted(dict_info, procesnum),
+
+                                                    ensure_space,
+                                                    max_merge_fanin_per_process,
+                                                    payload_runs,
+                                                    key_codec,
+                                                    compression,
+                                                    limit,
+                                                    unique,
+                                                    reduce,
+                                                    initial,
+                                                    self.logging_level))
+            process.daemon = True
+            process.start()
+            self.dict_num_procceses[procesnum] = process
+
+        gc.collect()
+        logging.debug("[ROOT END FILE -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+
+        return self
+
+    def get_dict_info_to_read(self):
+        """
+        Get dict with general information ready to read sorted data: join write processes and merge runs if
+        max_merge_fanin is defined.
+
+        :return: dict info of data saved
+        """
+        dict_info = self.get_dict_saved_info()
+
+        if dict_info["empty"]:
+            return dict_info
+
+        if dict_info["multiprocessing"]:
+            gc.collect()
+            dict_info = self.join_multiprocess()
+
+        if self.max_merge_fanin is not None:
+            dict_info = self.merge_runs(self.max_merge_fanin)
+
+        return dict_info
+
+    def get_dict_read_args(self, dict_info):
+        """
+        Get args to read sorted data saved with dict_info.
+
+        :param dict_info: dict info of data saved
+        :exception ValueError: raise if data was saved with reduce and reduce (or combine) is not defined
+        :return: dict with args of reader of sorted data
+        """
+        combine = self.combine or self.reduce
+        if dict_info.get("reduce", False) and combine is None:
+            raise ValueError("Data was saved with reduce, define reduce (or combine) in SortedInDisk to read it "
+                             "(folded values of different pre-sorted files must be combined)")
+
+        return {"reverse": dict_info["reverse"],
+                "payload_runs": dict_info.get("payload_runs", False),
+                "mmap_values": self.mmap_values,
+                "prefetch_window": self.prefetch_window,
+                "read_ahead_threads": self.read_ahead_threads,
+                "partitioned": dict_info.get("partition_keys") is not None,
+                "key_codec": dict_info.get("key_codec"),
+                "compression": dict_info.get("compression"),
+                "limit": dict_info.get("limit"),
+                "unique": dict_info.get("unique"),
+                "reduce": combine if dict_info.get("reduce", False) else None}
+
+    def materialize(self,
+                    path_to_file_write,
+                    format="lines",
+                    fun_prepline=None,
+                    in_read_process=False,
+                    buffering=8 * 1024 * 1024):
+        """
+        Write all sorted data in one file in one sequential pass. The merge of sorted data is written directly in
+        a file with a big buffer. After, you can read this file sequentially instead of merge again.
+
+        >>> from sorted_in_disk.utils import read_iter_from_file
+        >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF"]
+        >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1])
+        >>> sid.materialize("sorted_file.txt")["count"]
+        3
+        >>> list(read_iter_from_file("sorted_file.txt"))
+        ['valB|key1|valE', 'valC|key2|valF', 'valA|key3|valD']
+        >>> Path("sorted_file.txt").unlink()
+
+        Note: tmp files are deleted in the end if delete_to_end is True.
+
+        :param path_to_file_write: path to file where write
+        :param format: "lines" to write each value as a text line (same as write_iter_in_file) or "pickle" to dump
+            each tuple key and value (you can read it with quick_load_items of easy_binary_file). By default: "lines"
+        :param fun_prepline: (only if format is "lines") function with args count and value, to return a line to
+            write in file. If None then apply this format each line: "{}\n".format(value.rstrip()). By default: None
+        :param in_read_process: True to merge and write in other process (this process wait to the end).
+            By default: False
+        :param buffering: size in bytes of buffer to write in file. By default: 8 MB
+        :exception ValueError: raise if format is not allowed
+        :return: dict with information: "count" number of elements written, "size" bytes of file written and
+            "seconds" time in seconds to merge and write
+        """
+        if format not in ("lines", "pickle"):
+            raise ValueError("format={} not allowed, it must be 'lines' or 'pickle'".format(format))
+
+        start = time.time()
+        dict_info = self.get_dict_info_to_read()
+        list_bytes_read = self.manager.list() if in_read_process else list()
+
+        if dict_info["empty"]:
+            count = _materialize(None, path_to_file_write, format, fun_prepline, buffering, {})
+        elif in_read_process:
+            proxy_dict_result = self.manager.dict()
+            process = multiprocessing.Process(target=_materialize_process,
+                                              args=(dict_info["dict_ipid_tup_full_list_parts"],
+                                                    path_to_file_write,
+                                                    format,
+                                                    fun_prepline,
+                                                    buffering,
+                                                    dict(self.get_dict_read_args(dict_info),
+                                                         list_bytes_read=list_bytes_read),
+                                                    proxy_dict_result,
+                                                    self.logging_level))
+            process.daemon = True
+            process.start()
+            process.join()
+
+            if "count" not in proxy_dict_result:
+                raise RuntimeError("Read process to materialize ended with exitcode {}".format(process.exitcode))
+            count = proxy_dict_result["count"]
+        else:
+            count = _materialize(dict_info["dict_ipid_tup_full_list_parts"],
+                                 path_to_file_write,
+                                 format,
+                                 fun_prepline,
+                                 buffering,
+                                 dict(self.get_dict_read_args(dict_info), list_bytes_read=list_bytes_read))
+
+        self.dict_io_stats.update(bytes_written=dict_info.get("bytes_written", 0),
+                                  bytes_read=sum(list_bytes_read),
+                                  compression=dict_info.get("compression"))
+
+        if self.delete_to_end:
+            self.delete_tmp(remove_tmp_folder=True)
+
+        return {"count": count,
+                "size": Path(path_to_file_write).stat().st_size,
+                "seconds": time.time() - start}
+
+    def _start_read_process(self,
+                            dict_ipid_tup_full_list_parts,
+                            dict_read_args,
+                            queue_max_size,
+                            size_bucket_list,
+                            min_size_bucket_list,
+                            max_size_bucket_list,
+                            transport="queue",
+                            batch_bytes=None):
+        """
+        Start a process to get and prepare sorted data.
+
+        :param dict_ipid_tup_full_list_parts: dict with information about temporal files
+        :param dict_read_args: dict with args to read data (args of _iter_get_data_from_files)
+        :param queue_max_size: max number of elements in queue (batches if batch_bytes is defined)
+        :param size_bucket_list: size bucket list of queue (None to enable sensor)
+        :param min_size_bucket_list: (only if sensor is enabled) min size bucket list
+        :param max_size_bucket_list: (only if sensor is enabled) max size bucket list
+        :param transport: "queue" to send sorted data in QQueue or "shared_memory" to send it in a SharedMemoryRing.
+            By default: "queue"
+        :param batch_bytes: size in bytes of each batch of pickled tuples. If None, then tuples are sent one by one
+            (with "shared_memory" batches are always sent, of _READ_BATCH_BYTES if it is None). By default: None
+        :return: tuple of process, queue, start event, end event and True if elements of queue are pickled batches
+        """
+        if transport == "shared_memory":
+            batch_bytes = batch_bytes or _READ_BATCH_BYTES
+            proxy_queue_iter = SharedMemoryRing(max(_READ_RING_SIZE, _READ_RING_BATCHES * batch_bytes))
+            proxy_queue_iter_init_args = None
+        else:
+            proxy_queue_iter = QQueue(queue_max_size,
+                                      size_bucket_list=size_bucket_list,
+                                      min_size_bucket_list=min_size_bucket_list,
+                                      max_size_bucket_list=max_size_bucket_list,
+                                      logging_level=self.logging_level)
+            proxy_queue_iter_init_args = proxy_queue_iter.get_init_args()
+
+        proxy_start_event_iter = multiprocessing.Event()
+        proxy_start_event_iter.clear()
+
+        proxy_end_event_iter = multiprocessing.Event()
+        proxy_end_event_iter.clear()
+
+        logging.debug("[ROOTG INITIALIZE CHILD -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+
+        process = multiprocessing.Process(target=_read_process, args=(proxy_queue_iter,
+                                                                      proxy_queue_iter_init_args,
+                                                                      proxy_start_event_iter,
+                                                                      proxy_end_event_iter,
+                                                                      dict_ipid_tup_full_list_parts,
+                                                                      dict_read_args,
+                                                                      batch_bytes,
+                                                                      self.logging_level))
+
+        process.daemon = True
+        process.start()
+
+        # SharedMemoryRing unpickles each batch in get_batch, QQueue returns the pickled batch
+        is_batched = batch_bytes is not None and transport != "shared_memory"
+        return process, proxy_queue_iter, proxy_start_event_iter, proxy_end_event_iter, is_batched
+
+    @staticmethod
+    def _iter_read_process(process, proxy_queue_iter, proxy_start_event_iter, proxy_end_event_iter,
+                           is_batched=False):
+        """
+        Get sorted data from a process started with _start_read_process()
+
+        :param process: process to get and prepare data
+        :param proxy_queue_iter: queue of process (QQueue or SharedMemoryRing, it is released at the end)
+        :param proxy_start_event_iter: start flag process notification
+        :param proxy_end_event_iter: end flag process notification
+        :param is_batched: True if each element of queue is a pickled list of tuples. By default: False
+        :exception EOFError: raise if the process ended before send all sorted data (for example killed or by an
+            error)
+        :return: Generator to return tuples key and value
+        """
+        loop_enable = True
+        is_ring = isinstance(proxy_queue_iter, SharedMemoryRing)
+        is_process_ended = False
+
+        logging.debug("[ROOTG START -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+
+        try:
+            while loop_enable:
+                try:
+                    if is_ring:
+                        element = proxy_queue_iter.get_batch(timeout=0.1)
+                    else:
+                        element = proxy_queue_iter.get(timeout=0.1)
+                except queue.Empty:
+                    if is_ring and proxy_queue_iter.empty():
+                        # The end of ring is read (the last frame is empty)
+                        loop_enable = False
+                    elif is_process_ended:
+                        # Data sent before the end of process was got in the previous get
+                        if is_ring or not proxy_end_event_iter.is_set():
+                            raise EOFError("Read process ended (exit code {}) before send all sorted "
+                                           "data".format(process.exitcode))
+                        # The process ended without the mark of end, but all its data is in the queue
+                        loop_enable = False
+                    elif not process.is_alive():
+                        # One more get is done to get data sent before the end of process
+                        is_process_ended = True
+                    # When the process is started, get waits for data (without other sleep between gets)
+                    if loop_enable and not is_process_ended and not proxy_start_event_iter.is_set():
+                        logging.debug("[ROOTG WAIT GETTER -> ppid:{} | pid:{}]".format(os.getppid(),
+                                                                                       os.getpid()))
+                        gc.collect()
+                        proxy_start_event_iter.wait()
+                        logging.debug("[ROOTG RESUME WAIT -> ppid:{} | pid:{}]".format(os.getppid(),
+                                                                                       os.getpid()))
+                else:
+                    if element is None:
+                        # Mark of end
+                        break
+                    if is_ring:
+                        for tup_key_value in element:
+                            yield tup_key_value
+                    elif is_batched:
+                        for tup_key_value in pickle.loads(element):
+                            yield tup_key_value
+                    else:
+                        yield element
+        finally:
+            if process.is_alive():
+                logging.debug("[ROOTG FORCE TO TERMINATE LIVE CHILD -> ppid:{} | pid:{}]".format(os.getppid(),
+                                                                                                 os.getpid()))
+                process.terminate()
+
+            if is_ring:
+                process.join()
+                proxy_queue_iter.unlink()
+
+        logging.debug("[ROOTG LOOP STOP -> ppid:{} | pid:{}]".format(os.getppid(),
+                                                                     os.getpid()))
+
     def iter_with_key(self,
+                      start=None,
+                      stop=None,
                       delete_to_end=True,
                       enable_multiprocessing=False,
                       queue_max_size=1000,
 
                       size_bucket_list=None,
                       min_size_bucket_list=10,
-                      max_size_bucket_list=None):
+                      max_size_bucket_list=None,
+
+                      parallel_read_processes=None,
+                      groups=False,
+                      batch_size=None,
+                      transport="queue",
+                      batch_bytes=64 * 1024):
         """
         Get a sorted iterable from disk to return tuples of key and sorted line, in each petition this get one
         sorted line.
@@ -1301,9 +4332,13 @@ class SortedInDisk(object):
 
         Note: you can use a wrappers pre-build that remove key and only return the sorted line in iter()
 
-        :param delete_to_end: True to delete tmps files in the end of consumption of sorted data. If False or
-                              if you not consume full returned iterable, then you may to delete tmps files by hand
-                              (you can carry out with clear() method). By default: True
+        :param start: first key to return (included; with reverse sort, it is the greatest key). Pre-sorted files are
+            read from the block of this key. If None, then from first key. By default: None
+        :param stop: key to stop (excluded). If None, then to last key. By default: None
+        :param delete_to_end: True to delete tmps files in the end of consumption of sorted data (only if start and
+                              stop are None, a range is not all data). If False or if you not consume full returned
+                              iterable, then you may to delete tmps files by hand (you can carry out with clear()
+                              method). By default: True
         :param enable_multiprocessing: True to get and prepare data in other process, False to use this one.
             By default: False
         :param queue_max_size: (only if enable_multiprocessing is True) max number of elements in queue. If None
@@ -1316,82 +4351,278 @@ class SortedInDisk(object):
                                      Min == 1 and max == max_size_bucket_list - 1. By default: 10
         :param max_size_bucket_list: (only if sensor is enabled) max size bucket list. If None is infinite.
                                      By default: None
+        :param parallel_read_processes: number of processes to merge sorted data in parallel (each process merges one
+            range of keys and ranges are returned in order; queue args are used by each process). If write processes
+            saved ranges of keys (partition_keys), then there is one process by range. If None or 1, then it is not
+            used (and enable_multiprocessing is used). By default: None
+        :param groups: True to return one tuple per key with a group of its values (read only when the group is
+            iterated, see groups). Groups are read in this process (enable_multiprocessing and
+            parallel_read_processes are not used). By default: False
+        :param batch_size: number of tuples to return in each list (see iter_batches). If None, then tuples are
+            returned one by one. By default: None
+        :param transport: (only if enable_multiprocessing is True or with parallel_read_processes) "queue" to send
+            sorted data from read processes in QQueue or "shared_memory" (Python >= 3.8) to send it in a ring buffer
+            in shared memory per read process (without pipe). By default: "queue"
+        :param batch_bytes: (only if enable_multiprocessing is True or with parallel_read_processes) size in bytes of
+            each batch of tuples sent by a read process. Tuples of each batch are pickled at once in the read process
+            and unpickled at once in this process (then queue_max_size is a number of batches). If None, then tuples
+            are sent one by one in the queue (batches of 64 KB with "shared_memory"). By default: 64 KB
+        :exception ValueError: raise if batch_size or batch_bytes is lower than 1 or if transport is not allowed
         :return None
         """
-        dict_info = self.get_dict_saved_info()
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be great than 0 or None")
 
-        if dict_info["empty"]:
-            raise StopIteration
+        if batch_bytes is not None and batch_bytes < 1:
+            raise ValueError("batch_bytes must be great than 0 or None")
 
-        reverse = dict_info["reverse"]
-        if dict_info["multiprocessing"]:
-            gc.collect()
-            dict_info = self.join_multiprocess()
+        if transport not in ("queue", "shared_memory"):
+            raise ValueError("transport={} not allowed, it must be 'queue' or 'shared_memory'".format(transport))
+
+        dict_info = self.get_dict_info_to_read()
+
+        if dict_info["empty"]:
+            return
 
         dict_ipid_tup_full_list_parts = dict_info["dict_ipid_tup_full_list_parts"]
 
-        if enable_multiprocessing:
-            proxy_queue_iter = QQueue(queue_max_size,
-                                      size_bucket_list=size_bucket_list,
-                                      min_size_bucket_list=min_size_bucket_list,
-                                      max_size_bucket_list=max_size_bucket_list,
-                                      logging_level=self.logging_level)
+        if groups:
+            # Groups read values from files opened in this process
+            enable_multiprocessing = False
+            parallel_read_processes = None
+
+        # Each reader appends its bytes read from disk when it ends (readers in other processes need a shared list)
+        if enable_multiprocessing or (parallel_read_processes is not None and parallel_read_processes > 1):
+            list_bytes_read = self.manager.list()
+        else:
+            list_bytes_read = list()
+        dict_read_args = dict(self.get_dict_read_args(dict_info),
+                              list_bytes_read=list_bytes_read,
+                              groups=groups,
+                              batch_size=batch_size)
+
+        is_range = start is not None or stop is not None
+        if is_range:
+            key_codec = dict_read_args["key_codec"]
+            if key_codec is not None:
+                # Keys of pre-sorted files are encoded
+                start = None if start is None else key_codec.encode(start)
+                stop = None if stop is None else key_codec.encode(stop)
+            dict_read_args.update(start=start, stop=stop)
+
+        if parallel_read_processes is not None and parallel_read_processes > 1:
+            if dict_read_args["partitioned"]:
+                # Write processes saved ranges of keys, then each one is a range to read
+                list_tup_parts_read_args = [({ipid: dict_ipid_tup_full_list_parts[ipid]}, dict_read_args)
+                                            for ipid in sorted(dict_ipid_tup_full_list_parts.keys())]
+            else:
+                list_splitters = _get_range_splitters(dict_ipid_tup_full_list_parts,
+                                                      parallel_read_processes,
+                                                      dict_info["total_counter"],
+                                                      dict_read_args["reverse"],
+                                                      dict_read_args["compression"],
+                                                      start=start,
+                                                      stop=stop)
+                list_range_keys = [start] + list_splitters + [stop]
+                list_tup_parts_read_args = [(dict_ipid_tup_full_list_parts,
+                                             dict(dict_read_args, start=start, stop=stop))
+                                            for start, stop in zip(list_range_keys[:-1], list_range_keys[1:])]
+
+            logging.debug("[ROOTG SPLIT IN {} RANGES -> ppid:{} | pid:{}]".format(len(list_tup_parts_read_args),
+                                                                                 os.getppid(),
+                                                                                 os.getpid()))
+
+            # All ranges are merged at same time (each one in its own process), but consumed in order
+            list_tup_read_processes = [self._start_read_process(dict_parts,
+                                                                dict_read_args_range,
+                                                                queue_max_size,
+                                                                size_bucket_list,
+                                                                min_size_bucket_list,
+                                                                max_size_bucket_list,
+                                                                transport,
+                                                                batch_bytes)
+                                       for dict_parts, dict_read_args_range in list_tup_parts_read_args]
+            try:
+                it_ranges = chain.from_iterable(self._iter_read_process(*tup_read_process)
+                                                for tup_read_process in list_tup_read_processes)
+                # Each range is limited apart, then ranges together are limited too
+                if batch_size is not None:
+                    # Batches of ranges are joined in batches of batch_size (last batch of each range is smaller)
+                    it_ranges = _iter_batches(islice(chain.from_iterable(it_ranges), dict_read_args["limit"]),
+                                              batch_size)
+                    for batch in it_ranges:
+                        yield batch
+                else:
+                    for tup_key_loadpickle in islice(it_ranges, dict_read_args["limit"]):
+                        yield tup_key_loadpickle
+            finally:
+                for process, proxy_queue_iter, _, _, _ in list_tup_read_processes:
+                    if process.is_alive():
+                        process.terminate()
+                    if isinstance(proxy_queue_iter, SharedMemoryRing):
+                        # Rings of ranges not iterated are released too
+                        process.join()
+                        proxy_queue_iter.unlink()
+        elif enable_multiprocessing:
+            tup_read_process = self._start_read_process(dict_ipid_tup_full_list_parts,
+                                                        dict_read_args,
+                                                        queue_max_size,
+                                                        size_bucket_list,
+                                                        min_size_bucket_list,
+                                                        max_size_bucket_list,
+                                                        transport,
+                                                        batch_bytes)
+            for tup_key_loadpickle in self._iter_read_process(*tup_read_process):
+                yield tup_key_loadpickle
+        else:
+            for tup_key_loadpickle in _iter_get_data_from_files(dict_ipid_tup_full_list_parts, **dict_read_args):
+                yield tup_key_loadpickle
 
-            proxy_start_event_iter = multiprocessing.Event()
-            proxy_start_event_iter.clear()
+        self.dict_io_stats.update(bytes_written=dict_info.get("bytes_written", 0),
+                                  bytes_read=sum(list_bytes_read),
+                                  compression=dict_info.get("compression"))
 
-            proxy_end_event_iter = multiprocessing.Event()
-            proxy_end_event_iter.clear()
+        if delete_to_end and not is_range:
+            self.delete_tmp(remove_tmp_folder=True)
 
-            logging.debug("[ROOTG INITIALIZE CHILD -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+    async def aitems(self, start=None, stop=None, batch_size=_ASYNC_BATCH_SIZE):
+        """
+        Asynchronous version of items to iterate with async for in an event loop. Batches of sorted tuples are got
+        from iter_batches in a thread (with read_process or parallel_read_processes, from read processes), then the
+        event loop is not blocked by reads of disk or by waits to other processes.
+
+        >>> import asyncio
+        >>> iterable_unsorted = ["valA|key3|valD", "valB|key1|valE", "valC|key2|valF"]
+        >>> sid = sorted_in_disk(iterable_unsorted, key=lambda line: line.split("|")[1])
+        >>> async def read_sorted():
+        ...     return [key async for key, _ in sid.aitems()]
+        >>> asyncio.run(read_sorted())
+        ['key1', 'key2', 'key3']
+
+        Note: This is a wrapper of iter_batches().
+
+        :param start: first key to return (included). If None, then from first key. By default: None
+        :param stop: key to stop (excluded). If None, then to last key. By default: None
+        :param batch_size: number of tuples got in each step of the thread. By default: 1000
+        :return: Sorted asynchronous iterable of tuples key and value
+        """
+        loop = asyncio.get_running_loop()
+        it_batches = iter(self.iter_batches(batch_size, start=start, stop=stop))
+        # One thread, then the generator is never advanced by two threads at same time
+        executor = ThreadPoolExecutor(1)
+        try:
+            while True:
+                batch = await loop.run_in_executor(executor, next, it_batches, None)
+                if batch is None:
+                    break
+                for tup_key_value in batch:
+                    yield tup_key_value
+        finally:
+            # Files are closed (and processes are terminated) in the thread if iteration is stopped before the end
+            await loop.run_in_executor(executor, it_batches.close)
+            executor.shutdown(wait=False)
+
+    def join(self, other, how="inner"):
+        """
+        Join this sorted data (left) with other sorted data (right) by key in one synchronized merge of pre-sorted
+        files of both (each one is read sequentially). Values of each key are grouped, then only the biggest group of
+        equal keys is in RAM memory.
+
+        >>> sid_left = sorted_in_disk(["a|1", "b|2", "b|3"], key=lambda line: line.split("|")[0],
+        ...                           tmp_dir="sortInDiskTmpsLeft", only_one_read=False)
+        >>> sid_right = sorted_in_disk(["c|4", "b|5"], key=lambda line: line.split("|")[0],
+        ...                            tmp_dir="sortInDiskTmpsRight", only_one_read=False)
+        >>> list(sid_left.join(sid_right))
+        [('b', ['b|2', 'b|3'], ['b|5'])]
+        >>> list(sid_left.join(sid_right, how="outer"))
+        [('a', ['a|1'], []), ('b', ['b|2', 'b|3'], ['b|5']), ('c', [], ['c|4'])]
+        >>> sid_left.clear()
+        >>> sid_right.clear()
+
+        Note: tmp files of each one are deleted in the end (of full join) if its delete_to_end is True.
+
+        :param other: SortedInDisk to join (sorted in same way: same reverse and key_codec)
+        :param how: "inner" to return only keys in both, "left" to return all keys of this one or "outer" to return
+            all keys. By default: "inner"
+        :exception ValueError: raise if how is not allowed or if both are not sorted in same way
+        :return: Sorted iterable of tuples key, list of values of this one and list of values of other (empty list if
+            key is not in one side)
+        """
+        if how not in ("inner", "left", "outer"):
+            raise ValueError("how={} not allowed, it must be 'inner', 'left' or 'outer'".format(how))
 
-            process = multiprocessing.Process(target=_read_process, args=(proxy_queue_iter,
-                                                                          proxy_queue_iter.get_init_args(),
-                                                                          proxy_start_event_iter,
-                                                                          proxy_end_event_iter,
-                                                                          dict_ipid_tup_full_list_parts,
-                                                                          reverse,
-                                                                          self.logging_level))
+        dict_info = self.get_dict_info_to_read()
+        dict_info_other = other.get_dict_info_to_read()
 
-            process.daemon = True
-            process.start()
-            loop_enable = True
-            times_waiting = 0
+        if not dict_info["empty"] and not dict_info_other["empty"] and \
+                (dict_info["reverse"] != dict_info_other["reverse"] or
+                 dict_info.get("key_codec") != dict_info_other.get("key_codec")):
+            raise ValueError("Both must be sorted in same way (same reverse and key_codec) to join")
 
-            logging.debug("[ROOTG START -> ppid:{} | pid:{}]".format(os.getppid(), os.getpid()))
+        return self._iter_join(other, dict_info, dict_info_other, how)
 
-            while loop_enable:
-                try:
-                    yield proxy_queue_iter.get(timeout=0.1)
-                except queue.Empty:
-                    loop_enable = not (proxy_end_event_iter.is_set() and proxy_queue_iter.empty())
-                    if loop_enable:
-                        times_waiting += 1
-                        if proxy_start_event_iter.is_set():
-                            time_to_retry = 0.1 * times_waiting
-                            gc.collect()
-                            time.sleep(time_to_retry)
-                        else:
-                            logging.debug("[ROOTG WAIT GETTER -> ppid:{} | pid:{}]".format(os.getppid(),
-                                                                                           os.getpid()))
-                            gc.collect()
-                            proxy_start_event_iter.wait()
-                            logging.debug("[ROOTG RESUME WAIT -> ppid:{} | pid:{}]".format(os.getppid(),
-                                                                                           os.getpid()))
+    def _iter_join(self, other, dict_info, dict_info_other, how):
+        """
+        Generator of join (see join).
 
-            if process.is_alive():
-                logging.debug("[ROOTG FORCE TO TERMINATE LIVE CHILD -> ppid:{} | pid:{}]".format(os.getppid(),
-                                                                                                 os.getpid()))
-                process.terminate()
+        :param other: SortedInDisk to join
+        :param dict_info: dict info to read of this one
+        :param dict_info_other: dict info to read of other
+        :param how: "inner", "left" or "outer"
+        :return: generator of tuples key, list of values of this one and list of values of other
+        """
+        dict_info_not_empty = dict_info_other if dict_info["empty"] else dict_info
+        reverse = dict_info_not_empty["reverse"]
+        key_codec = dict_info_not_empty.get("key_codec")
+
+        list_tup_sid_info_bytes_read = [(self, dict_info, list()), (other, dict_info_other, list())]
+        list_it_items = list()
+        for sid, sid_dict_info, list_bytes_read in list_tup_sid_info_bytes_read:
+            if sid_dict_info["empty"]:
+                list_it_items.append(tup_key_value for tup_key_value in ())
+            else:
+                # Keys are compared encoded (in order of pre-sorted files) and only joined keys are decoded
+                list_it_items.append(_iter_get_data_from_files(sid_dict_info["dict_ipid_tup_full_list_parts"],
+                                                               **dict(sid.get_dict_read_args(sid_dict_info),
+                                                                      key_codec=None,
+                                                                      list_bytes_read=list_bytes_read)))
+        try:
+            for key, left_values, right_values in _iter_join_groups(_iter_group_values(list_it_items[0]),
+                                                                    _iter_group_values(list_it_items[1]),
+                                                                    how,
+                                                                    reverse):
+                yield key if key_codec is None else key_codec.decode(key), left_values, right_values
+        finally:
+            for it_items in list_it_items:
+                it_items.close()
+
+        for sid, sid_dict_info, list_bytes_read in list_tup_sid_info_bytes_read:
+            sid.dict_io_stats.update(bytes_written=sid_dict_info.get("bytes_written", 0),
+                                     bytes_read=sum(list_bytes_read),
+                                     compression=sid_dict_info.get("compression"))
+            if sid.delete_to_end:
+                sid.delete_tmp(remove_tmp_folder=True)
+
+    def get_io_stats(self):
+        """
+        Get bytes written to disk by injections (and merges of runs) of data saved, and bytes read from disk by the
+        last full read (or materialize). If compression is defined, then they are compressed bytes (useful to choose
+        a compression for each work).
 
-            logging.debug("[ROOTG LOOP STOP -> ppid:{} | pid:{}]".format(os.getppid(),
-                                                                         os.getpid()))
-        else:
-            for tup_key_loadpickle in _iter_get_data_from_files(dict_ipid_tup_full_list_parts, reverse):
-                yield tup_key_loadpickle
+        Note: bytes read from files mapped in memory (mmap_values) are not counted.
 
-        if delete_to_end:
-            self.delete_tmp(remove_tmp_folder=True)
+        :return: dict with "bytes_written", "bytes_read" and "compression"
+        """
+        dict_info = self.get_dict_saved_info()
+        if dict_info["multiprocessing"]:
+            gc.collect()
+            dict_info = self.join_multiprocess()
+
+        if not dict_info["empty"]:
+            # Else tmp files were deleted at end of read and stats of the last read are kept
+            self.dict_io_stats.update(bytes_written=dict_info.get("bytes_written", 0),
+                                      compression=dict_info.get("compression"))
+        return dict(self.dict_io_stats)
 
     def __len__(self):
         """
@@ -1402,6 +4633,9 @@ class SortedInDisk(object):
         if dict_info["multiprocessing"]:
             gc.collect()
             dict_info = self.join_multiprocess()
+        if dict_info.get("limit") is not None:
+            # Each write process keeps limit elements, but only limit elements are read
+            return min(dict_info["limit"], dict_info["total_counter"])
         return dict_info["total_counter"]
 
     def visor(self):
@@ -1430,7 +4664,14 @@ class SortedInDisk(object):
 
         logging.info("* Reverse: {}".format(dict_info['reverse']))
         logging.info("* Empty: {}".format(dict_info['empty']))
-        logging.info("* Multiprocessing: {}\n".format(dict_info['multiprocessing']))
+        logging.info("* Multiprocessing: {}".format(dict_info['multiprocessing']))
+        logging.info("* Payload runs: {}".format(dict_info.get('payload_runs', False)))
+        logging.info("* Key codec: {}".format(dict_info.get('key_codec')))
+        logging.info("* Compression: {}".format(dict_info.get('compression')))
+        logging.info("* Limit: {}".format(dict_info.get('limit')))
+        logging.info("* Unique: {}".format(dict_info.get('unique')))
+        logging.info("* Reduce: {}".format(dict_info.get('reduce', False)))
+        logging.info("* Bytes written: {}\n".format(human_size(dict_info.get('bytes_written', 0))))
         logging.info("* Total counter: {}\n".format(dict_info['total_counter']))
 
         dict_ipid_tup_full_list_parts = dict_info['dict_ipid_tup_full_list_parts']
@@ -1443,18 +4684,26 @@ class SortedInDisk(object):
                 next_id_path_to_keys_sorted, \
                 total_bulk_counter = dict_ipid_tup_full_list_parts[process_num]
                 logging.info("  [ Write process {} ]".format("Main" if process_num == -1 else process_num))
-                logging.info("  Manage bulk file {} (size: {}, mtime: {}) with {} values"
-                             "".format(path_full_data,
-                                       human_size(path_full_data.stat().st_size),
-                                       datetime.fromtimestamp(path_full_data.stat().st_mtime),
-                                       total_bulk_counter))
+                if path_full_data.exists():
+                    logging.info("  Manage bulk file {} (size: {}, mtime: {}) with {} values"
+                                 "".format(path_full_data,
+                                           human_size(path_full_data.stat().st_size),
+                                           datetime.fromtimestamp(path_full_data.stat().st_mtime),
+                                           total_bulk_counter))
+                else:
+                    logging.info("  Values saved in presorted files with {} values".format(total_bulk_counter))
                 logging.info("  Presorted and indexation files:")
 
                 for path_to_keys_sorted in list_paths_to_keys_sorted:
-                    logging.info("      * {} (size: {}, mtime: {})"
-                                 "".format(path_to_keys_sorted,
-                                           human_size(path_to_keys_sorted.stat().st_size),
-                                           datetime.fromtimestamp(path_to_keys_sorted.stat().st_mtime)))
+                    # Only the footer of run is read
+                    with BlockRunFile(path_to_keys_sorted, dict_info.get("compression")) as f_run:
+                        logging.info("      * {} (size: {}, mtime: {}, keys: {}, values: {}, blocks: {})"
+                                     "".format(path_to_keys_sorted,
+                                               human_size(path_to_keys_sorted.stat().st_size),
+                                               datetime.fromtimestamp(path_to_keys_sorted.stat().st_mtime),
+                                               f_run.count_keys,
+                                               f_run.count_values,
+                                               len(f_run.list_block_positions)))
 
                 logging.info("  =============================================")
 
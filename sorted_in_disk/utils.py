@@ -4,13 +4,7 @@
 # @autor: Ramón Invarato Menéndez
 
 
-__test__ = {'import_test': """
-                           >>> from sorted_in_disk.utils import *
-
-                           """}
-
-
-def write_iter_in_file(path_to_file_write, iterable, fun_prepline=None, mode="w"):
+def write_iter_in_file(path_to_file_write, iterable, fun_prepline=None, mode="w", buffering=-1):
     """
     Write a iterable as text line in file
 
@@ -24,10 +18,12 @@ def write_iter_in_file(path_to_file_write, iterable, fun_prepline=None, mode="w"
     If None then apply this format each line: "{}\n".format(line.rstrip()).
     By default: None
     :param mode: mode w or a. By default: w
+    :param buffering: size in bytes of buffer to write in file (-1 is the default buffer size of system).
+        By default: -1
     :return: number of write lines
     """
     count = 0
-    with open(path_to_file_write, mode) as f:
+    with open(path_to_file_write, mode, buffering=buffering) as f:
         if fun_prepline:
             for count, el in enumerate(iterable, 1):
                 f.write(fun_prepline(count, el))
@@ -42,6 +38,8 @@ def read_iter_from_file(path_to_file_read):
     """
     Read a iterable where each element is a text line in file
 
+    >>> write_iter_in_file("file.txt", ["line1", "line2", "line3"])
+    3
     >>> mi_iterable = read_iter_from_file("file.txt")
     >>> for line in mi_iterable:
     ...     print(line)
@@ -59,6 +57,65 @@ def read_iter_from_file(path_to_file_read):
             line = fichero.readline().strip()
 
 
+def get_line_ranges(path_to_file_read, num_ranges):
+    """
+    Split a text file in ranges of bytes with similar size, aligned to line breaks (each line is in one range).
+
+    >>> write_iter_in_file("file.txt", ["line1", "line2", "line3"])
+    3
+    >>> get_line_ranges("file.txt", 2)
+    [(0, 12), (12, 18)]
+
+    :param path_to_file_read: path file where read
+    :param num_ranges: number of ranges
+    :return: list of tuples with start (included) and end (excluded) position in bytes of each range (a range can be
+        empty if lines are longer than ranges)
+    """
+    with open(path_to_file_read, "rb") as f:
+        size = f.seek(0, 2)
+        list_ends = list()
+        prev_end = 0
+        for num_range in range(1, num_ranges):
+            pos = max(size * num_range // num_ranges, prev_end)
+            if pos > 0:
+                # The range ends at the end of the line of previous byte (a line starting in pos is next range)
+                f.seek(pos - 1)
+                f.readline()
+                pos = f.tell()
+            list_ends.append(pos)
+            prev_end = pos
+        list_ends.append(size)
+
+    return list(zip([0] + list_ends[:-1], list_ends))
+
+
+def read_iter_from_file_range(path_to_file_read, start_pos=0, end_pos=None, encoding="utf-8"):
+    """
+    Read a iterable where each element is a text line (stripped as in read_iter_from_file) in a range of bytes of
+    file. Unlike read_iter_from_file, an empty line does not stop the read (it is yielded as an empty string)
+
+    >>> write_iter_in_file("file.txt", ["line1", "line2", "line3"])
+    3
+    >>> list(read_iter_from_file_range("file.txt", 6, 18))
+    ['line2', 'line3']
+
+    :param path_to_file_read: path file where read
+    :param start_pos: position in bytes of first line (start of a line). By default: 0
+    :param end_pos: position in bytes where stop (start of a line, excluded). If None, then to end of file.
+        By default: None
+    :param encoding: encoding of file. By default: utf-8
+    :return: Generator of lines
+    """
+    with open(path_to_file_read, "rb") as f:
+        f.seek(start_pos)
+        pos = start_pos
+        for line in f:
+            if end_pos is not None and pos >= end_pos:
+                break
+            pos += len(line)
+            yield line.decode(encoding).strip()
+
+
 def human_size(size_bytes):
     """
     Return a human size readable from bytes
@@ -89,8 +146,12 @@ def human_size(size_bytes):
 
 
 __test__ = {
+    'import_test': """
+                   >>> from sorted_in_disk.utils import *
+
+                   """,
     'clean_test_files': """
                         >>> from pathlib import Path
-                        >>> Path("file.txt").unlink()
+                        >>> Path("file.txt").unlink(missing_ok=True)
 
                         """}
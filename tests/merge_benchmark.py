@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# @autor: Ramón Invarato Menéndez
+# @version 1.0
+from datetime import datetime
+from random import random
+
+from sorted_in_disk.sorted_in_disk import _get_next, _iter_merge_sorted_runs
+
+"""
+Execute this script to compare the time to merge N sorted runs with the previous merge (sorted list of heads) and
+with the current merge (heap)
+
+list_num_runs: number of runs to merge in each test
+elements_per_run: number of keys in each run
+"""
+list_num_runs = [10, 100, 1000]
+elements_per_run = 1000
+
+
+def legacy_merge(list_runs, reverse=False):
+    """
+    Previous merge: list of heads sorted again each time that the first head is out of order
+    """
+    l_get = list()
+    for run in list_runs:
+        f_next = _get_next(iter(run))
+        l_get.append(f_next() + (f_next,))
+
+    l_get = sorted(l_get, key=lambda mtup: mtup[0], reverse=reverse)
+
+    while len(l_get) > 1:
+        key, data, f_next = l_get[0]
+        yield key, data
+
+        new_tup = f_next()
+        if new_tup is None:
+            l_get.pop(0)
+        else:
+            l_get[0] = new_tup + (f_next,)
+            if (not reverse and l_get[0][0] > l_get[1][0]) or (reverse and l_get[0][0] < l_get[1][0]):
+                l_get = sorted(l_get, key=lambda mtup: mtup[0], reverse=reverse)
+
+    if len(l_get) == 1:
+        key, data, f_next = l_get[0]
+        yield key, data
+        for tup in iter(f_next, None):
+            yield tup
+
+
+def generate_runs(num_runs):
+    return [[(key, [pos]) for pos, key in enumerate(sorted(random() for _ in range(elements_per_run)))]
+            for _ in range(num_runs)]
+
+
+if __name__ == "__main__":
+    for num_runs in list_num_runs:
+        runs = generate_runs(num_runs)
+
+        start = datetime.now()
+        count_legacy = sum(1 for _ in legacy_merge(runs))
+        diff_legacy = datetime.now() - start
+
+        start = datetime.now()
+        count_heap = sum(1 for _ in _iter_merge_sorted_runs(runs))
+        diff_heap = datetime.now() - start
+
+        print("[{} runs | {} keys] legacy merge: {} | heap merge: {}".format(num_runs,
+                                                                           count_legacy,
+                                                                           diff_legacy,
+                                                                           diff_heap))
+        assert count_legacy == count_heap
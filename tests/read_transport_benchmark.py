@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# @autor: Ramón Invarato Menéndez
+# @version 1.0
+from datetime import datetime
+from random import random
+
+from sorted_in_disk import sorted_in_disk
+
+"""
+Execute this script to compare the time to read sorted data in this process and in a read process with QQueue (one
+tuple per put), with QQueue and batches of pickled tuples, and with a ring buffer in shared memory (batches without
+pipe)
+
+num_elements: number of elements to sort and read
+batch_bytes: size in bytes of each batch of pickled tuples
+"""
+num_elements = 1000000
+batch_bytes = 64 * 1024
+
+
+def generate_values():
+    return ((random(), "value") for _ in range(num_elements))
+
+
+if __name__ == "__main__":
+    sid = sorted_in_disk(generate_values(),
+                         key=lambda tup: tup[0],
+                         only_one_read=False)
+
+    dict_read_args = {"this process": dict(enable_multiprocessing=False),
+                      "queue by tuple": dict(enable_multiprocessing=True, batch_bytes=None),
+                      "queue by batch": dict(enable_multiprocessing=True, batch_bytes=batch_bytes),
+                      "shared memory": dict(enable_multiprocessing=True, batch_bytes=batch_bytes,
+                                            transport="shared_memory")}
+    for name, read_args in dict_read_args.items():
+        start = datetime.now()
+        count = sum(1 for _ in sid.iter_with_key(delete_to_end=False, **read_args))
+        diff = datetime.now() - start
+
+        assert count == num_elements
+
+        print("[{} | {} elements] {} ({:.0f} elements/s)".format(name,
+                                                                 num_elements,
+                                                                 diff,
+                                                                 num_elements / diff.total_seconds()))
+    sid.clear()
@@ -4,8 +4,774 @@
 # @autor: Ramón Invarato Menéndez
 # @version 1.0
 
+"""
+Doctests of all modules and tests of behaviour of sorted_in_disk (each test works in a temporal folder). Execute from
+the root folder of the project (or with sorted_in_disk installed):
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+import asyncio
 import doctest
+import importlib
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from operator import add
+from unittest import mock
+from pathlib import Path
+
+from sorted_in_disk import sorted_in_disk, sorted_in_disk_file, read_iter_from_file, write_iter_in_file, KeyCodec
+
+sorted_in_disk_module = importlib.import_module("sorted_in_disk.sorted_in_disk")
+SortedInDisk = sorted_in_disk_module.SortedInDisk
+
+NUM_ELEMENTS = 1000
+
+
+def get_key(tup):
+    return tup[0]
+
+
+def get_value(tup):
+    return tup[1]
+
+
+def get_value_or_fail(tup):
+    if tup[0] == NUM_ELEMENTS // 2:
+        raise ValueError("Value of key {} can not be extracted".format(tup[0]))
+    return tup[1]
+
+
+def load_only_in_main_process(value):
+    if multiprocessing.parent_process() is not None:
+        raise ValueError("Value {} can not be loaded in other process".format(value))
+    return value
+
+
+class LoadOnlyInMainProcess(object):
+    """
+    Value that can not be unpickled in a child process (to end read processes by an error)
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __reduce__(self):
+        return load_only_in_main_process, (self.value,)
+
+
+def count_value(count, _):
+    return count + 1
+
+
+def append_value(list_values, value):
+    return list_values + [value]
+
+
+def get_line_key(line):
+    return int(line.split("|")[0])
+
+
+def get_range(list_tuples, start=None, stop=None, reverse=False):
+    list_sorted = sorted(list_tuples, key=get_key, reverse=reverse)
+    if reverse:
+        return [tup for tup in list_sorted if (start is None or tup[0] <= start) and (stop is None or tup[0] > stop)]
+    return [tup for tup in list_sorted if (start is None or tup[0] >= start) and (stop is None or tup[0] < stop)]
+
+
+def get_groups(list_tuples, reverse=False):
+    dict_key_values = dict()
+    for key, value in list_tuples:
+        dict_key_values.setdefault(key, list()).append(value)
+    return sorted(dict_key_values.items(), key=get_key, reverse=reverse)
+
+
+def get_join(list_left, list_right, how, reverse=False):
+    dict_left = dict(get_groups(list_left))
+    dict_right = dict(get_groups(list_right))
+    if how == "inner":
+        set_keys = set(dict_left) & set(dict_right)
+    elif how == "left":
+        set_keys = set(dict_left)
+    else:
+        set_keys = set(dict_left) | set(dict_right)
+    return [(key, dict_left.get(key, []), dict_right.get(key, [])) for key in sorted(set_keys, reverse=reverse)]
+
+
+def get_shuffled_tuples(num_elements=NUM_ELEMENTS, num_values_per_key=1):
+    list_tuples = [(key, "value_{}_{}".format(key, num_value))
+                   for key in range(num_elements)
+                   for num_value in range(num_values_per_key)]
+    random.Random(num_elements).shuffle(list_tuples)
+    return list_tuples
+
+
+class _TmpDirTestCase(unittest.TestCase):
+    """
+    Each test works in its own temporal folder (current working directory of the test)
+    """
+
+    def setUp(self):
+        self.prev_cwd = os.getcwd()
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix="test_sorted_in_disk_"))
+        os.chdir(str(self.tmp_dir))
+
+    def tearDown(self):
+        os.chdir(self.prev_cwd)
+        shutil.rmtree(str(self.tmp_dir), ignore_errors=True)
+
+    def sorted_in_disk(self, iterable, **kwargs):
+        kwargs.setdefault("key", get_key)
+        kwargs.setdefault("tmp_dir", Path(self.tmp_dir, "sortInDiskTmps"))
+        return sorted_in_disk(iterable, **kwargs)
+
+
+class TestDoctests(_TmpDirTestCase):
+
+    def run_doctests(self, module_name):
+        results = doctest.testmod(importlib.import_module(module_name))
+        self.assertGreater(results.attempted, 0)
+        self.assertEqual(results.failed, 0)
+
+    def test_sorted_in_disk(self):
+        self.run_doctests("sorted_in_disk.sorted_in_disk")
+
+    def test_utils(self):
+        self.run_doctests("sorted_in_disk.utils")
+
+    def test_binary_files(self):
+        self.run_doctests("sorted_in_disk.binary_files")
+
+    def test_key_codec(self):
+        self.run_doctests("sorted_in_disk.key_codec")
+
+    def test_shared_ring(self):
+        self.run_doctests("sorted_in_disk.shared_ring")
+
+
+class TestLimit(_TmpDirTestCase):
+
+    def test_limit(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=3)
+        for reverse in (False, True):
+            sid = self.sorted_in_disk(list_tuples, limit=100, reverse=reverse)
+            # Equal keys keep the order of injection
+            self.assertEqual(list(sid), sorted(list_tuples, key=get_key, reverse=reverse)[:100])
+
+    def test_limit_with_write_processes(self):
+        list_tuples = get_shuffled_tuples()
+        for reverse in (False, True):
+            for partition_keys in (None, [NUM_ELEMENTS // 2]):
+                sid = self.sorted_in_disk(list_tuples,
+                                          limit=100,
+                                          reverse=reverse,
+                                          write_processes=2,
+                                          partition_keys=partition_keys)
+                self.assertEqual(list(sid), sorted(list_tuples, reverse=reverse)[:100])
+
+    def test_limit_with_append(self):
+        list_tuples = get_shuffled_tuples()
+        tmp_dir = Path(self.tmp_dir, "sortInDiskTmps")
+        for reverse in (False, True):
+            self.sorted_in_disk(list_tuples[::2], limit=100, reverse=reverse, only_one_read=False)
+            sid = self.sorted_in_disk(list_tuples[1::2], limit=100, reverse=reverse, append=True)
+            self.assertEqual(list(sid), sorted(list_tuples, reverse=reverse)[:100])
+            self.assertFalse(tmp_dir.exists())
+
+    def test_limit_with_unique_or_reduce(self):
+        with self.assertRaises(ValueError):
+            self.sorted_in_disk(get_shuffled_tuples(), limit=100, unique=True)
+        with self.assertRaises(ValueError):
+            self.sorted_in_disk(get_shuffled_tuples(), limit=100, reduce=min)
+        with self.assertRaises(ValueError):
+            self.sorted_in_disk(get_shuffled_tuples(), limit=0)
+
+
+class TestUnique(_TmpDirTestCase):
+
+    def test_unique_across_runs(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=3)
+        dict_key_first = dict()
+        for key, value in list_tuples:
+            dict_key_first.setdefault(key, value)
+        dict_key_last = dict(list_tuples)
+        for unique in ("first", "last", "any"):
+            for payload_runs in (False, True):
+                sid = self.sorted_in_disk(list_tuples,
+                                          value=get_value,
+                                          unique=unique,
+                                          payload_runs=payload_runs,
+                                          count_insert_to_check=100)
+                list_items = list(sid.items())
+                self.assertEqual([key for key, _ in list_items], list(range(NUM_ELEMENTS)))
+                if unique == "first":
+                    self.assertEqual(list_items, sorted(dict_key_first.items()))
+                elif unique == "last":
+                    self.assertEqual(list_items, sorted(dict_key_last.items()))
+                else:
+                    self.assertTrue(all(value.startswith("value_{}_".format(key)) for key, value in list_items))
+
+    def test_unique_last_writes_kept_values(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=3)
+        dict_unique_bytes = dict()
+        for unique in ("first", "last"):
+            tmp_dir = Path(self.tmp_dir, "sortInDiskTmps_{}".format(unique))
+            self.sorted_in_disk(list_tuples, value=get_value, unique=unique, tmp_dir=tmp_dir, only_one_read=False)
+            dict_unique_bytes[unique] = Path(tmp_dir, "full_data.db").stat().st_size
+        # Values of both have the same length, then only one value per key is written in both
+        self.assertEqual(dict_unique_bytes["last"], dict_unique_bytes["first"])
+
+    def test_unique_last_by_bytes(self):
+        num_elements = 200
+        list_tuples = [(key, "") for key in range(num_elements)] + \
+                      [(key, "v" * 20 * 1024) for key in range(num_elements)]
+        sid = self.sorted_in_disk(list_tuples,
+                                  value=get_value,
+                                  unique="last",
+                                  count_insert_to_check=None,
+                                  max_write_process_size=256 * 1024,
+                                  only_one_read=False)
+        # Replaced values are bigger than the first values of keys, then they fill several pre-sorted files
+        self.assertGreater(len(list(Path(self.tmp_dir, "sortInDiskTmps").glob("keys_sorted_*.db"))), 2)
+        self.assertEqual(list(sid.items()), list_tuples[num_elements:])
+
+
+class TestReduce(_TmpDirTestCase):
+
+    def test_reduce_across_runs(self):
+        num_elements = 30
+        list_tuples = get_shuffled_tuples(num_elements, num_values_per_key=3)
+        for count_insert_to_check in (1, 10, None):
+            for write_processes in (0, 2):
+                for max_merge_fanin in (None, 2):
+                    dict_args = dict(value=get_value,
+                                     count_insert_to_check=count_insert_to_check,
+                                     write_processes=write_processes,
+                                     max_merge_fanin=max_merge_fanin)
+
+                    sid = self.sorted_in_disk(list_tuples, reduce=count_value, initial=0, combine=add, **dict_args)
+                    self.assertEqual(list(sid.items()), [(key, 3) for key in range(num_elements)])
+
+                    sid = self.sorted_in_disk(list_tuples, reduce=append_value, initial=[], combine=add, **dict_args)
+                    self.assertEqual([(key, sorted(list_values)) for key, list_values in sid.items()],
+                                     [(key, ["value_{}_{}".format(key, num_value) for num_value in range(3)])
+                                      for key in range(num_elements)])
+
+                    sid = self.sorted_in_disk(list_tuples, reduce=min, **dict_args)
+                    self.assertEqual(list(sid.items()), [(key, "value_{}_0".format(key)) for key in range(num_elements)])
+
+    def test_reduce_by_bytes(self):
+        list_tuples = [(key % 2, "value_{}".format(key)) for key in range(NUM_ELEMENTS * 10)]
+        sid = self.sorted_in_disk(list_tuples,
+                                  value=get_value,
+                                  reduce=append_value,
+                                  initial=[],
+                                  combine=add,
+                                  count_insert_to_check=None,
+                                  max_write_process_size=64 * 1024,
+                                  only_one_read=False)
+        # Values folded in the lists of two keys fill several pre-sorted files
+        self.assertGreater(len(list(Path(self.tmp_dir, "sortInDiskTmps").glob("keys_sorted_*.db"))), 2)
+        self.assertEqual([(key, sorted(list_values)) for key, list_values in sid.items()],
+                         [(key, sorted(value for tup_key, value in list_tuples if tup_key == key)) for key in (0, 1)])
+
+    def test_reopen_reduced(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=3)
+        self.sorted_in_disk(list_tuples,
+                            value=get_value,
+                            reduce=count_value,
+                            initial=0,
+                            combine=add,
+                            count_insert_to_check=100,
+                            only_one_read=False)
+
+        sid = SortedInDisk(Path(self.tmp_dir, "sortInDiskTmps"), delete_previous=False, delete_to_end=False)
+        with self.assertRaises(ValueError):
+            list(sid.items())
+
+        sid = SortedInDisk(Path(self.tmp_dir, "sortInDiskTmps"), delete_previous=False, combine=add)
+        self.assertEqual(list(sid.items()), [(key, 3) for key in range(NUM_ELEMENTS)])
+
+    def test_initial_requires_combine(self):
+        with self.assertRaises(ValueError):
+            self.sorted_in_disk(get_shuffled_tuples(), reduce=count_value, initial=0)
+        with self.assertRaises(ValueError):
+            self.sorted_in_disk(get_shuffled_tuples(), combine=add)
+
+
+class TestPayloadRuns(_TmpDirTestCase):
+
+    def test_payload_runs(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=2)
+        for dict_args in (dict(), dict(reverse=True), dict(compression="zlib"), dict(key_codec=KeyCodec())):
+            reverse = dict_args.get("reverse", False)
+            sid = self.sorted_in_disk(list_tuples,
+                                      value=get_value,
+                                      payload_runs=True,
+                                      count_insert_to_check=100,
+                                      only_one_read=False,
+                                      **dict_args)
+            with self.subTest(args=dict_args):
+                # Values are saved in runs, then there is not a full data file
+                self.assertFalse(Path(self.tmp_dir, "sortInDiskTmps", "full_data.db").exists())
+                # Equal keys keep the order of injection
+                self.assertEqual(list(sid.items()), sorted(list_tuples, key=get_key, reverse=reverse))
+            sid.clear()
+
+    def test_payload_runs_with_write_processes(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=2)
+        for extract_in_write_processes in (False, True):
+            sid = self.sorted_in_disk(list_tuples,
+                                      value=get_value,
+                                      payload_runs=True,
+                                      write_processes=2,
+                                      extract_in_write_processes=extract_in_write_processes,
+                                      count_insert_to_check=100)
+            list_items = list(sid.items())
+            # Order of values of one key between write processes is not kept
+            self.assertEqual([key for key, _ in list_items], sorted(key for key, _ in list_tuples))
+            self.assertEqual(sorted(list_items), sorted(list_tuples))
+
+
+class TestMmapValues(_TmpDirTestCase):
+
+    def test_mmap_values(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=2)
+        for dict_args in (dict(),
+                          dict(reverse=True),
+                          dict(prefetch_window=64),
+                          dict(read_ahead_threads=2),
+                          dict(read_process=True),
+                          dict(compression="zlib")):
+            reverse = dict_args.get("reverse", False)
+            sid = self.sorted_in_disk(list_tuples,
+                                      value=get_value,
+                                      mmap_values=True,
+                                      count_insert_to_check=100,
+                                      **dict_args)
+            with self.subTest(args=dict_args):
+                # Equal keys keep the order of injection
+                self.assertEqual(list(sid.items()), sorted(list_tuples, key=get_key, reverse=reverse))
+
+    def test_mmap_values_with_write_processes(self):
+        list_tuples = get_shuffled_tuples()
+        # With the last partition key, the full data file of the second write process is empty
+        for partition_keys in (None, [NUM_ELEMENTS // 2], [NUM_ELEMENTS]):
+            sid = self.sorted_in_disk(list_tuples,
+                                      value=get_value,
+                                      mmap_values=True,
+                                      write_processes=2,
+                                      partition_keys=partition_keys,
+                                      count_insert_to_check=100)
+            self.assertEqual(list(sid.items()), sorted(list_tuples))
+
+
+class TestMergeFanin(_TmpDirTestCase):
+
+    def get_runs(self, sid):
+        dict_info = sid.get_dict_saved_info()
+        return [len(tup[1]) for tup in dict_info["dict_ipid_tup_full_list_parts"].values()]
+
+    def test_merge_fanin(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=2)
+        for max_merge_fanin in (1, 2, 3):
+            for unique in (None, "first"):
+                sid = self.sorted_in_disk(list_tuples,
+                                          value=get_value,
+                                          unique=unique,
+                                          max_merge_fanin=max_merge_fanin,
+                                          count_insert_to_check=100,
+                                          only_one_read=False)
+                with self.subTest(max_merge_fanin=max_merge_fanin, unique=unique):
+                    if unique is None:
+                        # Equal keys keep the order of injection
+                        self.assertEqual(list(sid.items()), sorted(list_tuples, key=get_key))
+                    else:
+                        self.assertEqual(list(sid.items()), sorted(dict(list_tuples[::-1]).items()))
+                    self.assertLessEqual(sum(self.get_runs(sid)), max_merge_fanin)
+                sid.clear()
+
+    def test_merge_fanin_with_write_processes(self):
+        list_tuples = get_shuffled_tuples()
+        for max_merge_fanin in (2, 3, 4):
+            for partition_keys in (None, [NUM_ELEMENTS // 2]):
+                sid = self.sorted_in_disk(list_tuples,
+                                          write_processes=2,
+                                          partition_keys=partition_keys,
+                                          max_merge_fanin=max_merge_fanin,
+                                          count_insert_to_check=100,
+                                          only_one_read=False)
+                with self.subTest(max_merge_fanin=max_merge_fanin, partition_keys=partition_keys):
+                    self.assertEqual(list(sid), sorted(list_tuples))
+                    list_runs = self.get_runs(sid)
+                    if partition_keys is None:
+                        self.assertLessEqual(sum(list_runs), max_merge_fanin)
+                    else:
+                        # Each range of keys is read apart
+                        self.assertLessEqual(max(list_runs), max_merge_fanin)
+                sid.clear()
+
+    def test_merge_fanin_lower_than_write_processes(self):
+        with self.assertRaises(ValueError):
+            self.sorted_in_disk(get_shuffled_tuples(), write_processes=3, max_merge_fanin=2)
+        sid = self.sorted_in_disk(get_shuffled_tuples(),
+                                  write_processes=3,
+                                  partition_keys=[NUM_ELEMENTS // 3, 2 * NUM_ELEMENTS // 3],
+                                  max_merge_fanin=2)
+        self.assertEqual(list(sid), sorted(get_shuffled_tuples()))
+
+
+class TestRange(_TmpDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Small blocks, then each pre-sorted file has many blocks in its sparse index
+        patcher = mock.patch.object(sorted_in_disk_module, "_RUN_BLOCK_SIZE", 512)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ranges_across_runs(self):
+        # Only even keys, then odd starts and stops are between keys
+        list_tuples = [(key * 2, "value_{}".format(key * 2)) for key in range(NUM_ELEMENTS)]
+        random.Random(NUM_ELEMENTS).shuffle(list_tuples)
+        list_ranges = [(None, None), (None, 501), (501, None), (301, 1201), (300, 302), (1200, 1200),
+                       (NUM_ELEMENTS * 2, None), (-1, None), (None, -1)]
+        for dict_args in (dict(),
+                          dict(reverse=True),
+                          dict(key_codec=KeyCodec()),
+                          dict(key_codec=KeyCodec(descending=True)),
+                          dict(compression="zlib"),
+                          dict(payload_runs=True),
+                          dict(write_processes=2)):
+            reverse = dict_args.get("reverse", False) or getattr(dict_args.get("key_codec"), "descending", False)
+            sid = self.sorted_in_disk(list_tuples,
+                                      value=get_value,
+                                      count_insert_to_check=NUM_ELEMENTS // 4,
+                                      only_one_read=False,
+                                      **dict_args)
+            for start, stop in list_ranges:
+                if reverse:
+                    start, stop = stop, start
+                list_expected = get_range(list_tuples, start, stop, reverse)
+                with self.subTest(args=dict_args, start=start, stop=stop):
+                    self.assertEqual(list(sid.items(start, stop)), list_expected)
+                    self.assertEqual(list(sid.keys(start, stop)), [key for key, _ in list_expected])
+                    self.assertEqual(list(sid.values(start, stop)), [value for _, value in list_expected])
+                    self.assertEqual([(key, list(group)) for key, group in sid.groups(start, stop)],
+                                     [(key, [value]) for key, value in list_expected])
+            sid.clear()
+
+    def test_range_with_read_ahead(self):
+        list_tuples = get_shuffled_tuples(NUM_ELEMENTS * 10)
+        sid = self.sorted_in_disk(list_tuples,
+                                  value=get_value,
+                                  payload_runs=True,
+                                  count_insert_to_check=NUM_ELEMENTS * 2,
+                                  only_one_read=False)
+        list_bytes_read = list()
+        for read_ahead_threads in (None, 2):
+            sid.read_ahead_threads = read_ahead_threads
+            self.assertEqual(list(sid.items(None, 10)), get_range(list_tuples, None, 10))
+            list_bytes_read.append(sid.get_io_stats()["bytes_read"])
+        # Blocks of runs after stop are not read ahead
+        self.assertEqual(list_bytes_read[1], list_bytes_read[0])
+        sid.clear()
+
+
+class TestJoin(_TmpDirTestCase):
+
+    def test_join_across_runs(self):
+        list_left = [(key, "left_{}_{}".format(key, num_value))
+                     for key in range(NUM_ELEMENTS) if key % 3 != 2
+                     for num_value in range(2)]
+        list_right = [(key, "right_{}".format(key)) for key in range(NUM_ELEMENTS) if key % 2 == 0]
+        random.Random(NUM_ELEMENTS).shuffle(list_left)
+        random.Random(NUM_ELEMENTS).shuffle(list_right)
+        for dict_args in (dict(), dict(reverse=True), dict(key_codec=KeyCodec()), dict(payload_runs=True)):
+            reverse = dict_args.get("reverse", False)
+            for how in ("inner", "left", "outer"):
+                sid_left = self.sorted_in_disk(list_left,
+                                               value=get_value,
+                                               count_insert_to_check=100,
+                                               tmp_dir=Path(self.tmp_dir, "sortInDiskTmpsLeft"),
+                                               **dict_args)
+                sid_right = self.sorted_in_disk(list_right,
+                                                value=get_value,
+                                                count_insert_to_check=100,
+                                                tmp_dir=Path(self.tmp_dir, "sortInDiskTmpsRight"),
+                                                **dict_args)
+                with self.subTest(args=dict_args, how=how):
+                    self.assertEqual(list(sid_left.join(sid_right, how=how)),
+                                     get_join(list_left, list_right, how, reverse))
+
+    def test_join_sorted_in_other_way(self):
+        sid_left = self.sorted_in_disk(get_shuffled_tuples(), tmp_dir=Path(self.tmp_dir, "sortInDiskTmpsLeft"))
+        sid_right = self.sorted_in_disk(get_shuffled_tuples(),
+                                        reverse=True,
+                                        tmp_dir=Path(self.tmp_dir, "sortInDiskTmpsRight"))
+        with self.assertRaises(ValueError):
+            sid_left.join(sid_right)
+        with self.assertRaises(ValueError):
+            sid_left.join(sid_left, how="right")
+
+
+class TestGroups(_TmpDirTestCase):
+
+    def test_groups_across_runs(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=3)
+        for dict_args in (dict(),
+                          dict(reverse=True),
+                          dict(payload_runs=True),
+                          dict(max_merge_fanin=2),
+                          dict(read_process=True),
+                          dict(parallel_read_processes=2)):
+            reverse = dict_args.get("reverse", False)
+            sid = self.sorted_in_disk(list_tuples, value=get_value, count_insert_to_check=100, **dict_args)
+            with self.subTest(args=dict_args):
+                # Values of each group keep the order of injection
+                self.assertEqual([(key, len(group), list(group)) for key, group in sid.groups()],
+                                 [(key, len(list_values), list_values)
+                                  for key, list_values in get_groups(list_tuples, reverse)])
+
+    def test_groups_with_write_processes(self):
+        list_tuples = get_shuffled_tuples(num_values_per_key=3)
+        sid = self.sorted_in_disk(list_tuples, value=get_value, count_insert_to_check=100, write_processes=2)
+        # Order of values of one key between write processes is not kept
+        self.assertEqual([(key, sorted(group)) for key, group in sid.groups()],
+                         [(key, sorted(list_values)) for key, list_values in get_groups(list_tuples)])
+
+
+class TestBatches(_TmpDirTestCase):
+
+    def test_batches_across_runs(self):
+        list_tuples = get_shuffled_tuples()
+        for dict_args in (dict(),
+                          dict(reverse=True),
+                          dict(read_process=True),
+                          dict(read_process=True, iter_transport="shared_memory"),
+                          dict(parallel_read_processes=2),
+                          dict(parallel_read_processes=2, iter_transport="shared_memory")):
+            reverse = dict_args.get("reverse", False)
+            sid = self.sorted_in_disk(list_tuples,
+                                      value=get_value,
+                                      count_insert_to_check=100,
+                                      only_one_read=False,
+                                      **dict_args)
+            for start, stop in ((None, None), (100, 901)):
+                if reverse:
+                    start, stop = stop, start
+                with self.subTest(args=dict_args, start=start, stop=stop):
+                    list_batches = list(sid.iter_batches(64, start=start, stop=stop))
+                    # Only the last batch can be smaller
+                    self.assertTrue(all(len(batch) == 64 for batch in list_batches[:-1]))
+                    self.assertTrue(0 < len(list_batches[-1]) <= 64)
+                    self.assertEqual([tup for batch in list_batches for tup in batch],
+                                     get_range(list_tuples, start, stop, reverse))
+            sid.clear()
+
+    def test_batch_size_lower_than_one(self):
+        sid = self.sorted_in_disk(get_shuffled_tuples())
+        with self.assertRaises(ValueError):
+            list(sid.iter_batches(0))
+
+
+class TestCompression(_TmpDirTestCase):
+
+    def test_compression_with_prefetch(self):
+        list_tuples = get_shuffled_tuples()
+        for compression in ("zlib", "lzma", "bz2"):
+            for read_ahead_threads in (None, 2):
+                sid = self.sorted_in_disk(list_tuples,
+                                          compression=compression,
+                                          count_insert_to_check=100,
+                                          prefetch_window=64,
+                                          read_ahead_threads=read_ahead_threads)
+                self.assertEqual(list(sid), sorted(list_tuples))
+
+
+class TestMultiprocess(_TmpDirTestCase):
+
+    def test_write_processes(self):
+        list_tuples = get_shuffled_tuples()
+        sid = self.sorted_in_disk(list_tuples, write_processes=2, count_insert_to_check=100)
+        self.assertEqual(list(sid), sorted(list_tuples))
+
+    def test_check_picklable_functions_keeps_start_method(self):
+        # The start method is global, then it is checked in a new interpreter
+        code = ("import multiprocessing\n"
+                "from sorted_in_disk.sorted_in_disk import _check_picklable_functions\n"
+                "_check_picklable_functions({'key': len})\n"
+                "assert multiprocessing.get_start_method(allow_none=True) is None\n")
+        env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parent.parent))
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+    def test_partition_keys(self):
+        list_tuples = get_shuffled_tuples()
+        for partition_keys in ([NUM_ELEMENTS // 2], [NUM_ELEMENTS // 4, NUM_ELEMENTS // 2]):
+            for reverse in (False, True):
+                sid = self.sorted_in_disk(list_tuples,
+                                          reverse=reverse,
+                                          write_processes=len(partition_keys) + 1,
+                                          partition_keys=partition_keys,
+                                          count_insert_to_check=100)
+                self.assertEqual(list(sid), sorted(list_tuples, reverse=reverse))
+
+    def test_partition_keys_with_key_codec(self):
+        list_tuples = get_shuffled_tuples()
+        for key_codec in (KeyCodec(), KeyCodec(descending=True)):
+            for partition_args in (dict(partition_keys=[NUM_ELEMENTS // 2]), dict(partition_sample_size=100)):
+                sid = self.sorted_in_disk(list_tuples,
+                                          key_codec=key_codec,
+                                          write_processes=2,
+                                          count_insert_to_check=100,
+                                          **partition_args)
+                self.assertEqual(list(sid), sorted(list_tuples, reverse=key_codec.descending))
+
+
+class TestSortedInDiskFile(_TmpDirTestCase):
+
+    def sorted_in_disk_file(self, lines, **kwargs):
+        path_file = Path(self.tmp_dir, "file_to_sort.txt")
+        write_iter_in_file(path_file, lines)
+        kwargs.setdefault("tmp_dir", Path(self.tmp_dir, "sortInDiskTmps"))
+        return path_file, sorted_in_disk_file(path_file, key=get_line_key, **kwargs)
+
+    def test_sorted_in_disk_file(self):
+        # Lines of different lengths (with spaces at start) then ranges of bytes split lines in the middle
+        lines = ["{}{}|{}".format(" " * (key % 3), key, "x" * (key % 7)) for key, _ in get_shuffled_tuples()]
+        for write_processes in (0, 1, 2, 3):
+            path_file, sid = self.sorted_in_disk_file(lines, write_processes=write_processes,
+                                                      count_insert_to_check=100)
+            with self.subTest(write_processes=write_processes):
+                # Lines are read as read_iter_from_file
+                self.assertEqual(list(sid), sorted(read_iter_from_file(path_file), key=get_line_key))
+
+    def test_sorted_in_disk_file_with_empty_ranges(self):
+        # More write processes than lines, then some ranges of bytes are empty
+        for lines in (["{}|{}".format(key, "x" * 100) for key in (2, 0, 1)], []):
+            path_file, sid = self.sorted_in_disk_file(lines, write_processes=8)
+            with self.subTest(lines=len(lines)):
+                self.assertEqual(list(sid), sorted(read_iter_from_file(path_file), key=get_line_key))
+
+
+class TestSharedMemoryRing(_TmpDirTestCase):
+
+    def test_write_transport(self):
+        list_tuples = get_shuffled_tuples()
+        for extract_in_write_processes in (False, True):
+            sid = self.sorted_in_disk(list_tuples,
+                                      write_processes=2,
+                                      transport="shared_memory",
+                                      ring_size=64 * 1024,
+                                      extract_in_write_processes=extract_in_write_processes,
+                                      count_insert_to_check=100)
+            self.assertEqual(list(sid), sorted(list_tuples))
+
+    def test_write_process_died(self):
+        for partition_keys in (None, [NUM_ELEMENTS // 2]):
+            with self.assertRaises(BrokenPipeError):
+                self.sorted_in_disk(get_shuffled_tuples(NUM_ELEMENTS * 10),
+                                    value=get_value_or_fail,
+                                    write_processes=2,
+                                    partition_keys=partition_keys,
+                                    transport="shared_memory",
+                                    ring_size=4 * 1024,
+                                    size_bucket_list=10,
+                                    extract_in_write_processes=True)
+
+    def test_read_transport(self):
+        list_tuples = get_shuffled_tuples()
+        for iter_batch_bytes in (None, 1024):
+            sid = self.sorted_in_disk(list_tuples,
+                                      read_process=True,
+                                      iter_transport="shared_memory",
+                                      iter_batch_bytes=iter_batch_bytes,
+                                      count_insert_to_check=100)
+            self.assertEqual(list(sid), sorted(list_tuples))
+
+    def test_read_transport_batch_bigger_than_ring(self):
+        list_tuples = [(1, b"a" * 20 * 1024 * 1024), (0, "small value"), (2, b"b" * 40 * 1024 * 1024)]
+        for iter_transport in ("queue", "shared_memory"):
+            sid = self.sorted_in_disk(list_tuples, read_process=True, iter_transport=iter_transport)
+            self.assertEqual(list(sid), sorted(list_tuples))
+
+    def test_read_process_died(self):
+        list_tuples = [(key, LoadOnlyInMainProcess(key)) for key in range(NUM_ELEMENTS)]
+        for iter_transport in ("queue", "shared_memory"):
+            sid = self.sorted_in_disk(list_tuples, read_process=True, iter_transport=iter_transport)
+            with self.assertRaises(EOFError):
+                list(sid)
+
+    def test_parallel_read_transport(self):
+        list_tuples = get_shuffled_tuples()
+        sid = self.sorted_in_disk(list_tuples,
+                                  parallel_read_processes=2,
+                                  iter_transport="shared_memory",
+                                  count_insert_to_check=100)
+        self.assertEqual(list(sid), sorted(list_tuples))
+
+
+class TestAsync(_TmpDirTestCase):
+
+    def test_aitems(self):
+        list_tuples = get_shuffled_tuples()
+        sid = self.sorted_in_disk(list_tuples, value=get_value, count_insert_to_check=100)
+
+        async def read_sorted():
+            return [tup async for tup in sid.aitems(batch_size=64)]
+
+        self.assertEqual(asyncio.run(read_sorted()), sorted(list_tuples))
+
+    def test_async_save_and_sort(self):
+        list_tuples = get_shuffled_tuples()
+
+        async def generate_tuples():
+            for tup in list_tuples:
+                yield tup
+
+        sid = SortedInDisk(Path(self.tmp_dir, "sortInDiskTmps"))
+        asyncio.run(sid.async_save_and_sort(generate_tuples(),
+                                            batch_size=64,
+                                            func_key=get_key,
+                                            count_insert_to_check=100))
+        self.assertEqual(list(sid), sorted(list_tuples))
+
+    def test_async_save_and_sort_error(self):
+        async def generate_tuples_or_fail():
+            for tup in get_shuffled_tuples():
+                yield tup
+            raise ValueError("Asynchronous iterable failed")
+
+        for write_processes in (0, 2):
+            sid = SortedInDisk(Path(self.tmp_dir, "sortInDiskTmps"))
+            with self.assertRaises(ValueError):
+                asyncio.run(sid.async_save_and_sort(generate_tuples_or_fail(),
+                                                    batch_size=64,
+                                                    func_key=get_key,
+                                                    write_processes=write_processes,
+                                                    count_insert_to_check=100))
+            # Elements got before the error are not saved as sorted data
+            self.assertEqual(list(sid), [])
+
+    def test_async_save_and_sort_fails_early(self):
+        list_consumed = list()
+
+        async def generate_tuples():
+            for tup in get_shuffled_tuples(NUM_ELEMENTS * 100):
+                list_consumed.append(tup)
+                yield tup
+
+        sid = SortedInDisk(Path(self.tmp_dir, "sortInDiskTmps"))
+        with self.assertRaises(ValueError):
+            asyncio.run(sid.async_save_and_sort(generate_tuples(), batch_size=64, func_key=get_key, unique="none"))
+        # The asynchronous iterable is not consumed after save_and_sort failed
+        self.assertLess(len(list_consumed), NUM_ELEMENTS * 10)
+
 
 if __name__ == "__main__":
-    doctest.testfile("../sorted_in_disk/sorted_in_disk.py")
-    doctest.testfile("../sorted_in_disk/utils.py")
+    unittest.main()
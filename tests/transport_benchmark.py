@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# @autor: Ramón Invarato Menéndez
+# @version 1.0
+from datetime import datetime
+from random import random
+
+from sorted_in_disk import sorted_in_disk
+
+"""
+Execute this script to compare the time to inject data in write processes with QQueue (one pickle and one pipe per 
+bucket) and with a ring buffer in shared memory per write process (one pickle per batch, without pipe)
+
+list_write_processes: number of write processes in each test
+num_elements: number of elements to inject
+"""
+list_write_processes = [1, 2, 4]
+num_elements = 1000000
+
+
+def generate_values():
+    return ((random(), "value") for _ in range(num_elements))
+
+
+if __name__ == "__main__":
+    for write_processes in list_write_processes:
+        dict_diffs = dict()
+        for transport in ("queue", "shared_memory"):
+            start = datetime.now()
+            sid = sorted_in_disk(generate_values(),
+                                 key=lambda tup: tup[0],
+                                 write_processes=write_processes,
+                                 transport=transport,
+                                 only_one_read=False)
+            count = len(sid)
+            dict_diffs[transport] = datetime.now() - start
+            sid.clear()
+
+            assert count == num_elements
+
+        print("[{} write processes | {} elements] queue: {} ({:.0f} elements/s) | "
+              "shared memory: {} ({:.0f} elements/s)".format(write_processes,
+                                                             num_elements,
+                                                             dict_diffs["queue"],
+                                                             num_elements / dict_diffs["queue"].total_seconds(),
+                                                             dict_diffs["shared_memory"],
+                                                             num_elements / dict_diffs["shared_memory"].total_seconds()))